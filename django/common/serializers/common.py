@@ -5,6 +5,7 @@ from rest_framework import serializers
 
 from core.aws import aws, S3
 from core.environment import env
+from core.serializers import BaseModelSerializer
 
 from common.models import (
     StoredFile,
@@ -13,7 +14,7 @@ from common.models import (
 from common.enums import UploaderTypeEnum
 
 
-class StoredFileSerializer(serializers.ModelSerializer):
+class StoredFileSerializer(BaseModelSerializer):
     file = serializers.FileField(write_only=True)
 
     class Meta:
@@ -51,7 +52,7 @@ class StoredFileSerializer(serializers.ModelSerializer):
         )
 
 
-class StoredFilesGroupSerializer(serializers.ModelSerializer):
+class StoredFilesGroupSerializer(BaseModelSerializer):
 
     class Meta:
         model = StoredFilesGroup
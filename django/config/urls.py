@@ -48,6 +48,7 @@ from moree.views import (
     UserStoreCategoryDetailView,
     UserStoreStampView,
     UserStoreStampDetailView,
+    UserStoreCollectionView,
     UserTermAgreementView,
     UserTermAgreementDetailView,
     StoreView,
@@ -56,6 +57,13 @@ from moree.views import (
     StoreCategoryDetailView,
     StoreCharacterPoolView,
     StoreCharacterPoolDetailView,
+    StoreCharacterDrawView,
+    StoreAutocompleteView,
+    StoreTileView,
+    StoreSnapshotView,
+    StoreCollectionView,
+    StoreDropRateView,
+    StoreWaitingRoomView,
     CharacterView,
     CharacterDetailView,
     TermView,
@@ -106,6 +114,7 @@ urlpatterns = [
     path("user-store-category/<int:pk>/", UserStoreCategoryDetailView.as_view(), name="user-store-category-detail"),
     path("user-store-stamp/", UserStoreStampView.as_view(), name='user-store-stamp'),
     path("user-store-stamp/<int:pk>/", UserStoreStampDetailView.as_view(), name="user-store-stamp-detail"),
+    path("user-store-collection/", UserStoreCollectionView.as_view(), name='user-store-collection'),
     path("user-term-agreement/", UserTermAgreementView.as_view(), name='user-term-agreement'),
     path("user-term-agreement/<int:pk>/", UserTermAgreementDetailView.as_view(), name="user-term-agreement-detail"),
     path('stored-file/', StoredFileView.as_view(), name='stored-file'),
@@ -114,6 +123,13 @@ urlpatterns = [
     path("stored-files-group/<int:pk>/", StoredFilesGroupDetailView.as_view(), name="stored-files-group-detail"),
     path("store/", StoreView.as_view(), name='store'),
     path("store/<int:pk>/", StoreDetailView.as_view(), name='store-detail'),
+    path("store/<int:pk>/draw/", StoreCharacterDrawView.as_view(), name='store-character-draw'),
+    path("store/<int:pk>/collection/", StoreCollectionView.as_view(), name='store-collection'),
+    path("store/<int:pk>/drop-rate/", StoreDropRateView.as_view(), name='store-drop-rate'),
+    path("store-tile/<int:z>/<int:x>/<int:y>/", StoreTileView.as_view(), name='store-tile'),
+    path("store-waiting-room/", StoreWaitingRoomView.as_view(), name='store-waiting-room'),
+    path("store-snapshot/", StoreSnapshotView.as_view(), name='store-snapshot'),
+    path("store-autocomplete/", StoreAutocompleteView.as_view(), name='store-autocomplete'),
     path("store-category/", StoreCategoryView.as_view(), name='store-category'),
     path("store-category/<int:pk>/", StoreCategoryDetailView.as_view(), name='store-category-detail'),
     path("store-character-pool/", StoreCharacterPoolView.as_view(), name='store-character-pool'),
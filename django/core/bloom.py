@@ -0,0 +1,51 @@
+# -*- coding: utf-8 -*-
+import hashlib
+import math
+import threading
+
+from typing import Hashable
+
+
+class BloomFilter:
+    """
+    A thread-safe in-process Bloom filter: `key in bloom_filter` is never false for an added key,
+    and is true for a key that was not added with a probability of about `error_rate`.
+
+    :param capacity: Number of keys the filter is sized for. The error rate grows beyond it.
+    :param error_rate: Target false positive rate at `capacity` keys.
+    """
+    def __init__(self, capacity: int, error_rate: float = 0.001):
+        self.capacity = max(int(capacity), 1)
+        self.error_rate = error_rate
+        self.bit_count = max(int(math.ceil(-self.capacity * math.log(error_rate) / (math.log(2) ** 2))), 8)
+        self.hash_count = max(int(round(self.bit_count / self.capacity * math.log(2))), 1)
+        self._lock = threading.Lock()
+        self._bits = bytearray((self.bit_count + 7) // 8)
+        self._count = 0
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __contains__(self, key: Hashable) -> bool:
+        bits = self._bits
+        return all(bits[index >> 3] & (1 << (index & 7)) for index in self.get_indexes(key))
+
+    def get_indexes(self, key: Hashable):
+        # double hashing (Kirsch-Mitzenmacher) 로 hash_count 개의 위치를 만듦
+        digest = hashlib.blake2b(repr(key).encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return [(h1 + i * h2) % self.bit_count for i in range(self.hash_count)]
+
+    def add(self, key: Hashable) -> None:
+        indexes = self.get_indexes(key)
+        with self._lock:
+            for index in indexes:
+                self._bits[index >> 3] |= 1 << (index & 7)
+            self._count += 1
+
+    def is_full(self) -> bool:
+        return self._count >= self.capacity
+
+
+__all__ = ["BloomFilter"]
@@ -0,0 +1,149 @@
+# -*- coding: utf-8 -*-
+import time
+import threading
+
+from typing import Any, Callable, Dict, Hashable, Iterable, Optional, Tuple
+
+
+class VersionedCache:
+    """
+    A thread-safe in-process cache whose entries are rebuilt when the caller presents a different version.
+    The version is expected to come from the database (e.g. a counter bumped on every change)
+    so that every process sees the invalidation.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries: Dict[Hashable, Tuple[Any, Any]] = {}
+
+    def get(self, key: Hashable, version: Any, builder: Callable[[], Any]) -> Any:
+        """
+        Returns the cached value of `key` built for `version`, building it with `builder` if needed.
+
+        :param key: The cache key.
+        :param version: The current version of the cached value.
+        :param builder: A callable returning the value for `version`.
+        """
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] == version:
+            return entry[1]
+
+        value = builder()
+        with self._lock:
+            current = self._entries.get(key)
+            if current is None or current[0] != version:
+                self._entries[key] = (version, value)
+        return value
+
+    def invalidate(self, key: Hashable) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+class TTLCache:
+    """
+    A thread-safe in-process cache whose entries expire `ttl` seconds after being set.
+    When `max_size` is exceeded, the oldest entries are dropped first.
+
+    :param ttl: Time to live of an entry in seconds.
+    :param max_size: Maximum number of entries.
+    """
+    def __init__(self, ttl: float, max_size: int = 10000):
+        self.ttl = ttl
+        self.max_size = max_size
+        self._lock = threading.Lock()
+        self._entries: Dict[Hashable, Tuple[float, Any]] = {}
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        entry = self._entries.get(key)
+        if entry is None:
+            return default
+        if entry[0] <= time.monotonic():
+            with self._lock:
+                if self._entries.get(key) is entry:
+                    del self._entries[key]
+            return default
+        return entry[1]
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        expire_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._entries.pop(key, None)
+            self._entries[key] = (expire_at, value)
+            while len(self._entries) > self.max_size:
+                del self._entries[next(iter(self._entries))]
+
+    def delete(self, key: Hashable) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def delete_where(self, predicate: Callable[[Hashable, Any], bool]) -> None:
+        """
+        Deletes every entry for which `predicate(key, value)` is true.
+        """
+        with self._lock:
+            for key in [key for key, (_, value) in self._entries.items() if predicate(key, value)]:
+                del self._entries[key]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+class RevocationList:
+    """
+    A thread-safe in-process set of revoked keys (e.g. token ids), each kept until its own expiry.
+    Revocations made by other processes are pulled with `loader` at most every `sync_interval` seconds,
+    using the largest row id seen so far as a watermark.
+
+    :param loader: A callable taking the last seen id and returning `(id, key, expire_at_timestamp)` rows
+                   with a larger id, in ascending order.
+    :param sync_interval: Minimum interval between two loads in seconds.
+    """
+    def __init__(self, loader: Callable[[int], Iterable[Tuple[int, Hashable, float]]], sync_interval: float = 5.0):
+        self.loader = loader
+        self.sync_interval = sync_interval
+        self._lock = threading.Lock()
+        self._entries: Dict[Hashable, float] = {}
+        self._last_id = 0
+        self._synced_at: Optional[float] = None
+
+    def __contains__(self, key: Hashable) -> bool:
+        self.sync()
+        expire_at = self._entries.get(key)
+        return expire_at is not None and expire_at > time.time()
+
+    def add(self, key: Hashable, expire_at: float) -> None:
+        """
+        Revokes `key` in this process until `expire_at` (unix timestamp).
+        """
+        with self._lock:
+            self._entries[key] = max(expire_at, self._entries.get(key, 0.0))
+
+    def sync(self, force: bool = False) -> None:
+        now = time.monotonic()
+        if not force and self._synced_at is not None and now - self._synced_at < self.sync_interval:
+            return
+        with self._lock:
+            if not force and self._synced_at is not None and now - self._synced_at < self.sync_interval:
+                return
+            self._synced_at = now
+            for id_, key, expire_at in self.loader(self._last_id):
+                self._entries[key] = max(expire_at, self._entries.get(key, 0.0))
+                self._last_id = max(self._last_id, id_)
+
+            timestamp = time.time()
+            for key in [key for key, expire_at in self._entries.items() if expire_at <= timestamp]:
+                del self._entries[key]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._last_id = 0
+            self._synced_at = None
+
+
+__all__ = ["VersionedCache", "TTLCache", "RevocationList"]
@@ -1,3 +1,4 @@
+from rest_framework import status
 from rest_framework.exceptions import APIException
 
 from django.utils.translation import gettext_lazy as _
@@ -5,3 +6,33 @@ from django.utils.translation import gettext_lazy as _
 
 class ExternalRequestError(APIException):
     default_detail = {"status_code": 10000, "message": _("외부 API 호출 오류")}
+
+
+class EmptyCharacterPoolError(APIException):
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = {"status_code": 20000, "message": _("뽑기 가능한 캐릭터가 없음")}
+
+
+class IdempotencyKeyConflictError(APIException):
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = {"status_code": 20001, "message": _("이미 다른 요청에 사용된 Idempotency-Key")}
+
+
+class CharacterSoldOutError(APIException):
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = {"status_code": 20002, "message": _("동시 요청으로 한정 수량 캐릭터가 소진됨, 다시 시도해 주세요")}
+
+
+class WaitingRoomError(APIException):
+    status_code = status.HTTP_429_TOO_MANY_REQUESTS
+    default_detail = {"status_code": 20003, "message": _("입장 대기 중, retry_after 초 후 ticket 으로 다시 요청해 주세요")}
+
+    def __init__(self, ticket, position, retry_after):
+        super().__init__({
+            **self.default_detail,
+            "ticket": ticket,
+            "position": position,
+            "retry_after": retry_after
+        })
+        # 기본 exception handler 가 Retry-After 헤더로 응답
+        self.wait = retry_after
@@ -1,5 +1,7 @@
 from datetime import datetime
+from django.db.models import F
 from django_filters import rest_framework
+from rest_framework import filters
 from rest_framework.exceptions import ValidationError
 
 
@@ -30,3 +32,33 @@ class BaseFilter(rest_framework.FilterSet):
 
     class Meta:
         fields = ["created_at", "updated_at"]
+
+
+class BaseOrderingFilter(filters.OrderingFilter):
+    """
+    OrderingFilter that also accepts the view's `ordering_aliases`,
+    a mapping of ordering names to lookups (e.g. `{"review_count": "statistics__review_count"}`).
+    Aliased lookups sort nulls last in both directions.
+    """
+    def get_valid_fields(self, queryset, view, context={}):
+        valid_fields = super().get_valid_fields(queryset, view, context)
+        return valid_fields + [(name, name) for name in getattr(view, "ordering_aliases", {})]
+
+    def filter_queryset(self, request, queryset, view):
+        ordering = self.get_ordering(request, queryset, view)
+        if not ordering:
+            return queryset
+
+        ordering_aliases = getattr(view, "ordering_aliases", {})
+        expressions = []
+        for term in ordering:
+            name = term.lstrip("-")
+            if name not in ordering_aliases:
+                expressions.append(term)
+                continue
+            expression = F(ordering_aliases[name])
+            if term.startswith("-"):
+                expressions.append(expression.desc(nulls_last=True))
+            else:
+                expressions.append(expression.asc(nulls_last=True))
+        return queryset.order_by(*expressions)
@@ -0,0 +1,162 @@
+# -*- coding: utf-8 -*-
+import math
+
+from typing import List, Tuple
+
+EARTH_RADIUS_M = 6371008.8
+METERS_PER_DEGREE = 111320.0
+
+# Web Mercator 타일이 표현할 수 있는 최대 위도
+TILE_MAX_LATITUDE = 85.0511287798
+
+GEOHASH_BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+GEOHASH_MAX_PRECISION = 12
+
+
+def encode_geohash(latitude: float, longitude: float, precision: int = GEOHASH_MAX_PRECISION) -> str:
+    """
+    Encode a coordinate into a geohash string.
+
+    :param latitude: Latitude in degrees.
+    :param longitude: Longitude in degrees.
+    :param precision: Length of the geohash. Default is 12 (about 3.7cm x 1.9cm).
+    :return: The geohash string.
+    """
+    latitude_range = [-90.0, 90.0]
+    longitude_range = [-180.0, 180.0]
+
+    geohash = []
+    bit, ch, even = 0, 0, True
+    while len(geohash) < precision:
+        if even:
+            mid = (longitude_range[0] + longitude_range[1]) / 2
+            if longitude >= mid:
+                ch |= 1 << (4 - bit)
+                longitude_range[0] = mid
+            else:
+                longitude_range[1] = mid
+        else:
+            mid = (latitude_range[0] + latitude_range[1]) / 2
+            if latitude >= mid:
+                ch |= 1 << (4 - bit)
+                latitude_range[0] = mid
+            else:
+                latitude_range[1] = mid
+        even = not even
+
+        if bit < 4:
+            bit += 1
+        else:
+            geohash.append(GEOHASH_BASE32[ch])
+            bit, ch = 0, 0
+    return "".join(geohash)
+
+
+def get_geohash_cell_size(precision: int) -> Tuple[float, float]:
+    """
+    Returns the (height, width) of a geohash cell in degrees.
+
+    :param precision: Length of the geohash.
+    """
+    bits = precision * 5
+    return 180.0 / (1 << (bits // 2)), 360.0 / (1 << (bits - bits // 2))
+
+
+def get_geohash_precision(radius_m: float, latitude: float) -> int:
+    """
+    Returns the longest geohash precision whose cell is still at least `radius_m` wide and high,
+    so that a circle of `radius_m` is always covered by the center cell and its 8 neighbours.
+
+    :param radius_m: Search radius in meters.
+    :param latitude: Latitude of the search center in degrees.
+    """
+    cos_latitude = max(math.cos(math.radians(latitude)), 0.01)
+    for precision in range(GEOHASH_MAX_PRECISION, 0, -1):
+        height, width = get_geohash_cell_size(precision)
+        if height * METERS_PER_DEGREE >= radius_m and width * METERS_PER_DEGREE * cos_latitude >= radius_m:
+            return precision
+    return 1
+
+
+def get_geohash_cover(latitude: float, longitude: float, radius_m: float) -> List[str]:
+    """
+    Returns the geohash prefixes (center cell and its neighbours) covering a circle.
+
+    :param latitude: Latitude of the circle center in degrees.
+    :param longitude: Longitude of the circle center in degrees.
+    :param radius_m: Radius of the circle in meters.
+    :return: Distinct geohash prefixes, all of the same precision.
+    """
+    precision = get_geohash_precision(radius_m, latitude)
+    height, width = get_geohash_cell_size(precision)
+
+    prefixes = set()
+    for d_latitude in (-height, 0.0, height):
+        for d_longitude in (-width, 0.0, width):
+            cell_latitude = min(max(latitude + d_latitude, -90.0), 90.0)
+            cell_longitude = (longitude + d_longitude + 180.0) % 360.0 - 180.0
+            prefixes.add(encode_geohash(cell_latitude, cell_longitude, precision))
+    return sorted(prefixes)
+
+
+def get_bounding_box(latitude: float, longitude: float, radius_m: float) -> Tuple[float, float, float, float]:
+    """
+    Returns the (min_latitude, max_latitude, min_longitude, max_longitude) box enclosing a circle.
+    """
+    d_latitude = radius_m / METERS_PER_DEGREE
+    d_longitude = radius_m / (METERS_PER_DEGREE * max(math.cos(math.radians(latitude)), 0.01))
+    return latitude - d_latitude, latitude + d_latitude, longitude - d_longitude, longitude + d_longitude
+
+
+def get_distance(latitude1: float, longitude1: float, latitude2: float, longitude2: float) -> float:
+    """
+    Returns the great-circle (haversine) distance between two coordinates in meters.
+    """
+    phi1, phi2 = math.radians(latitude1), math.radians(latitude2)
+    d_phi = phi2 - phi1
+    d_lambda = math.radians(longitude2 - longitude1)
+    a = math.sin(d_phi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(d_lambda / 2) ** 2
+    return 2 * EARTH_RADIUS_M * math.asin(math.sqrt(min(a, 1.0)))
+
+
+def get_tile(latitude: float, longitude: float, zoom: int) -> Tuple[int, int]:
+    """
+    Returns the (x, y) of the Web Mercator (slippy map) tile containing a coordinate.
+    Latitudes beyond +-TILE_MAX_LATITUDE are clamped to the edge tiles.
+
+    :param latitude: Latitude in degrees.
+    :param longitude: Longitude in degrees.
+    :param zoom: Zoom level, the world being 2^zoom x 2^zoom tiles.
+    """
+    size = 1 << zoom
+    latitude = min(max(latitude, -TILE_MAX_LATITUDE), TILE_MAX_LATITUDE)
+    phi = math.radians(latitude)
+    x = int((longitude + 180.0) / 360.0 * size)
+    y = int((1.0 - math.asinh(math.tan(phi)) / math.pi) / 2.0 * size)
+    return min(max(x, 0), size - 1), min(max(y, 0), size - 1)
+
+
+def get_tile_bounds(zoom: int, x: int, y: int) -> Tuple[float, float, float, float]:
+    """
+    Returns the (min_latitude, max_latitude, min_longitude, max_longitude) of a Web Mercator tile.
+    """
+    size = 1 << zoom
+
+    def get_latitude(tile_y):
+        return math.degrees(math.atan(math.sinh(math.pi * (1.0 - 2.0 * tile_y / size))))
+
+    return get_latitude(y + 1), get_latitude(y), x / size * 360.0 - 180.0, (x + 1) / size * 360.0 - 180.0
+
+
+__all__ = [
+    "EARTH_RADIUS_M",
+    "METERS_PER_DEGREE",
+    "encode_geohash",
+    "get_geohash_cell_size",
+    "get_geohash_precision",
+    "get_geohash_cover",
+    "get_bounding_box",
+    "get_distance",
+    "get_tile",
+    "get_tile_bounds",
+]
@@ -0,0 +1,45 @@
+# -*- coding: utf-8 -*-
+HANGUL_SYLLABLE_BASE = 0xAC00
+HANGUL_SYLLABLE_LAST = 0xD7A3
+
+CHOSEONG = (
+    "ㄱ", "ㄲ", "ㄴ", "ㄷ", "ㄸ", "ㄹ", "ㅁ", "ㅂ", "ㅃ", "ㅅ",
+    "ㅆ", "ㅇ", "ㅈ", "ㅉ", "ㅊ", "ㅋ", "ㅌ", "ㅍ", "ㅎ",
+)
+# 복합 모음/받침은 키보드 입력 순서대로 분해 (예: "ㅘ" -> "ㅗㅏ", "ㄺ" -> "ㄹㄱ")
+JUNGSEONG = (
+    "ㅏ", "ㅐ", "ㅑ", "ㅒ", "ㅓ", "ㅔ", "ㅕ", "ㅖ", "ㅗ", "ㅗㅏ", "ㅗㅐ",
+    "ㅗㅣ", "ㅛ", "ㅜ", "ㅜㅓ", "ㅜㅔ", "ㅜㅣ", "ㅠ", "ㅡ", "ㅡㅣ", "ㅣ",
+)
+JONGSEONG = (
+    "", "ㄱ", "ㄲ", "ㄱㅅ", "ㄴ", "ㄴㅈ", "ㄴㅎ", "ㄷ", "ㄹ", "ㄹㄱ",
+    "ㄹㅁ", "ㄹㅂ", "ㄹㅅ", "ㄹㅌ", "ㄹㅍ", "ㄹㅎ", "ㅁ", "ㅂ", "ㅂㅅ", "ㅅ",
+    "ㅆ", "ㅇ", "ㅈ", "ㅊ", "ㅋ", "ㅌ", "ㅍ", "ㅎ",
+)
+COMPOUND_JAMO = {
+    "ㄳ": "ㄱㅅ", "ㄵ": "ㄴㅈ", "ㄶ": "ㄴㅎ", "ㄺ": "ㄹㄱ", "ㄻ": "ㄹㅁ", "ㄼ": "ㄹㅂ", "ㄽ": "ㄹㅅ",
+    "ㄾ": "ㄹㅌ", "ㄿ": "ㄹㅍ", "ㅀ": "ㄹㅎ", "ㅄ": "ㅂㅅ",
+    "ㅘ": "ㅗㅏ", "ㅙ": "ㅗㅐ", "ㅚ": "ㅗㅣ", "ㅝ": "ㅜㅓ", "ㅞ": "ㅜㅔ", "ㅟ": "ㅜㅣ", "ㅢ": "ㅡㅣ",
+}
+
+
+def decompose(text: str) -> str:
+    """
+    Decomposes Hangul syllables into compatibility jamo in typing order, so that a partially typed
+    syllable is a prefix of the full one (e.g. "닭" -> "ㄷㅏㄹㄱ", which starts with "달" -> "ㄷㅏㄹ").
+    Other characters are kept as they are.
+    """
+    result = []
+    for character in text:
+        code = ord(character)
+        if HANGUL_SYLLABLE_BASE <= code <= HANGUL_SYLLABLE_LAST:
+            index = code - HANGUL_SYLLABLE_BASE
+            result.append(CHOSEONG[index // 588])
+            result.append(JUNGSEONG[(index % 588) // 28])
+            result.append(JONGSEONG[index % 28])
+        else:
+            result.append(COMPOUND_JAMO.get(character, character))
+    return "".join(result)
+
+
+__all__ = ["decompose"]
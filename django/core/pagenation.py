@@ -1,11 +1,206 @@
+from django.core.paginator import EmptyPage, PageNotAnInteger, InvalidPage, Paginator
+from django.db import DatabaseError, connections
+from django.db.models import Max
 from rest_framework import pagination
+from rest_framework.exceptions import NotFound, ValidationError
+
+from core.cache import TTLCache
+
+
+class CountlessPaginator(Paginator):
+    """
+    A paginator that never runs `COUNT(*)`: it fetches one extra row to know whether a next page exists.
+    `count` is None and `num_pages` only covers the pages known so far.
+    """
+    count = None
+
+    def __init__(self, *args, **kwargs):
+        super(CountlessPaginator, self).__init__(*args, **kwargs)
+        self.num_pages = 1
+
+    def validate_number(self, number):
+        try:
+            if isinstance(number, float) and not number.is_integer():
+                raise ValueError
+            number = int(number)
+        except (TypeError, ValueError):
+            raise PageNotAnInteger(self.error_messages["invalid_page"])
+        if number < 1:
+            raise EmptyPage(self.error_messages["min_page"])
+        return number
+
+    def page(self, number):
+        number = self.validate_number(number)
+        bottom = (number - 1) * self.per_page
+        object_list = list(self.object_list[bottom:bottom + self.per_page + 1])
+        if not object_list and number > 1:
+            raise EmptyPage(self.error_messages["no_results"])
+        self.num_pages = number + 1 if len(object_list) > self.per_page else number
+        return self._get_page(object_list[:self.per_page], number, self)
+
+
+class BaseCursorPagination(pagination.CursorPagination):
+    """
+    Keyset pagination on `-id` (the ordering every `get_queryset` uses).
+    Pages are fetched with `WHERE id < <cursor> ORDER BY id DESC LIMIT page_size + 1`,
+    so neither `COUNT(*)` nor `OFFSET` is run. Querysets ordered otherwise (e.g. by `ordering`, `q`, `near`
+    or `for_you`) are rejected with 400 instead of being silently reordered.
+    """
+    page_size = 500
+    ordering = "-id"
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if tuple(queryset.query.order_by) not in ((), (self.ordering,)):
+            raise ValidationError({
+                "pagination": [f"cursor pagination only supports the default ordering ({self.ordering})"]
+            })
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_ordering(self, request, queryset, view):
+        return (self.ordering,)
 
 
 class BasePagination(pagination.PageNumberPagination):
+    """
+    Page number pagination. Clients can switch to cursor pagination per request
+    with `?pagination=cursor` (the following pages carry `?cursor=`), unless `cursor_pagination_class` is None.
+
+    `?count=` controls how `count` and `max_page` are computed:
+    - (default) exact `COUNT(*)`, cached for `count_cache.ttl` seconds per path, user and filter query string
+    - `false`: no count, `count` and `max_page` are null and `next` is found by fetching one extra row
+    - `estimate`: count at most `estimated_count_limit` rows, beyond that the table size estimate
+      scaled by the share of the `estimated_count_sample_size` newest rows matching the filters
+    """
     page_size = 500
+    pagination_query_param = "pagination"
+    cursor_pagination_class = BaseCursorPagination
+    count_query_param = "count"
+    estimated_count_limit = 10000
+    estimated_count_sample_size = 1000
+
+    # (path, user id, query string) -> count
+    count_cache = TTLCache(ttl=10)
+
+    cursor_paginator = None
+    count_mode = None
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if self.is_cursor_requested(request):
+            if self.cursor_pagination_class is None:
+                raise ValidationError({"pagination": ["cursor pagination is not supported here"]})
+            self.cursor_paginator = self.cursor_pagination_class()
+            self.cursor_paginator.page_size = self.page_size
+            return self.cursor_paginator.paginate_queryset(queryset, request, view)
+
+        self.request = request
+        page_size = self.get_page_size(request)
+        if not page_size:
+            return None
+
+        self.count_mode = request.query_params.get(self.count_query_param, "").lower()
+        if self.count_mode == "false":
+            paginator = CountlessPaginator(queryset, page_size)
+        else:
+            paginator = self.django_paginator_class(queryset, page_size)
+            if self.count_mode == "estimate":
+                paginator.count = self.get_estimated_count(queryset)
+            else:
+                paginator.count = self.get_cached_count(queryset, request)
+        page_number = self.get_page_number(request, paginator)
+
+        try:
+            self.page = paginator.page(page_number)
+        except InvalidPage as exc:
+            msg = self.invalid_page_message.format(
+                page_number=page_number, message=str(exc)
+            )
+            raise NotFound(msg)
+
+        if paginator.num_pages > 1 and self.template is not None:
+            self.display_page_controls = True
+
+        return list(self.page)
+
+    def is_cursor_requested(self, request):
+        return (
+            request.query_params.get(self.pagination_query_param) == "cursor"
+            or BaseCursorPagination.cursor_query_param in request.query_params
+        )
+
+    def get_cached_count(self, queryset, request):
+        # 페이지 관련 파라미터를 제외한 필터 조건이 같으면 같은 count
+        ignored_query_params = (
+            self.page_query_param,
+            self.page_size_query_param,
+            self.count_query_param,
+            self.pagination_query_param,
+        )
+        query_string = tuple(sorted(
+            (key, tuple(sorted(values)))
+            for key, values in request.query_params.lists()
+            if key not in ignored_query_params
+        ))
+        key = (request.path, getattr(request.user, "id", None), query_string)
+
+        count = self.count_cache.get(key)
+        if count is None:
+            count = queryset.count()
+            self.count_cache.set(key, count)
+        return count
+
+    def get_estimated_count(self, queryset):
+        # SELECT COUNT(*) FROM (... LIMIT n) 로 스캔 범위를 제한
+        count = queryset[:self.estimated_count_limit + 1].count()
+        if count <= self.estimated_count_limit:
+            return count
+        estimate = self.get_table_row_estimate(queryset)
+        if queryset.query.where:
+            estimate = int(estimate * self.get_selectivity(queryset))
+        return max(count, estimate)
+
+    def get_selectivity(self, queryset):
+        """
+        Share of the table rows matching the filters of `queryset`, measured on the newest rows.
+        """
+        manager = queryset.model._default_manager.using(queryset.db)
+        sample_ids = manager.order_by("-pk").values_list("pk", flat=True)[:self.estimated_count_sample_size]
+        sample_size = manager.filter(pk__in=sample_ids).count()
+        if not sample_size:
+            return 1.0
+        return queryset.filter(pk__in=sample_ids).count() / sample_size
+
+    @staticmethod
+    def get_table_row_estimate(queryset):
+        connection = connections[queryset.db]
+        if connection.vendor == "sqlite":
+            # ANALYZE 가 실행된 경우에만 존재
+            try:
+                with connection.cursor() as cursor:
+                    cursor.execute(
+                        "SELECT stat FROM sqlite_stat1 WHERE tbl = %s LIMIT 1",
+                        [queryset.model._meta.db_table]
+                    )
+                    row = cursor.fetchone()
+            except DatabaseError:
+                row = None
+            if row:
+                return int(row[0].split()[0])
+        return queryset.model._default_manager.using(queryset.db).aggregate(max_id=Max("pk"))["max_id"] or 0
 
     def get_paginated_response(self, data):
+        if self.cursor_paginator is not None:
+            return self.cursor_paginator.get_paginated_response(data)
         response = super(BasePagination, self).get_paginated_response(data)
         response.data["current_page"] = self.page.number
-        response.data["max_page"] = self.page.paginator.num_pages
+        response.data["max_page"] = None if self.page.paginator.count is None else self.page.paginator.num_pages
+        if self.count_mode == "estimate":
+            response.data["is_count_estimated"] = self.page.paginator.count > self.estimated_count_limit
         return response
+
+
+class PageNumberPagination(BasePagination):
+    """
+    BasePagination without cursor pagination, for views ordered by a value that changes (e.g. `-updated_at`):
+    a cursor on such a value skips rows that move ahead of it between pages.
+    """
+    cursor_pagination_class = None
@@ -0,0 +1,110 @@
+# -*- coding: utf-8 -*-
+import random
+
+from typing import Generic, List, Sequence, TypeVar
+
+T = TypeVar("T")
+
+
+class AliasTable(Generic[T]):
+    """
+    Weighted random sampler using Vose's alias method.
+    Building the table is O(n), each draw is O(1) (one uniform index and one biased coin).
+
+    :param items: The items to draw.
+    :param weights: Non-negative weight of each item.
+    :raises ValueError: If there is no item with a positive weight.
+    """
+    def __init__(self, items: Sequence[T], weights: Sequence[float]):
+        if len(items) != len(weights):
+            raise ValueError("items and weights must have the same length")
+
+        pairs = [(item, float(weight)) for item, weight in zip(items, weights) if weight > 0]
+        if not pairs:
+            raise ValueError("At least one item must have a positive weight")
+
+        self.items: List[T] = [item for item, _ in pairs]
+        self.weights: List[float] = [weight for _, weight in pairs]
+        self.total_weight = sum(self.weights)
+
+        size = len(pairs)
+        self.probabilities: List[float] = [0.0] * size
+        self.aliases: List[int] = [0] * size
+
+        scaled = [weight * size / self.total_weight for weight in self.weights]
+        small = [index for index, value in enumerate(scaled) if value < 1.0]
+        large = [index for index, value in enumerate(scaled) if value >= 1.0]
+
+        while small and large:
+            less, more = small.pop(), large.pop()
+            self.probabilities[less] = scaled[less]
+            self.aliases[less] = more
+            scaled[more] = (scaled[more] + scaled[less]) - 1.0
+            if scaled[more] < 1.0:
+                small.append(more)
+            else:
+                large.append(more)
+
+        # 부동소수점 오차로 남은 항목은 확률 1
+        for index in large + small:
+            self.probabilities[index] = 1.0
+            self.aliases[index] = index
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+    def sample_index(self, rng: random.Random = random) -> int:
+        size = len(self.items)
+        # u * size 가 size 가 되는 경우 방지 (1.0 을 반환하는 rng, size 가 매우 큰 경우의 반올림)
+        index = min(int(rng.random() * size), size - 1)
+        if rng.random() < self.probabilities[index]:
+            return index
+        return self.aliases[index]
+
+    def sample(self, rng: random.Random = random) -> T:
+        """
+        Draw a single item.
+
+        :param rng: Random number generator. Default is the `random` module.
+        """
+        return self.items[self.sample_index(rng)]
+
+    def sample_many(self, count: int, rng: random.Random = random) -> List[T]:
+        """
+        Draw `count` items at once. The uniforms are generated in one pass and resolved against the table
+        without re-reading or re-summing the weights.
+
+        :param count: Number of items to draw.
+        :param rng: Random number generator. Default is the `random` module.
+        """
+        size = len(self.items)
+        uniforms = [rng.random() * size for _ in range(count)]
+        coins = [rng.random() for _ in range(count)]
+        indexes = [min(int(uniform), size - 1) for uniform in uniforms]
+        return [
+            self.items[index if coin < self.probabilities[index] else self.aliases[index]]
+            for index, coin in zip(indexes, coins)
+        ]
+
+    def sample_index_array(self, count: int, generator=None):
+        """
+        Draw `count` indexes into `items` at once with NumPy (an optional dependency, e.g. for simulations).
+        The table is resolved exactly as in `sample_index`, but vectorized.
+
+        :param count: Number of indexes to draw.
+        :param generator: A `numpy.random.Generator`. Default is a new unseeded generator.
+        :return: A `numpy.ndarray` of indexes.
+        """
+        import numpy
+
+        if generator is None:
+            generator = numpy.random.default_rng()
+        size = len(self.items)
+        indexes = numpy.minimum((generator.random(count) * size).astype(numpy.int64), size - 1)
+        coins = generator.random(count)
+        probabilities = numpy.asarray(self.probabilities)
+        aliases = numpy.asarray(self.aliases, dtype=numpy.int64)
+        return numpy.where(coins < probabilities[indexes], indexes, aliases[indexes])
+
+
+__all__ = ["AliasTable"]
@@ -0,0 +1,230 @@
+# -*- coding: utf-8 -*-
+import bisect
+import re
+import threading
+import unicodedata
+
+from typing import Dict, Hashable, Iterable, List, Optional, Sequence, Tuple
+
+from django.db import connections
+
+from core.hangul import decompose
+
+WORD_PATTERN = re.compile(r"[^\W_]+")
+
+
+def get_words(text: str) -> List[str]:
+    """
+    Splits a text into NFKC-normalized, lower-cased words of letters and digits.
+    """
+    return WORD_PATTERN.findall(unicodedata.normalize("NFKC", text or "").lower())
+
+
+def get_bigrams(word: str) -> List[str]:
+    """
+    Returns the overlapping character bigrams of a word, or the word itself if it is a single character.
+    Bigrams work for Hangul, which has no reliable word boundaries (e.g. "사카모토" -> ["사카", "카모", "모토"]).
+    """
+    if len(word) < 2:
+        return [word] if word else []
+    return [word[i:i + 2] for i in range(len(word) - 1)]
+
+
+def tokenize(text: str) -> str:
+    """
+    Returns the space separated bigrams of a text, to be indexed by FTS5's `unicode61` tokenizer.
+    """
+    return " ".join(bigram for word in get_words(text) for bigram in get_bigrams(word))
+
+
+class FTS5Index:
+    """
+    A SQLite FTS5 table of pre-tokenized character bigrams whose rowid is the id of the indexed row.
+    On other database backends the index is unavailable and `search` returns None.
+
+    :param table: Name of the virtual table.
+    :param columns: Indexed columns.
+    :param weights: bm25 weight of each column.
+    :param using: Database alias.
+    """
+    def __init__(self, table: str, columns: Sequence[str], weights: Optional[Sequence[float]] = None, using: str = "default"):
+        self.table = table
+        self.columns = tuple(columns)
+        self.weights = tuple(weights) if weights is not None else (1.0,) * len(self.columns)
+        self.using = using
+
+    @property
+    def connection(self):
+        return connections[self.using]
+
+    def is_available(self) -> bool:
+        return self.connection.vendor == "sqlite"
+
+    def create(self) -> None:
+        if not self.is_available():
+            return
+        with self.connection.cursor() as cursor:
+            cursor.execute(
+                f"CREATE VIRTUAL TABLE IF NOT EXISTS {self.table} "
+                f"USING fts5({', '.join(self.columns)}, tokenize='unicode61 remove_diacritics 0')"
+            )
+
+    def upsert(self, rowid: int, values: Dict[str, str]) -> None:
+        self.upsert_many([(rowid, values)])
+
+    def upsert_many(self, rows: Iterable[Tuple[int, Dict[str, str]]]) -> None:
+        if not self.is_available():
+            return
+        rows = [
+            (rowid, *(tokenize(values.get(column)) for column in self.columns))
+            for rowid, values in rows
+        ]
+        if not rows:
+            return
+        with self.connection.cursor() as cursor:
+            cursor.executemany(f"DELETE FROM {self.table} WHERE rowid = %s", [(row[0],) for row in rows])
+            cursor.executemany(
+                f"INSERT INTO {self.table} (rowid, {', '.join(self.columns)}) "
+                f"VALUES (%s, {', '.join(['%s'] * len(self.columns))})",
+                rows
+            )
+
+    def delete(self, rowid: int) -> None:
+        if not self.is_available():
+            return
+        with self.connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {self.table} WHERE rowid = %s", [rowid])
+
+    def clear(self) -> None:
+        if not self.is_available():
+            return
+        with self.connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {self.table}")
+
+    @staticmethod
+    def get_match_expression(query: str) -> Optional[str]:
+        """
+        Builds the FTS5 MATCH expression of a user query: every bigram of every word must match.
+        A single character word matches as a prefix of a bigram.
+        """
+        terms = []
+        for word in get_words(query):
+            if len(word) == 1:
+                terms.append(f'"{word}"*')
+            else:
+                terms.extend(f'"{bigram}"' for bigram in get_bigrams(word))
+        return " ".join(terms) or None
+
+    def search(self, query: str, limit: int = 1000) -> Optional[List[int]]:
+        """
+        Returns the rowids matching `query`, most relevant (bm25) first,
+        or None if the index is unavailable or the query has no searchable word.
+        """
+        results = self.search_scores(query, limit)
+        return None if results is None else [rowid for rowid, _ in results]
+
+    def search_scores(self, query: str, limit: int = 1000) -> Optional[List[Tuple[int, float]]]:
+        """
+        Same as `search`, with the bm25 score of each rowid: (rowid, score) pairs, lower scores being more relevant.
+        Equally relevant rows have equal scores, which lets callers break ties by another order.
+        """
+        match_expression = self.get_match_expression(query)
+        if match_expression is None or not self.is_available():
+            return None
+        rank = f"bm25({self.table}, {', '.join(str(float(weight)) for weight in self.weights)})"
+        with self.connection.cursor() as cursor:
+            cursor.execute(
+                f"SELECT rowid, {rank} FROM {self.table} WHERE {self.table} MATCH %s ORDER BY 2 LIMIT %s",
+                [match_expression, limit]
+            )
+            return [(row[0], row[1]) for row in cursor.fetchall()]
+
+
+class PrefixIndex:
+    """
+    A thread-safe in-process prefix index over a sorted array of (key, item) pairs.
+    Every word start of an item's texts is indexed, lower-cased, without spaces and with Hangul decomposed into jamo,
+    so "카페" matches "콜라보 카페" and a partially typed syllable ("캎") matches too.
+    Items must be hashable and comparable to each other (e.g. `("store", 1)`).
+
+    :param max_key_length: Keys are truncated to this many characters.
+    """
+    def __init__(self, max_key_length: int = 64):
+        self.max_key_length = max_key_length
+        self._lock = threading.Lock()
+        self._entries: List[Tuple[str, Hashable]] = []
+        self._items: Dict[Hashable, Tuple[str, List[str]]] = {}
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def normalize(self, text: str) -> str:
+        return decompose("".join((text or "").lower().split()))
+
+    def get_keys(self, texts: Iterable[str]) -> List[str]:
+        keys = set()
+        for text in texts:
+            words = (text or "").split()
+            for index in range(len(words)):
+                key = self.normalize("".join(words[index:]))[:self.max_key_length]
+                if key:
+                    keys.add(key)
+        return sorted(keys)
+
+    def rebuild(self, items: Iterable[Tuple[Hashable, str, Iterable[str]]]) -> None:
+        """
+        Replaces every item.
+
+        :param items: (item, label, texts) tuples, `label` being returned by `search`.
+        """
+        entries, item_map = [], {}
+        for item, label, texts in items:
+            keys = self.get_keys(texts)
+            item_map[item] = (label, keys)
+            entries.extend((key, item) for key in keys)
+        entries.sort()
+        with self._lock:
+            self._entries, self._items = entries, item_map
+
+    def update(self, item: Hashable, label: str, texts: Iterable[str]) -> None:
+        keys = self.get_keys(texts)
+        with self._lock:
+            self._remove(item)
+            self._items[item] = (label, keys)
+            for key in keys:
+                bisect.insort(self._entries, (key, item))
+
+    def remove(self, item: Hashable) -> None:
+        with self._lock:
+            self._remove(item)
+
+    def _remove(self, item: Hashable) -> None:
+        _, keys = self._items.pop(item, (None, ()))
+        for key in keys:
+            index = bisect.bisect_left(self._entries, (key, item))
+            if index < len(self._entries) and self._entries[index] == (key, item):
+                del self._entries[index]
+
+    def search(self, query: str, limit: int = 10) -> List[Tuple[Hashable, str]]:
+        """
+        Returns up to `limit` distinct (item, label) whose texts have a word starting with `query`, in key order.
+        """
+        prefix = self.normalize(query)[:self.max_key_length]
+        if not prefix:
+            return []
+
+        results, seen = [], set()
+        with self._lock:
+            index = bisect.bisect_left(self._entries, (prefix,))
+            while index < len(self._entries) and len(results) < limit:
+                key, item = self._entries[index]
+                if not key.startswith(prefix):
+                    break
+                if item not in seen:
+                    seen.add(item)
+                    results.append((item, self._items[item][0]))
+                index += 1
+        return results
+
+
+__all__ = ["get_words", "get_bigrams", "tokenize", "FTS5Index", "PrefixIndex"]
@@ -0,0 +1,150 @@
+# -*- coding: utf-8 -*-
+from typing import Dict, List, Optional, Set, Tuple
+
+from django.core.exceptions import FieldDoesNotExist
+from django.utils.module_loading import import_string
+from rest_framework import serializers
+
+
+def get_root_query_param(serializer, name: str) -> Optional[str]:
+    """
+    Returns the query parameter `name` if `serializer` is the root serializer (or the child of a root list serializer)
+    of a GET request, otherwise None.
+    """
+    request = serializer.context.get("request")
+    if request is None or request.method != "GET":
+        return None
+    parent = serializer.parent
+    if not (parent is None or (isinstance(parent, serializers.ListSerializer) and parent.parent is None)):
+        return None
+    return request.query_params.get(name)
+
+
+class SparseFieldsetMixin:
+    """
+    Trims the fields of the root serializer of a GET request to the comma separated `?fields=` query parameter.
+    Nested serializers are never trimmed and write requests always use every field.
+    """
+    fields_query_param = "fields"
+
+    def get_fields(self):
+        fields = super().get_fields()
+        requested_fields = self.get_requested_fields()
+        if requested_fields is None:
+            return fields
+        return {name: field for name, field in fields.items() if name in requested_fields}
+
+    def get_requested_fields(self) -> Optional[Set[str]]:
+        """
+        Returns the field names requested with `?fields=`, or None if every field should be returned.
+        """
+        value = get_root_query_param(self, self.fields_query_param)
+        if not value:
+            return None
+        requested_fields = {name.strip() for name in value.split(",") if name.strip()}
+        return requested_fields or None
+
+    def get_only_fields(self, model) -> Optional[List[str]]:
+        """
+        Returns the model fields to pass to `QuerySet.only()` for the requested fields,
+        or None if every column is needed.
+
+        :param model: The model of the queryset.
+        """
+        if self.get_requested_fields() is None:
+            return None
+
+        only_fields = [model._meta.pk.name]
+        for field in self.fields.values():
+            if field.source == "*" or "." in field.source:
+                continue
+            try:
+                model_field = model._meta.get_field(field.source)
+            except FieldDoesNotExist:
+                # SerializerMethodField, annotation 등은 컬럼 없음
+                continue
+            if model_field.concrete and not model_field.many_to_many and model_field.name not in only_fields:
+                only_fields.append(model_field.name)
+        return only_fields
+
+
+class ExpandableFieldsMixin:
+    """
+    Replaces relation fields listed in `Meta.expandable_fields` with nested serializers
+    when requested with the comma separated `?expand=` query parameter of a GET request.
+    Nested relations are expanded with dotted paths, e.g. `?expand=character.profile_img_stored_file,store`.
+
+    `Meta.expandable_fields` maps a forward relation (foreign key, one-to-one or many-to-many) field name
+    to the import string of its serializer, so that serializers can refer to each other without circular imports.
+    """
+    expand_query_param = "expand"
+    max_expand_depth = 3
+
+    def __init__(self, *args, **kwargs):
+        # 중첩된 serializer 에는 부모가 자신의 하위 expand 트리를 전달
+        self.expand = kwargs.pop("expand", None)
+        super().__init__(*args, **kwargs)
+
+    def get_fields(self):
+        fields = super().get_fields()
+        expandable_fields = getattr(self.Meta, "expandable_fields", {})
+        model = self.Meta.model
+
+        for name, expand in self.get_expand_tree().items():
+            if name not in expandable_fields or name not in fields:
+                continue
+            model_field = model._meta.get_field(name)
+            serializer_class = import_string(expandable_fields[name])
+            fields[name] = serializer_class(
+                many=model_field.many_to_many,
+                read_only=True,
+                expand=expand,
+                context=self.context
+            )
+        return fields
+
+    def get_expand_tree(self) -> Dict[str, Dict]:
+        """
+        Returns the requested expansions of this serializer as a tree, e.g. `{"character": {"profile_img_stored_file": {}}}`.
+        """
+        if self.expand is not None:
+            return self.expand
+
+        tree = {}
+        value = get_root_query_param(self, self.expand_query_param)
+        for path in (value or "").split(","):
+            node = tree
+            for name in [name.strip() for name in path.split(".") if name.strip()][:self.max_expand_depth]:
+                node = node.setdefault(name, {})
+        self.expand = tree
+        return tree
+
+    def get_related_lookups(self, prefix: str = "", single_valued: bool = True) -> Tuple[List[str], List[str]]:
+        """
+        Returns the `select_related` and `prefetch_related` lookups needed to serialize the expanded fields
+        with a constant number of queries.
+
+        :param prefix: Lookup path of this serializer from the root model.
+        :param single_valued: Whether every relation on the path so far can be joined (no many-to-many).
+        """
+        select_related, prefetch_related = [], []
+        for name, field in self.fields.items():
+            nested = getattr(field, "child", field)
+            if not isinstance(nested, ExpandableFieldsMixin) or nested.expand is None or field.source != name:
+                continue
+
+            lookup = f"{prefix}{name}"
+            is_single_valued = single_valued and not isinstance(field, serializers.ListSerializer)
+            (select_related if is_single_valued else prefetch_related).append(lookup)
+
+            nested_select_related, nested_prefetch_related = nested.get_related_lookups(f"{lookup}__", is_single_valued)
+            select_related += nested_select_related
+            prefetch_related += nested_prefetch_related
+        return select_related, prefetch_related
+
+
+class BaseModelSerializer(ExpandableFieldsMixin, SparseFieldsetMixin, serializers.ModelSerializer):
+    pass
+
+
+__all__ = ["SparseFieldsetMixin", "ExpandableFieldsMixin", "BaseModelSerializer"]
@@ -0,0 +1,112 @@
+# -*- coding: utf-8 -*-
+import struct
+import threading
+
+from typing import Dict, Iterable, Optional, Tuple
+
+
+class BinarySnapshot:
+    """
+    A thread-safe in-process set of fixed-size little-endian records keyed by an unsigned 32-bit id,
+    serialized as a compact, versioned binary file.
+
+    Full snapshot::
+
+        header  magic(4s) format_version(H) kind(B)=0 version(Q) record_count(I)
+        records record_count x record_format (the first field is the id), ordered by id
+
+    Delta since a version::
+
+        header  magic(4s) format_version(H) kind(B)=1 since(Q) version(Q) record_count(I) deleted_count(I)
+        records record_count x record_format (added or changed), ordered by id
+        deleted deleted_count x id(I), ordered
+
+    :param magic: 4 bytes identifying the file.
+    :param format_version: Version of the record format, to be bumped when `record_format` changes.
+    :param record_format: `struct` format of a record without byte order prefix, starting with the id (`I`).
+    """
+    FULL = 0
+    DELTA = 1
+
+    def __init__(self, magic: bytes, format_version: int, record_format: str):
+        self.magic = magic
+        self.format_version = format_version
+        self.record_struct = struct.Struct(f"<{record_format}")
+        self.full_header_struct = struct.Struct("<4sHBQI")
+        self.delta_header_struct = struct.Struct("<4sHBQQII")
+        self.version = 0
+        self._lock = threading.Lock()
+        self._records: Dict[int, bytes] = {}
+        self._dump: Optional[Tuple[int, bytes]] = None
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    def pack(self, *values) -> bytes:
+        return self.record_struct.pack(*values)
+
+    def rebuild(self, records: Iterable[Tuple], version: int) -> None:
+        """
+        Replaces every record.
+
+        :param records: Record value tuples, starting with the id.
+        :param version: Version of the new state.
+        """
+        packed_records = {values[0]: self.pack(*values) for values in records}
+        with self._lock:
+            self._records = packed_records
+            self.version = version
+            self._dump = None
+
+    def apply(self, records: Iterable[Tuple], deleted_ids: Iterable[int], version: int) -> None:
+        """
+        Adds or replaces `records`, removes `deleted_ids` and moves to `version`.
+        """
+        packed_records = [(values[0], self.pack(*values)) for values in records]
+        with self._lock:
+            for id_ in deleted_ids:
+                self._records.pop(id_, None)
+            for id_, record in packed_records:
+                self._records[id_] = record
+            if version != self.version:
+                self.version = version
+                self._dump = None
+
+    def dumps(self) -> Tuple[int, bytes]:
+        """
+        Returns (version, full snapshot), cached until the next change.
+        """
+        with self._lock:
+            if self._dump is None or self._dump[0] != self.version:
+                ids = sorted(self._records)
+                self._dump = (self.version, b"".join([
+                    self.full_header_struct.pack(self.magic, self.format_version, self.FULL, self.version, len(ids)),
+                    *(self._records[id_] for id_ in ids),
+                ]))
+            return self._dump
+
+    def dumps_delta(self, since: int, changed_ids: Iterable[int]) -> Tuple[int, bytes]:
+        """
+        Returns (version, delta) of the records changed after `since`.
+
+        :param since: Version the client has.
+        :param changed_ids: Ids changed between `since` and the current version.
+        """
+        with self._lock:
+            records, deleted_ids = [], []
+            for id_ in sorted(set(changed_ids)):
+                record = self._records.get(id_)
+                if record is None:
+                    deleted_ids.append(id_)
+                else:
+                    records.append(record)
+            return self.version, b"".join([
+                self.delta_header_struct.pack(
+                    self.magic, self.format_version, self.DELTA, since, self.version, len(records), len(deleted_ids)
+                ),
+                *records,
+                struct.pack(f"<{len(deleted_ids)}I", *deleted_ids),
+            ])
+
+
+__all__ = ["BinarySnapshot"]
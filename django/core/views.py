@@ -1,7 +1,59 @@
 from rest_framework import generics
+from rest_framework.fields import BooleanField
+
+from core.serializers import ExpandableFieldsMixin, SparseFieldsetMixin
 
 
 class BaseGenericAPIView(generics.GenericAPIView):
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        if self.request.method != "GET" or not hasattr(queryset, "model"):
+            return queryset
+
+        serializer_class = self.get_serializer_class()
+        if not issubclass(serializer_class, (ExpandableFieldsMixin, SparseFieldsetMixin)):
+            return queryset
+
+        serializer = serializer_class(context=self.get_serializer_context())
+        if isinstance(serializer, ExpandableFieldsMixin):
+            queryset = self.select_expanded_fields(queryset, serializer)
+        if isinstance(serializer, SparseFieldsetMixin):
+            queryset = self.defer_unrequested_fields(queryset, serializer)
+        return queryset
+
+    def select_expanded_fields(self, queryset, serializer):
+        """
+        Joins or prefetches the relations expanded with `?expand=` (see `ExpandableFieldsMixin`).
+        """
+        select_related, prefetch_related = serializer.get_related_lookups()
+        if select_related:
+            queryset = queryset.select_related(*select_related)
+        if prefetch_related:
+            queryset = queryset.prefetch_related(*prefetch_related)
+        return queryset
+
+    def defer_unrequested_fields(self, queryset, serializer):
+        """
+        Loads only the columns of the fields requested with `?fields=` (see `SparseFieldsetMixin`).
+        """
+        only_fields = serializer.get_only_fields(queryset.model)
+        if only_fields is None:
+            return queryset
+
+        # select_related 대상은 지연 로딩될 수 없으므로 함께 조회
+        select_related = queryset.query.select_related
+        if select_related is True:
+            return queryset
+        if isinstance(select_related, dict):
+            only_fields += [name for name in select_related if name not in only_fields]
+        return queryset.only(*only_fields)
+
+    def get_boolean_query_param(self, name):
+        """
+        Returns whether the query parameter `name` is a true value (e.g. `true`, `1`).
+        """
+        return self.request.query_params.get(name) in BooleanField.TRUE_VALUES
+
     def check_permissions(self, request):
         """
         Check if the request should be permitted.
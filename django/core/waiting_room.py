@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*-
+import math
+
+from datetime import datetime
+from typing import Hashable, Optional, Tuple
+
+from django.core import signing
+
+
+class WaitingRoom:
+    """
+    Admission control with numbered tickets and a leaky bucket in virtual time.
+    A room opens at `opened_at` and admits `burst` tickets at once, then `rate` tickets per second:
+    ticket `number` (1-based) is admitted from `opened_at + (number - burst) / rate`.
+    Only the ticket counter has to be shared between processes (see `moree.models.StoreWaitingRoom`),
+    the position of a ticket is computed from the ticket itself.
+
+    Tickets are signed (`django.core.signing`) with the room, its opening time and the holder,
+    so they cannot be forged, shared between users or reused for a later opening.
+
+    :param salt: Signing salt, unique per kind of room.
+    :param rate: Tickets admitted per second.
+    :param burst: Tickets admitted at the opening.
+    """
+    def __init__(self, salt: str, rate: float, burst: int):
+        self.salt = salt
+        self.rate = rate
+        self.burst = burst
+
+    def dumps_ticket(self, room: Hashable, opened_at: datetime, number: int, holder: Hashable) -> str:
+        return signing.dumps([room, opened_at.isoformat(), number, holder], salt=self.salt)
+
+    def read_ticket(self, ticket: str) -> Optional[Tuple[Hashable, datetime, int, Hashable]]:
+        """
+        Returns (room, opened_at, number, holder) of `ticket`, or None if it is invalid.
+        """
+        try:
+            room, opened_at, number, holder = signing.loads(ticket, salt=self.salt)
+            return room, datetime.fromisoformat(opened_at), int(number), holder
+        except (signing.BadSignature, TypeError, ValueError):
+            return None
+
+    def loads_ticket(self, ticket: str, room: Hashable, opened_at: datetime, holder: Hashable) -> Optional[int]:
+        """
+        Returns the number of `ticket`, or None if it is invalid or was issued for another room, opening or holder.
+        """
+        values = self.read_ticket(ticket)
+        if values is None or values[0] != room or values[1] != opened_at or values[3] != holder:
+            return None
+        return values[2]
+
+    def get_admitted_count(self, opened_at: datetime, now: datetime) -> int:
+        elapsed = max((now - opened_at).total_seconds(), 0.0)
+        return self.burst + int(elapsed * self.rate)
+
+    def get_position(self, opened_at: datetime, number: int, now: datetime) -> Tuple[int, int]:
+        """
+        :return: (place in the line, 1 being the next one admitted, seconds until it is admitted).
+                 (0, 0) if the ticket is admitted.
+        """
+        position = number - self.get_admitted_count(opened_at, now)
+        if position <= 0:
+            return 0, 0
+        admitted_at = (number - self.burst) / self.rate
+        retry_after = max(int(math.ceil(admitted_at - (now - opened_at).total_seconds())), 1)
+        return position, retry_after
+
+
+__all__ = ["WaitingRoom"]
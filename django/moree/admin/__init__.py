@@ -1,8 +1,11 @@
 from .user import (
     UserAdmin,
     UserAccessTokenAdmin,
+    UserAccessTokenRevocationAdmin,
     UserRefreshTokenAdmin,
     UserCharacterInventoryAdmin,
+    UserCharacterDrawAdmin,
+    UserStoreDrawSummaryAdmin,
     UserFolloingAdmin,
     UserTermAgreementAdmin,
     UserReviewAdmin,
@@ -10,6 +13,8 @@ from .user import (
     UserStoreStampAdmin,
     UserStoreBookmarkAdmin,
     UserStoreCategoryAdmin,
+    UserStoreRecommendationAdmin,
+    UserStoreCollectionAdmin,
     UserLogAdmin,
     UserSMSVerificationAdmin,
     UserSMSVerificationRequestAdmin,
@@ -22,7 +27,12 @@ from .term import (
 from .store import (
     StoreAdmin,
     StoreCategoryAdmin,
-    StoreCharacterPoolAdmin
+    StoreCharacterPoolAdmin,
+    StoreStatisticsAdmin,
+    StoreChangeLogAdmin,
+    StoreGridCellAdmin,
+    StoreWaitingRoomAdmin,
+    StoreWaitingRoomTicketAdmin
 )
 from .character import (
     CharacterAdmin
@@ -5,7 +5,12 @@ from core.environment import env
 from moree.models import (
     Store,
     StoreCategory,
-    StoreCharacterPool
+    StoreCharacterPool,
+    StoreStatistics,
+    StoreChangeLog,
+    StoreGridCell,
+    StoreWaitingRoom,
+    StoreWaitingRoomTicket
 )
 from moree.form import StoreAdminForm
 
@@ -96,6 +101,7 @@ class StoreCharacterPoolAdmin(admin.ModelAdmin):
         "store_title",
         "character_name",
         "weight",
+        "stock",
         "status",
         "created_at",
         "updated_at"
@@ -111,3 +117,43 @@ class StoreCharacterPoolAdmin(admin.ModelAdmin):
     def character_name(self, obj):
         return obj.character.name
     character_name.short_description = "Character Name"
+
+
+@admin.register(StoreStatistics)
+class StoreStatisticsAdmin(admin.ModelAdmin):
+    def get_list_display(self, request):
+        return tuple(field.name for field in self.model._meta.fields)
+    search_fields = ("store__title",)
+    ordering = ("-review_count",)
+
+
+@admin.register(StoreChangeLog)
+class StoreChangeLogAdmin(admin.ModelAdmin):
+    def get_list_display(self, request):
+        return tuple(field.name for field in self.model._meta.fields)
+    search_fields = ("store_id",)
+    ordering = ("-id",)
+
+
+@admin.register(StoreGridCell)
+class StoreGridCellAdmin(admin.ModelAdmin):
+    def get_list_display(self, request):
+        return tuple(field.name for field in self.model._meta.fields)
+    list_filter = ("zoom",)
+    ordering = ("zoom", "y", "x")
+
+
+@admin.register(StoreWaitingRoom)
+class StoreWaitingRoomAdmin(admin.ModelAdmin):
+    def get_list_display(self, request):
+        return tuple(field.name for field in self.model._meta.fields)
+    search_fields = ("store__title",)
+    ordering = ("-opened_at",)
+
+
+@admin.register(StoreWaitingRoomTicket)
+class StoreWaitingRoomTicketAdmin(admin.ModelAdmin):
+    def get_list_display(self, request):
+        return tuple(field.name for field in self.model._meta.fields)
+    search_fields = ("waiting_room__store__title", "user__name")
+    ordering = ("-id",)
@@ -2,8 +2,11 @@ from django.contrib import admin
 from moree.models import (
     User,
     UserAccessToken,
+    UserAccessTokenRevocation,
     UserRefreshToken,
     UserCharacterInventory,
+    UserCharacterDraw,
+    UserStoreDrawSummary,
     UserFolloing,
     UserTermAgreement,
     UserReview,
@@ -11,6 +14,8 @@ from moree.models import (
     UserStoreStamp,
     UserStoreBookmark,
     UserStoreCategory,
+    UserStoreRecommendation,
+    UserStoreCollection,
     UserLog,
     UserSMSVerification,
     UserSMSVerificationRequest,
@@ -34,6 +39,12 @@ class UserAccessTokenAdmin(admin.ModelAdmin):
         return tuple(field.name for field in self.model._meta.fields)
 
 
+@admin.register(UserAccessTokenRevocation)
+class UserAccessTokenRevocationAdmin(admin.ModelAdmin):
+    def get_list_display(self, request):
+        return tuple(field.name for field in self.model._meta.fields)
+
+
 @admin.register(UserRefreshToken)
 class UserRefreshTokenAdmin(admin.ModelAdmin):
     def get_list_display(self, request):
@@ -46,6 +57,18 @@ class UserCharacterInventoryAdmin(admin.ModelAdmin):
         return tuple(field.name for field in self.model._meta.fields)
 
 
+@admin.register(UserCharacterDraw)
+class UserCharacterDrawAdmin(admin.ModelAdmin):
+    def get_list_display(self, request):
+        return tuple(field.name for field in self.model._meta.fields)
+
+
+@admin.register(UserStoreDrawSummary)
+class UserStoreDrawSummaryAdmin(admin.ModelAdmin):
+    def get_list_display(self, request):
+        return tuple(field.name for field in self.model._meta.fields)
+
+
 @admin.register(UserFolloing)
 class UserFolloingAdmin(admin.ModelAdmin):
     def get_list_display(self, request):
@@ -95,6 +118,18 @@ class UserStoreCategoryAdmin(admin.ModelAdmin):
         return tuple(field.name for field in self.model._meta.fields)
 
 
+@admin.register(UserStoreCollection)
+class UserStoreCollectionAdmin(admin.ModelAdmin):
+    def get_list_display(self, request):
+        return tuple(field.name for field in self.model._meta.fields)
+
+
+@admin.register(UserStoreRecommendation)
+class UserStoreRecommendationAdmin(admin.ModelAdmin):
+    def get_list_display(self, request):
+        return tuple(field.name for field in self.model._meta.fields)
+
+
 @admin.register(UserLog)
 class UserLogAdmin(admin.ModelAdmin):
     def get_list_display(self, request):
@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class SampleConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'moree'
+
+    def ready(self):
+        from moree import signals  # noqa: F401
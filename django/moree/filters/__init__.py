@@ -9,6 +9,7 @@ from .user import (
     UserStoreBookmarkFilter,
     UserStoreCategoryFilter,
     UserStoreStampFilter,
+    UserStoreCollectionFilter,
     UserTermAgreementFilter,
 )
 from .store import (
@@ -1,21 +1,64 @@
+import math
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.utils import timezone
+from django.db.models import Case, F, FloatField, Q, Value, When
+from django.db.models.functions import ASin, Cast, Cos, Power, Radians, Sin, Sqrt
 from django_filters import rest_framework
+from rest_framework.exceptions import ValidationError
 
 from core.filters import BaseFilter, EpochTimeFilter
+from core.geo import EARTH_RADIUS_M, get_bounding_box, get_geohash_cover
 from moree.models import (
     Store,
     StoreCategory,
-    StoreCharacterPool
+    StoreCharacterPool,
+    StoreOpenInterval,
+    UserStoreRecommendation
 )
 
 
+def get_distance_expression(latitude, longitude):
+    """
+    각 행의 latitude/longitude 와 주어진 좌표 사이의 haversine 거리(m)
+    """
+    phi = math.radians(latitude)
+    row_phi = Radians(Cast(F("latitude"), FloatField()))
+    row_lambda = Radians(Cast(F("longitude"), FloatField()))
+
+    a = (
+        Power(Sin((row_phi - Value(phi)) / Value(2.0)), 2)
+        + Value(math.cos(phi)) * Cos(row_phi) * Power(Sin((row_lambda - Value(math.radians(longitude))) / Value(2.0)), 2)
+    )
+    return Value(2.0 * EARTH_RADIUS_M) * ASin(Sqrt(a))
+
+
 class StoreFilter(BaseFilter):
+    DEFAULT_RADIUS_M = 1000
+    MAX_RADIUS_M = 50000
+
+    q = rest_framework.CharFilter(
+        method="filter_q",
+        help_text="title/address/description 검색, 관련도 순 정렬 (near 와 함께 사용하면 관련도가 같은 스토어는 거리순)"
+    )
+
     title = rest_framework.CharFilter(field_name="title", lookup_expr="iexact")
     title_contains = rest_framework.CharFilter(field_name="title", lookup_expr="icontains")
 
     address = rest_framework.CharFilter(field_name="address", lookup_expr="iexact")
     address_contains = rest_framework.CharFilter(field_name="address", lookup_expr="icontains")
 
-    business_day_mask = rest_framework.NumberFilter(method="business_day_mask")
+    business_day_mask = rest_framework.NumberFilter(method="filter_business_day_mask")
+
+    categories = rest_framework.CharFilter(method="filter_categories", help_text="StoreCategory id 목록 (예: 1,3)")
+    categories_match = rest_framework.ChoiceFilter(
+        method="filter_categories_match",
+        choices=(("any", "any"), ("all", "all")),
+        help_text="categories 중 하나라도(any, 기본값) 혹은 모두(all) 포함"
+    )
+
+    open_at = rest_framework.NumberFilter(method="filter_open_at", help_text="epoch time 에 영업 중인 스토어")
+    open_now = rest_framework.BooleanFilter(method="filter_open_now", help_text="true 이면 현재 영업 중인 스토어")
 
     latitude = rest_framework.NumberFilter(field_name="latitude", lookup_expr="exact")
     latitude_gt = rest_framework.NumberFilter(field_name="latitude", lookup_expr="gt")
@@ -29,6 +72,9 @@ class StoreFilter(BaseFilter):
     longitude_lt = rest_framework.NumberFilter(field_name="longitude", lookup_expr="lt")
     longitude_lte = rest_framework.NumberFilter(field_name="longitude", lookup_expr="lte")
 
+    near = rest_framework.CharFilter(method="filter_near", help_text="latitude,longitude")
+    radius_m = rest_framework.NumberFilter(method="filter_radius_m", help_text="near 검색 반경(m)")
+
     status = rest_framework.CharFilter(field_name="status", lookup_expr="iexact")
 
     start_date = rest_framework.DateFilter(field_name="start_date", lookup_expr="exact")
@@ -61,8 +107,182 @@ class StoreFilter(BaseFilter):
     pre_order_start_at_lt = EpochTimeFilter(field_name="pre_order_start_at", lookup_expr="lt")
     pre_order_start_at_lte = EpochTimeFilter(field_name="pre_order_start_at", lookup_expr="lte")
 
-    def business_day_mask(self, queryset, name, value):
-        return queryset.filter(business_day__bitand=value).exclude(business_day__bitand=value==0)
+    for_you = rest_framework.BooleanFilter(
+        method="filter_for_you",
+        help_text="true 이면 선호 카테고리/인기도/평점 (near 와 함께 사용하면 거리도) 기준 추천 순 (로그인 필요)"
+    )
+
+    MAX_SEARCH_RESULTS = 1000
+
+    def filter_q(self, queryset, name, value):
+        store_scores = Store.search_index.search_scores(value, limit=self.MAX_SEARCH_RESULTS)
+        if store_scores is None:
+            # 검색 인덱스를 사용할 수 없는 경우 (sqlite 가 아니거나 검색 가능한 단어가 없음)
+            return queryset.filter(
+                Q(title__icontains=value) | Q(address__icontains=value) | Q(description__icontains=value)
+            )
+        if not store_scores:
+            return queryset.none()
+        # 부동소수점 오차로 같은 관련도가 갈리지 않도록 반올림한 bm25 점수 (작을수록 관련도가 높음)
+        queryset = queryset.filter(
+            id__in=[store_id for store_id, _ in store_scores]
+        ).annotate(
+            search_rank=Case(
+                *(When(id=store_id, then=Value(round(score, 6))) for store_id, score in store_scores),
+                output_field=FloatField()
+            )
+        )
+        return queryset.order_by(*self.get_search_ordering(queryset))
+
+    @staticmethod
+    def get_search_ordering(queryset):
+        # 관련도가 우선이며, near 필터로 거리가 계산되어 있으면 같은 관련도에서 거리순
+        if "distance" in queryset.query.annotations:
+            return "search_rank", "distance", "-id"
+        return "search_rank", "-id"
+
+    def filter_for_you(self, queryset, name, value):
+        if not value:
+            return queryset
+        user = getattr(self.request, "authenticated_user", None)
+        if user is None:
+            raise ValidationError("for_you requires an authenticated user")
+
+        store_scores = UserStoreRecommendation.get_store_scores(user)
+        if store_scores is None:
+            # 랭킹이 계산되기 전 (build_user_store_recommendations) 에는 거리순 또는 평점/인기순
+            if "distance" in queryset.query.annotations:
+                return queryset
+            return queryset.order_by(
+                F("statistics__rating_score").desc(nulls_last=True),
+                F("statistics__bookmark_count").desc(nulls_last=True),
+                "-id"
+            )
+        if not store_scores:
+            return queryset.none()
+        score = Case(
+            *(When(id=store_id, then=Value(score)) for store_id, score in store_scores),
+            output_field=FloatField()
+        )
+        if "distance" in queryset.query.annotations:
+            # near 필터로 계산된 거리를 반영
+            score = score / (Value(1.0) + F("distance") / Value(UserStoreRecommendation.DISTANCE_SCALE_M))
+        return queryset.filter(
+            id__in=[store_id for store_id, _ in store_scores]
+        ).annotate(
+            recommendation_score=score
+        ).order_by("-recommendation_score", "-id")
+
+    def filter_near(self, queryset, name, value):
+        try:
+            latitude, longitude = (float(coordinate) for coordinate in value.split(","))
+        except ValueError:
+            raise ValidationError(f"Invalid coordinate: {value}")
+        if not (-90 <= latitude <= 90 and -180 <= longitude <= 180):
+            raise ValidationError(f"Invalid coordinate: {value}")
+
+        radius_m = float(self.form.cleaned_data.get("radius_m") or self.DEFAULT_RADIUS_M)
+        if not (0 < radius_m <= self.MAX_RADIUS_M):
+            raise ValidationError(f"Invalid radius_m: {radius_m} (0 < radius_m <= {self.MAX_RADIUS_M})")
+
+        # geohash 인덱스 범위 스캔으로 후보를 좁힌 뒤 실제 거리로 거르고 정렬
+        geohash_condition = Q()
+        for prefix in get_geohash_cover(latitude, longitude, radius_m):
+            geohash_condition |= Q(geohash__gte=prefix, geohash__lt=f"{prefix}~")
+        min_latitude, max_latitude, min_longitude, max_longitude = get_bounding_box(latitude, longitude, radius_m)
+
+        queryset = queryset.filter(
+            geohash_condition,
+            latitude__gte=min_latitude,
+            latitude__lte=max_latitude,
+            longitude__gte=min_longitude,
+            longitude__lte=max_longitude,
+        ).annotate(
+            distance=get_distance_expression(latitude, longitude)
+        ).filter(
+            distance__lte=radius_m
+        )
+        if "search_rank" in queryset.query.annotations:
+            return queryset.order_by(*self.get_search_ordering(queryset))
+        return queryset.order_by("distance", "-id")
+
+    def filter_radius_m(self, queryset, name, value):
+        # near 필터에서 함께 사용
+        return queryset
+
+    def filter_categories(self, queryset, name, value):
+        try:
+            store_category_ids = {int(item) for item in value.split(",") if item.strip()}
+        except ValueError:
+            raise ValidationError(f"Invalid categories: {value}")
+        if not store_category_ids:
+            return queryset
+        match_all = self.form.cleaned_data.get("categories_match") == "all"
+
+        # 비트마스크로 표현되는 카테고리는 through 테이블 조인 없이 category_mask 로 비교
+        mask = StoreCategory.get_mask(store_category_ids)
+        extra_ids = {
+            store_category_id for store_category_id in store_category_ids
+            if not 0 < store_category_id <= StoreCategory.MAX_MASK_ID
+        }
+        queryset = queryset.alias(category_masked=F("category_mask").bitand(mask))
+        if match_all:
+            if mask:
+                queryset = queryset.filter(category_masked=mask)
+            for store_category_id in extra_ids:
+                queryset = queryset.filter(store_categories__id=store_category_id)
+            return queryset
+
+        condition = Q(category_masked__gt=0) if mask else Q()
+        if extra_ids:
+            condition |= Q(id__in=Store.store_categories.through.objects.filter(
+                storecategory_id__in=extra_ids
+            ).values("store_id"))
+        return queryset.filter(condition)
+
+    def filter_categories_match(self, queryset, name, value):
+        # categories 필터에서 함께 사용
+        return queryset
+
+    def filter_business_day_mask(self, queryset, name, value):
+        return queryset.alias(
+            business_day_masked=F("business_day").bitand(int(value))
+        ).exclude(business_day_masked=0)
+
+    def filter_open_at(self, queryset, name, value):
+        try:
+            moment = datetime.fromtimestamp(float(value), tz=dt_timezone.utc)
+        except (ValueError, OSError, OverflowError):
+            raise ValidationError(f"Invalid epoch time: {value}")
+        return self.filter_open_at_moment(queryset, moment)
+
+    def filter_open_now(self, queryset, name, value):
+        if not value:
+            return queryset
+        return self.filter_open_at_moment(queryset, timezone.now())
+
+    @staticmethod
+    def filter_open_at_moment(queryset, moment):
+        # 영업시간은 TIME_ZONE(Asia/Seoul) 기준으로 저장되어 있음
+        local_moment = timezone.localtime(moment)
+        minute = local_moment.hour * 60 + local_moment.minute
+        today = local_moment.date()
+        yesterday = today - timedelta(days=1)
+
+        intervals = StoreOpenInterval.objects.filter(
+            weekday=local_moment.weekday(),
+            start_minute__lte=minute,
+            end_minute__gt=minute
+        )
+
+        def in_period(date):
+            return Q(start_date__lte=date) & (Q(end_date__isnull=True) | Q(end_date__gte=date))
+
+        # 자정을 넘긴 구간은 전날의 영업 기간으로 판단
+        return queryset.filter(
+            Q(id__in=intervals.filter(is_overnight=False).values("store_id")) & in_period(today)
+            | Q(id__in=intervals.filter(is_overnight=True).values("store_id")) & in_period(yesterday)
+        )
 
     class Meta:
         model = Store
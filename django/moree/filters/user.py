@@ -10,6 +10,7 @@ from moree.models import (
     UserReviewReport,
     UserStoreBookmark,
     UserStoreCategory,
+    UserStoreCollection,
     UserStoreStamp,
     UserTermAgreement,
 )
@@ -98,6 +99,12 @@ class UserStoreStampFilter(BaseFilter):
         fields = "__all__"
 
 
+class UserStoreCollectionFilter(BaseFilter):
+    class Meta:
+        model = UserStoreCollection
+        fields = ["store"]
+
+
 class UserTermAgreementFilter(BaseFilter):
     class Meta:
         model = UserTermAgreement
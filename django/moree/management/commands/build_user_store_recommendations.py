@@ -0,0 +1,46 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+from django.utils import timezone
+
+from core.enums import StatusEnum
+from moree.enums import UserStatusEnum
+from moree.models import User, UserStoreRecommendation
+
+
+class Command(BaseCommand):
+    help = "Precompute the \"for you\" store ranking of users with store category preferences (e.g. from cron)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=100)
+        parser.add_argument(
+            "--max-age",
+            type=int,
+            default=3600,
+            help="Recompute rankings older than this many seconds (counters and ratings change over time)"
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        updated_before = timezone.now() - timedelta(seconds=options["max_age"])
+
+        user_ids = User.objects.filter(
+            status=UserStatusEnum.ACTIVE.value,
+            userstorecategory__status=StatusEnum.ACTIVE.value
+        ).filter(
+            Q(store_recommendation__isnull=True) | Q(store_recommendation__updated_at__lt=updated_before)
+        ).values_list("id", flat=True).distinct().order_by("id")
+
+        count = 0
+        batch = []
+        for user_id in user_ids.iterator(chunk_size=batch_size):
+            batch.append(user_id)
+            if len(batch) >= batch_size:
+                UserStoreRecommendation.build(batch)
+                count += len(batch)
+                batch = []
+        UserStoreRecommendation.build(batch)
+        count += len(batch)
+
+        self.stdout.write(self.style.SUCCESS(f"recommendation: {count} users"))
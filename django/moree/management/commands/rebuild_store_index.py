@@ -0,0 +1,61 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from core.enums import StatusEnum
+from core.geo import encode_geohash
+from moree.models import Store, StoreGridCell, StoreOpenInterval
+
+
+class Command(BaseCommand):
+    help = "Rebuild the derived indexes of every store (e.g. after `loaddata`, which skips Store.save)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+
+        stores = []
+        count = 0
+        for store in Store.objects.only("id", "latitude", "longitude").order_by("id").iterator(chunk_size=batch_size):
+            store.geohash = encode_geohash(float(store.latitude), float(store.longitude))
+            stores.append(store)
+            if len(stores) >= batch_size:
+                Store.objects.bulk_update(stores, ["geohash"])
+                count += len(stores)
+                stores = []
+        if stores:
+            Store.objects.bulk_update(stores, ["geohash"])
+            count += len(stores)
+
+        self.stdout.write(self.style.SUCCESS(f"geohash: {count} stores"))
+
+        count = 0
+        with transaction.atomic():
+            for store in Store.objects.order_by("id").iterator(chunk_size=batch_size):
+                StoreOpenInterval.rebuild(store)
+                count += 1
+        self.stdout.write(self.style.SUCCESS(f"open interval: {count} stores"))
+
+        count = 0
+        with transaction.atomic():
+            Store.search_index.create()
+            Store.search_index.clear()
+            rows = []
+            for store in Store.objects.filter(
+                status=StatusEnum.ACTIVE.value
+            ).only("id", "title", "address", "description").order_by("id").iterator(chunk_size=batch_size):
+                rows.append((store.id, {"title": store.title, "address": store.address, "description": store.description}))
+                if len(rows) >= batch_size:
+                    Store.search_index.upsert_many(rows)
+                    count += len(rows)
+                    rows = []
+            Store.search_index.upsert_many(rows)
+            count += len(rows)
+        self.stdout.write(self.style.SUCCESS(f"search index: {count} stores"))
+
+        count = Store.update_category_masks()
+        self.stdout.write(self.style.SUCCESS(f"category mask: {count} stores updated"))
+
+        count = StoreGridCell.rebuild(batch_size=batch_size)
+        self.stdout.write(self.style.SUCCESS(f"grid cell: {count} stores"))
@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from moree.models import StoreStatistics, UserStoreCollection, UserStoreDrawSummary
+
+
+class Command(BaseCommand):
+    help = "Rebuild the engagement counters of every store and the per-user draw summaries and collections"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        count = StoreStatistics.rebuild(batch_size=options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(f"statistics: {count} stores"))
+
+        count = UserStoreDrawSummary.rebuild(batch_size=options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(f"draw summary: {count} (user, store) pairs"))
+
+        count = UserStoreCollection.rebuild(batch_size=options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(f"collection: {count} (user, store) pairs"))
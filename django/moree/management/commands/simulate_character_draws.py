@@ -0,0 +1,112 @@
+import math
+import random
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.enums import StatusEnum
+from moree.models import Store, StoreCharacterPool
+
+
+def get_chi_square(observed, expected):
+    """
+    Pearson 카이제곱 적합도 검정
+
+    :param observed: 항목별 관측 횟수
+    :param expected: 항목별 기대 횟수
+    :return: (통계량, 자유도, p-value), p-value 는 Wilson-Hilferty 근사 (시뮬레이션 규모에서 편향 검출에 충분)
+    """
+    statistic = sum((o - e) ** 2 / e for o, e in zip(observed, expected) if e > 0)
+    degrees_of_freedom = len(observed) - 1
+    if degrees_of_freedom <= 0:
+        return statistic, degrees_of_freedom, 1.0
+    k = float(degrees_of_freedom)
+    z = ((statistic / k) ** (1.0 / 3.0) - (1.0 - 2.0 / (9.0 * k))) / math.sqrt(2.0 / (9.0 * k))
+    return statistic, degrees_of_freedom, 0.5 * math.erfc(z / math.sqrt(2.0))
+
+
+class Command(BaseCommand):
+    help = (
+        "Simulate character draws with the sampler used by the draw API (vectorized with NumPy), "
+        "compare the empirical rates with the pool weights (chi-square) and report the throughput"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--store", type=int, action="append", help="Store id (repeatable). Default is every active store")
+        parser.add_argument("--draws", type=int, default=1000000, help="Simulated draws per store")
+        parser.add_argument("--batch-size", type=int, default=1000000, help="Draws generated at once (memory bound)")
+        parser.add_argument("--seed", type=int, default=None)
+        parser.add_argument(
+            "--python-draws",
+            type=int,
+            default=100000,
+            help="Draws timed through AliasTable.sample_many as used by the API (0 to skip)"
+        )
+        parser.add_argument(
+            "--min-p-value",
+            type=float,
+            default=0.001,
+            help="Fail if the p-value of any store is below this value"
+        )
+
+    def handle(self, *args, **options):
+        try:
+            import numpy
+        except ImportError:
+            raise CommandError("numpy is required (pip install numpy)")
+
+        if options["draws"] <= 0 or options["batch_size"] <= 0:
+            raise CommandError("--draws and --batch-size must be positive")
+
+        stores = Store.objects.filter(status=StatusEnum.ACTIVE.value).only("id", "title", "character_pool_version").order_by("id")
+        if options["store"]:
+            stores = stores.filter(id__in=options["store"])
+
+        generator = numpy.random.default_rng(options["seed"])
+        rng = random.Random(options["seed"])
+        failures = []
+        for store in stores:
+            sampler = StoreCharacterPool.get_sampler(store)
+            if sampler is None:
+                self.stdout.write(f"store {store.id} ({store.title}): nothing to draw")
+                continue
+
+            counts = numpy.zeros(len(sampler), dtype=numpy.int64)
+            started_at = time.perf_counter()
+            remaining = options["draws"]
+            while remaining > 0:
+                batch_size = min(remaining, options["batch_size"])
+                counts += numpy.bincount(sampler.sample_index_array(batch_size, generator), minlength=len(sampler))
+                remaining -= batch_size
+            elapsed = time.perf_counter() - started_at
+
+            draws = options["draws"]
+            expected = [draws * weight / sampler.total_weight for weight in sampler.weights]
+            statistic, degrees_of_freedom, p_value = get_chi_square(counts.tolist(), expected)
+
+            self.stdout.write(
+                f"store {store.id} ({store.title}) pool version {store.character_pool_version}: "
+                f"{draws} draws, {draws / elapsed:,.0f} draws/s (numpy)"
+            )
+            self.stdout.write(f"  {'pool':>8} {'character':>10} {'weight':>8} {'expected':>10} {'observed':>10} {'diff':>9}")
+            for (pool_id, character_id), weight, count in zip(sampler.items, sampler.weights, counts.tolist()):
+                expected_rate = weight / sampler.total_weight
+                observed_rate = count / draws
+                self.stdout.write(
+                    f"  {pool_id:>8} {character_id:>10} {weight:>8g} {expected_rate:>10.6f} {observed_rate:>10.6f} "
+                    f"{observed_rate - expected_rate:>+9.6f}"
+                )
+            self.stdout.write(f"  chi-square {statistic:.3f}, dof {degrees_of_freedom}, p-value {p_value:.4f}")
+
+            if options["python_draws"] > 0:
+                started_at = time.perf_counter()
+                sampler.sample_many(options["python_draws"], rng)
+                elapsed = time.perf_counter() - started_at
+                self.stdout.write(f"  {options['python_draws'] / elapsed:,.0f} draws/s (AliasTable.sample_many)")
+
+            if p_value < options["min_p_value"]:
+                failures.append(store.id)
+
+        if failures:
+            raise CommandError(f"Draw rates deviate from the pool weights (p < {options['min_p_value']}): stores {failures}")
+        self.stdout.write(self.style.SUCCESS("draw rates match the pool weights"))
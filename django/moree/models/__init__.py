@@ -1,8 +1,12 @@
 from .user import (
     User,
     UserAccessToken,
+    UserAccessTokenRevocation,
     UserRefreshToken,
     UserCharacterInventory,
+    UserCharacterDraw,
+    UserStoreDrawSummary,
+    UserStoreCollection,
     UserFolloing,
     UserTermAgreement,
     UserReview,
@@ -10,6 +14,8 @@ from .user import (
     UserStoreStamp,
     UserStoreBookmark,
     UserStoreCategory,
+    UserStoreRecommendation,
+    UserStoreFlags,
     UserLog,
     UserSMSVerification,
     UserSMSVerificationRequest,
@@ -22,7 +28,13 @@ from .term import (
 from .store import (
     Store,
     StoreCategory,
-    StoreCharacterPool
+    StoreCharacterPool,
+    StoreOpenInterval,
+    StoreStatistics,
+    StoreChangeLog,
+    StoreGridCell,
+    StoreWaitingRoom,
+    StoreWaitingRoomTicket
 )
 from .character import (
     Character
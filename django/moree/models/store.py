@@ -1,10 +1,184 @@
-from django.db import models
+import threading
+import time
+
+from datetime import timedelta
+
+from django.db import IntegrityError, models, transaction
+from django.db.models.functions import Cast, Greatest
+from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 
+from core.cache import TTLCache, VersionedCache
 from core.enums import StatusEnum
+from core.exceptions import WaitingRoomError
+from core.geo import encode_geohash, get_tile
+from core.search import FTS5Index, PrefixIndex
+from core.snapshot import BinarySnapshot
+from core.sampler import AliasTable
+from core.waiting_room import WaitingRoom
+
+
+class StoreAutocompleteIndex(PrefixIndex):
+    """
+    활성 스토어 title/address 와 활성 카테고리 name 의 프로세스별 자동완성 인덱스
+    스토어는 StoreChangeLog id 를 워터마크로 변경분만 반영하고, 카테고리는 변경이 있으면 다시 반영
+    """
+    SYNC_INTERVAL = 1.0
+
+    def __init__(self):
+        super().__init__()
+        self.sync_lock = threading.Lock()
+        self.synced_at = None
+        self.last_change_id = None
+        self.category_version = None
+        self.category_items = set()
+
+    def sync(self, force=False):
+        now = time.monotonic()
+        if not force and self.synced_at is not None and now - self.synced_at < self.SYNC_INTERVAL:
+            return
+        # 최초 구축이 아니면 다른 스레드가 동기화하는 동안 기존 인덱스로 응답
+        if not self.sync_lock.acquire(blocking=force or self.last_change_id is None):
+            return
+        try:
+            if not force and self.synced_at is not None and now - self.synced_at < self.SYNC_INTERVAL:
+                return
+            self.synced_at = now
+            self.sync_stores()
+            self.sync_categories()
+        finally:
+            self.sync_lock.release()
+
+    def sync_stores(self):
+        if self.last_change_id is None:
+            # 구축 중의 변경은 다음 동기화에서 다시 반영되도록 워터마크를 먼저 읽음
+            self.last_change_id = StoreChangeLog.get_last_id()
+            self.rebuild(
+                (("store", store.id), store.title, (store.title, store.address))
+                for store in Store.objects.filter(
+                    status=StatusEnum.ACTIVE.value
+                ).only("id", "title", "address").iterator()
+            )
+            self.category_version, self.category_items = None, set()
+            return
+
+        self.last_change_id, store_ids = StoreChangeLog.get_changes(self.last_change_id)
+        if not store_ids:
+            return
+        stores = Store.objects.filter(
+            id__in=store_ids,
+            status=StatusEnum.ACTIVE.value
+        ).only("id", "title", "address").in_bulk()
+        for store_id in store_ids:
+            store = stores.get(store_id)
+            if store is None:
+                self.remove(("store", store_id))
+            else:
+                self.update(("store", store.id), store.title, (store.title, store.address))
+
+    def sync_categories(self):
+        category_version = tuple(StoreCategory.objects.aggregate(
+            count=models.Count("id"),
+            updated_at=models.Max("updated_at")
+        ).values())
+        if category_version == self.category_version:
+            return
+        for item in self.category_items:
+            self.remove(item)
+        self.category_items = set()
+        for store_category in StoreCategory.objects.filter(status=StatusEnum.ACTIVE.value).only("id", "name"):
+            item = ("category", store_category.id)
+            self.update(item, store_category.name, (store_category.name,))
+            self.category_items.add(item)
+        self.category_version = category_version
+
+
+class StoreSnapshot(BinarySnapshot):
+    """
+    오프라인 클라이언트용 활성 스토어 바이너리 스냅샷 (버전 = StoreChangeLog id)
+    레코드: id(I) latitude(i, 1e-6 도) longitude(i, 1e-6 도) business_day(B)
+           opening_minute(H) closing_minute(H) category_mask(Q, Store.category_mask)
+    """
+    MAGIC = b"MRST"
+    FORMAT_VERSION = 1
+    RECORD_FORMAT = "IiiBHHQ"
+    SYNC_INTERVAL = 1.0
+
+    def __init__(self):
+        super().__init__(self.MAGIC, self.FORMAT_VERSION, self.RECORD_FORMAT)
+        self.sync_lock = threading.Lock()
+        self.synced_at = None
+        self.is_built = False
+
+    def sync(self, force=False):
+        now = time.monotonic()
+        if not force and self.synced_at is not None and now - self.synced_at < self.SYNC_INTERVAL:
+            return
+        if not self.sync_lock.acquire(blocking=force or not self.is_built):
+            return
+        try:
+            if not force and self.synced_at is not None and now - self.synced_at < self.SYNC_INTERVAL:
+                return
+            self.synced_at = now
+            if not self.is_built:
+                # 구축 중의 변경은 다음 동기화에서 다시 반영되도록 워터마크를 먼저 읽음
+                version = StoreChangeLog.get_last_id()
+                self.rebuild(self.get_records(Store.objects.all()), version)
+                self.is_built = True
+                return
+
+            version, store_ids = StoreChangeLog.get_changes(self.version)
+            if not store_ids:
+                return
+            records = self.get_records(Store.objects.filter(id__in=store_ids))
+            self.apply(records, store_ids - {record[0] for record in records}, version)
+        finally:
+            self.sync_lock.release()
+
+    @staticmethod
+    def get_records(queryset):
+        stores = queryset.filter(
+            status=StatusEnum.ACTIVE.value
+        ).only(
+            "id", "latitude", "longitude", "business_day", "opening_time", "closing_time", "category_mask"
+        ).order_by("id")
+        return [
+            (
+                store.id,
+                round(store.latitude * 1000000),
+                round(store.longitude * 1000000),
+                store.business_day,
+                store.opening_time.hour * 60 + store.opening_time.minute,
+                store.closing_time.hour * 60 + store.closing_time.minute,
+                store.category_mask,
+            )
+            for store in stores
+        ]
+
+    def dumps_since(self, since):
+        """
+        :return: (버전, `since` 이후 변경분), `since` 가 현재 버전보다 크면 None
+        """
+        if since > self.version:
+            return None
+        _, store_ids = StoreChangeLog.get_changes(since, until_id=self.version)
+        return self.dumps_delta(since, store_ids)
 
 
 class Store(models.Model):
+    # datetime.weekday() 순서(월~일)의 business_day 비트
+    BUSINESS_DAY_BITS = (32, 16, 8, 4, 2, 1, 64)
+    # UPDATE ... SET x = F(x) 등으로만 갱신되어 Store.save 가 쓰지 않는 필드
+    COUNTER_FIELDS = ("character_pool_version", "category_mask")
+    # 활성 스토어의 title/address/description bigram 검색 인덱스 (rowid = store id)
+    search_index = FTS5Index(
+        "moree_store_search",
+        ("title", "address", "description"),
+        weights=(10.0, 3.0, 1.0)
+    )
+    autocomplete_index = StoreAutocompleteIndex()
+    snapshot = StoreSnapshot()
+
     store_categories = models.ManyToManyField(
         "moree.StoreCategory",
     )
@@ -19,6 +193,18 @@ class Store(models.Model):
         max_digits=10,
         decimal_places=7
     )
+    geohash = models.CharField(
+        max_length=12,
+        db_index=True,
+        editable=False,
+        default="",
+        help_text="latitude/longitude 로부터 계산되는 공간 인덱스 (반경 검색용)"
+    )
+    category_mask = models.BigIntegerField(
+        default=0,
+        editable=False,
+        help_text="store_categories 의 비트마스크 (StoreCategory.get_mask), 카테고리 필터용"
+    )
     description = models.TextField()
     business_day = models.PositiveSmallIntegerField(
         default=127,
@@ -36,6 +222,11 @@ class Store(models.Model):
         default=None,
         null=True
     )
+    character_pool_version = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        help_text="StoreCharacterPool 변경 시 증가 (뽑기 테이블 캐시 무효화용)"
+    )
     status = models.CharField(
         max_length=64,
         choices=StatusEnum.choices,
@@ -51,11 +242,141 @@ class Store(models.Model):
         verbose_name = _("Store")
         verbose_name_plural = _("Stores")
 
+    def save(self, *args, **kwargs):
+        self.geohash = encode_geohash(float(self.latitude), float(self.longitude))
+        with transaction.atomic():
+            previous = None
+            if self.pk is not None:
+                previous = Store.objects.filter(pk=self.pk).only("latitude", "longitude", "status").first()
+            if previous is not None and not kwargs.get("force_insert"):
+                kwargs["update_fields"] = self.get_update_fields(kwargs.get("update_fields"))
+            super().save(*args, **kwargs)
+            StoreOpenInterval.rebuild(self)
+            self.update_search_index()
+            StoreGridCell.move(
+                previous.get_grid_position() if previous is not None else None,
+                self.get_grid_position()
+            )
+            StoreChangeLog.objects.create(store_id=self.id)
+
+    def get_update_fields(self, update_fields=None):
+        """
+        UPDATE 할 필드에서 F() 로만 갱신되는 필드를 제외
+        (오래된 인스턴스를 저장해도 character_pool_version 등이 이전 값으로 돌아가지 않도록)
+        """
+        if update_fields is None:
+            deferred_fields = self.get_deferred_fields()
+            update_fields = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.attname not in deferred_fields
+            ]
+        return [name for name in update_fields if name not in self.COUNTER_FIELDS]
+
+    @classmethod
+    def update_category_masks(cls, store_ids=None):
+        """
+        store_categories 로부터 category_mask 를 다시 계산
+
+        :param store_ids: 대상 스토어 id, None 이면 전체
+        :return: 갱신된 스토어 수
+        """
+        through = cls.store_categories.through
+        relations = through.objects.all()
+        stores = cls.objects.all()
+        if store_ids is not None:
+            relations = relations.filter(store_id__in=store_ids)
+            stores = stores.filter(id__in=store_ids)
+
+        store_category_ids = {}
+        for store_id, store_category_id in relations.values_list("store_id", "storecategory_id"):
+            store_category_ids.setdefault(store_id, []).append(store_category_id)
+
+        count = 0
+        for store_id, category_mask in stores.values_list("id", "category_mask"):
+            new_category_mask = StoreCategory.get_mask(store_category_ids.get(store_id, ()))
+            if new_category_mask != category_mask:
+                cls.objects.filter(id=store_id).update(category_mask=new_category_mask)
+                count += 1
+        return count
+
+    def get_grid_position(self):
+        """
+        StoreGridCell 에 집계되는 좌표, 활성 스토어가 아니면 None
+        """
+        if self.status != StatusEnum.ACTIVE.value:
+            return None
+        return float(self.latitude), float(self.longitude)
+
+    def update_search_index(self):
+        if self.status == StatusEnum.ACTIVE.value:
+            self.search_index.upsert(self.id, {
+                "title": self.title,
+                "address": self.address,
+                "description": self.description,
+            })
+        else:
+            self.search_index.delete(self.id)
+
+    def get_open_intervals(self):
+        """
+        주간 영업시간 (weekday, start_minute, end_minute, is_overnight) 목록
+        자정을 넘기는 영업은 나누어 자정 이후 구간을 is_overnight 로 표시
+        """
+        opening_minute = self.opening_time.hour * 60 + self.opening_time.minute
+        closing_minute = self.closing_time.hour * 60 + self.closing_time.minute
+
+        intervals = []
+        for weekday, bit in enumerate(self.BUSINESS_DAY_BITS):
+            if not self.business_day & bit:
+                continue
+            if opening_minute < closing_minute:
+                intervals.append((weekday, opening_minute, closing_minute, False))
+                continue
+            # closing_time <= opening_time 이면 자정을 넘겨 영업 (같으면 24시간)
+            intervals.append((weekday, opening_minute, 24 * 60, False))
+            if closing_minute > 0:
+                intervals.append(((weekday + 1) % 7, 0, closing_minute, True))
+        return intervals
+
     def delete(self, using=None, keep_parents=False):
         self.status = StatusEnum.INACTIVE.value
         self.save()
 
 
+class StoreChangeLog(models.Model):
+    """
+    스토어 변경 기록, 프로세스별 인메모리 인덱스가 id 를 워터마크로 변경분만 반영
+    """
+    store_id = models.PositiveIntegerField(
+        db_index=True,
+        help_text="삭제된 스토어도 기록하기 위해 FK 가 아님"
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = _("Store Change Log")
+        verbose_name_plural = _("Store Change Logs")
+
+    @classmethod
+    def get_last_id(cls):
+        return cls.objects.aggregate(last_id=models.Max("id"))["last_id"] or 0
+
+    @classmethod
+    def get_changes(cls, last_id, until_id=None):
+        """
+        :param until_id: 주어지면 id 가 until_id 이하인 기록까지만
+        :return: (새 워터마크, last_id 이후 변경된 store id 집합)
+        """
+        store_ids, new_last_id = set(), last_id
+        queryset = cls.objects.filter(id__gt=last_id)
+        if until_id is not None:
+            queryset = queryset.filter(id__lte=until_id)
+        for id_, store_id in queryset.order_by("id").values_list("id", "store_id"):
+            store_ids.add(store_id)
+            new_last_id = id_
+        return new_last_id, store_ids
+
+
 class StoreCategory(models.Model):
     name = models.CharField(
         max_length=64,
@@ -78,13 +399,27 @@ class StoreCategory(models.Model):
     class Meta:
         verbose_name = _("Store Category")
         verbose_name_plural = _("Store Categories")
-    
+
+    # 카테고리 비트마스크는 id 1~63 을 비트 0~62 에 대응 (부호 있는 BigIntegerField 에 저장)
+    MAX_MASK_ID = 63
+
+    @classmethod
+    def get_mask(cls, store_category_ids):
+        mask = 0
+        for store_category_id in store_category_ids:
+            if 0 < store_category_id <= cls.MAX_MASK_ID:
+                mask |= 1 << (store_category_id - 1)
+        return mask
+
     def delete(self, using=None, keep_parents=False):
         self.status = StatusEnum.INACTIVE.value
         self.save()
 
 
 class StoreCharacterPool(models.Model):
+    # store_id -> (character_pool_version, (AliasTable[(pool_id, character_id)], 수량 한정 pool id 집합))
+    samplers = VersionedCache()
+
     store = models.ForeignKey(
         "moree.Store",
         on_delete=models.CASCADE,
@@ -98,6 +433,12 @@ class StoreCharacterPool(models.Model):
     weight = models.PositiveIntegerField(
         help_text="뽑힐 가중치 (값이 클수록 잘 뽑힘)"
     )
+    stock = models.PositiveIntegerField(
+        default=None,
+        null=True,
+        blank=True,
+        help_text="남은 수량 (null=무제한), 뽑힐 때마다 감소하며 0 이면 뽑기에서 제외"
+    )
     status = models.CharField(
         max_length=64,
         choices=StatusEnum.choices,
@@ -114,3 +455,748 @@ class StoreCharacterPool(models.Model):
     def delete(self, using=None, keep_parents=False):
         self.status = StatusEnum.INACTIVE.value
         self.save()
+
+    @classmethod
+    def get_sampler(cls, store):
+        """
+        스토어 활성 pool 의 AliasTable, Store.character_pool_version 별로 캐시 (소진된 pool 은 제외)
+        뽑기 가능한 캐릭터가 없으면 None
+
+        :param store: id, character_pool_version 만 사용
+        """
+        return cls._get_pool_table(store)[0]
+
+    @classmethod
+    def get_limited_pool_ids(cls, store):
+        """
+        get_sampler 의 AliasTable 중 수량 한정 pool 의 id 집합
+
+        :param store: id, character_pool_version 만 사용
+        """
+        return cls._get_pool_table(store)[1]
+
+    @classmethod
+    def _get_pool_table(cls, store):
+        def build():
+            pools = list(cls.objects.filter(
+                models.Q(stock__isnull=True) | models.Q(stock__gt=0),
+                store_id=store.id,
+                status=StatusEnum.ACTIVE.value,
+                character__status=StatusEnum.ACTIVE.value,
+                weight__gt=0
+            ).values_list("id", "character_id", "weight", "stock"))
+            if not pools:
+                return None, frozenset()
+            sampler = AliasTable(
+                items=[(pool_id, character_id) for pool_id, character_id, _, _ in pools],
+                weights=[weight for _, _, weight, _ in pools]
+            )
+            return sampler, frozenset(pool_id for pool_id, _, _, stock in pools if stock is not None)
+
+        return cls.samplers.get(store.id, store.character_pool_version, build)
+
+    @classmethod
+    def sample(cls, store, count, stocks=None):
+        """
+        캐시된 AliasTable 에서 (pool id, character id) 를 `count` 개 뽑음
+        `stocks` 가 주어지면 남은 수량을 넘는 만큼은 해당 pool 을 뺀 테이블에서 다시 뽑음
+
+        :param store: id, character_pool_version 만 사용
+        :param stocks: 수량 한정 pool 의 {pool id: 남은 수량} (get_stocks), 수량이 부족했던 재시도에서 사용
+        :return: 뽑을 수 있는 캐릭터가 (더) 없으면 None
+        """
+        sampler = cls.get_sampler(store)
+        if sampler is None:
+            return None
+        if stocks is None:
+            return sampler.sample_many(count)
+
+        remaining = dict(stocks)
+        results = []
+        while True:
+            for item in sampler.sample_many(count - len(results)):
+                pool_id = item[0]
+                if pool_id in remaining:
+                    if remaining[pool_id] <= 0:
+                        continue
+                    remaining[pool_id] -= 1
+                results.append(item)
+            if len(results) >= count:
+                return results
+
+            pairs = [
+                (item, weight)
+                for item, weight in zip(sampler.items, sampler.weights)
+                if remaining.get(item[0], 1) > 0
+            ]
+            if not pairs:
+                return None
+            sampler = AliasTable(items=[item for item, _ in pairs], weights=[weight for _, weight in pairs])
+
+    @classmethod
+    def get_stocks(cls, store):
+        """
+        :return: {pool_id: 남은 수량} (뽑기 테이블의 수량 한정 pool)
+        """
+        return dict(cls.objects.filter(
+            id__in=cls.get_limited_pool_ids(store)
+        ).values_list("id", "stock"))
+
+    @classmethod
+    def take_stock(cls, store_id, pool_counts):
+        """
+        행 잠금 대신 pool 별 조건부 UPDATE 로 수량을 차감하므로 동시 뽑기에서도 초과 판매되지 않음
+        뽑기 트랜잭션 안에서 호출하고 실패하면 롤백해야 함
+        소진된 pool 이 생기면 모든 프로세스가 뽑기 테이블을 다시 만들도록 Store.character_pool_version 을 올림
+
+        :param pool_counts: 수량 한정 pool 의 {pool id: 뽑은 개수}
+        :return: 남은 수량이 부족한 pool 이 있으면 False (해당 pool 은 차감되지 않음)
+        """
+        for pool_id, count in sorted(pool_counts.items()):
+            updated = cls.objects.filter(
+                id=pool_id,
+                stock__gte=count
+            ).update(stock=models.F("stock") - count)
+            if not updated:
+                return False
+
+        if pool_counts and cls.objects.filter(id__in=pool_counts, stock=0).exists():
+            cls.bump_version(store_id)
+        return True
+
+    @classmethod
+    def get_drop_rates(cls, store_id):
+        """
+        스토어 활성 pool 의 캐릭터별 (character, weight, probability), 확률이 높은 순
+        여러 pool 에 있는 캐릭터는 weight 를 합산
+        """
+        pools = cls.objects.filter(
+            models.Q(stock__isnull=True) | models.Q(stock__gt=0),
+            store_id=store_id,
+            status=StatusEnum.ACTIVE.value,
+            character__status=StatusEnum.ACTIVE.value,
+            weight__gt=0
+        ).select_related("character", "character__profile_img_stored_file").order_by("id")
+
+        characters, weights = {}, {}
+        for pool in pools:
+            characters[pool.character_id] = pool.character
+            weights[pool.character_id] = weights.get(pool.character_id, 0) + pool.weight
+        total_weight = sum(weights.values())
+        return sorted(
+            (
+                (characters[character_id], weight, weight / total_weight)
+                for character_id, weight in weights.items()
+            ),
+            key=lambda item: (-item[1], item[0].id)
+        )
+
+    @classmethod
+    def get_character_ids(cls, store_ids):
+        """
+        :return: {store_id: 뽑기 가능한 활성 캐릭터 id 집합}
+        """
+        character_ids = {store_id: set() for store_id in store_ids}
+        pools = cls.objects.filter(
+            store_id__in=character_ids,
+            status=StatusEnum.ACTIVE.value,
+            character__status=StatusEnum.ACTIVE.value
+        ).values_list("store_id", "character_id")
+        for store_id, character_id in pools:
+            character_ids[store_id].add(character_id)
+        return character_ids
+
+    @classmethod
+    def bump_version(cls, store_id):
+        Store.objects.filter(pk=store_id).update(
+            character_pool_version=models.F("character_pool_version") + 1
+        )
+
+
+class StoreOpenInterval(models.Model):
+    store = models.ForeignKey(
+        "moree.Store",
+        on_delete=models.CASCADE,
+        db_index=True
+    )
+    weekday = models.PositiveSmallIntegerField(
+        help_text="0=월요일 ~ 6=일요일 (Asia/Seoul)"
+    )
+    start_minute = models.PositiveSmallIntegerField()
+    end_minute = models.PositiveSmallIntegerField()
+    is_overnight = models.BooleanField(
+        default=False,
+        help_text="전날 영업이 자정을 넘겨 이어지는 구간인지"
+    )
+
+    class Meta:
+        verbose_name = _("Store Open Interval")
+        verbose_name_plural = _("Store Open Intervals")
+        indexes = [
+            models.Index(fields=["weekday", "start_minute", "end_minute"]),
+        ]
+
+    @classmethod
+    def rebuild(cls, store):
+        cls.objects.filter(store=store).delete()
+        if store.status != StatusEnum.ACTIVE.value:
+            return
+        cls.objects.bulk_create([
+            cls(
+                store=store,
+                weekday=weekday,
+                start_minute=start_minute,
+                end_minute=end_minute,
+                is_overnight=is_overnight
+            )
+            for weekday, start_minute, end_minute, is_overnight in store.get_open_intervals()
+        ])
+
+
+class StoreStatistics(models.Model):
+    """
+    유저 활동 집계 (GROUP BY 없이 목록 정렬/표시용)
+    signal 에서 F() 로 증감하며, 누락분은 `manage.py rebuild_store_statistics` 로 재계산
+    """
+    store = models.OneToOneField(
+        "moree.Store",
+        on_delete=models.CASCADE,
+        db_index=True,
+        related_name="statistics"
+    )
+    review_count = models.PositiveIntegerField(
+        default=0,
+        db_index=True,
+        help_text="활성 리뷰 수"
+    )
+    rating_sum = models.DecimalField(
+        max_digits=12,
+        decimal_places=2,
+        default=0,
+        help_text="활성 리뷰 rating 합계"
+    )
+    bookmark_count = models.PositiveIntegerField(
+        default=0,
+        db_index=True,
+        help_text="스토어를 담은 활성 북마크 수"
+    )
+    stamp_count = models.PositiveIntegerField(
+        default=0,
+        db_index=True,
+        help_text="활성 스탬프 수"
+    )
+    # rating 히스토그램, k 점 구간은 [k, k+1) (1 미만은 1, 5 이상은 5)
+    rating_1_count = models.PositiveIntegerField(default=0)
+    rating_2_count = models.PositiveIntegerField(default=0)
+    rating_3_count = models.PositiveIntegerField(default=0)
+    rating_4_count = models.PositiveIntegerField(default=0)
+    rating_5_count = models.PositiveIntegerField(default=0)
+    rating_mean = models.FloatField(
+        null=True,
+        default=None,
+        db_index=True,
+        help_text="활성 리뷰 rating 평균"
+    )
+    rating_score = models.FloatField(
+        default=0,
+        db_index=True,
+        help_text="랭킹용 베이지안 평균 (RATING_PRIOR_WEIGHT 개의 RATING_PRIOR_MEAN 리뷰가 더 있다고 가정)"
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    RATING_BUCKETS = (1, 2, 3, 4, 5)
+    RATING_PRIOR_MEAN = 3.0
+    RATING_PRIOR_WEIGHT = 5
+
+    class Meta:
+        verbose_name = _("Store Statistics")
+        verbose_name_plural = _("Store Statistics")
+
+    def save(self, *args, **kwargs):
+        self.rating_mean, self.rating_score = self.get_rating_summary(self.review_count, self.rating_sum)
+        super().save(*args, **kwargs)
+
+    @property
+    def rating_histogram(self):
+        return {bucket: getattr(self, f"rating_{bucket}_count") for bucket in self.RATING_BUCKETS}
+
+    @classmethod
+    def get_rating_bucket(cls, rating):
+        return min(max(int(rating), cls.RATING_BUCKETS[0]), cls.RATING_BUCKETS[-1])
+
+    @classmethod
+    def get_rating_bucket_q(cls, bucket):
+        """
+        rating 이 `bucket` 구간에 속하는 조건 (get_rating_bucket 과 같은 경계)
+        """
+        q = models.Q()
+        if bucket != cls.RATING_BUCKETS[0]:
+            q &= models.Q(rating__gte=bucket)
+        if bucket != cls.RATING_BUCKETS[-1]:
+            q &= models.Q(rating__lt=bucket + 1)
+        return q
+
+    @classmethod
+    def get_rating_summary(cls, review_count, rating_sum):
+        """
+        :return: (평균, 베이지안 평균)
+        """
+        rating_sum = float(rating_sum or 0)
+        rating_mean = rating_sum / review_count if review_count else None
+        rating_score = (cls.RATING_PRIOR_MEAN * cls.RATING_PRIOR_WEIGHT + rating_sum) / (cls.RATING_PRIOR_WEIGHT + review_count)
+        return rating_mean, rating_score
+
+    @classmethod
+    def increment(cls, store_id, **deltas):
+        """
+        집계 값을 원자적으로 증감 (음수가 되지 않도록 0 에서 멈춤)
+
+        :param store_id: 스토어 id
+        :param deltas: 필드명 = 증감량
+        """
+        deltas = {name: delta for name, delta in deltas.items() if delta}
+        if not deltas:
+            return
+        values = {
+            name: Greatest(models.F(name) + delta, 0)
+            for name, delta in deltas.items()
+        }
+        if not cls.objects.filter(store_id=store_id).update(updated_at=timezone.now(), **values):
+            cls.objects.get_or_create(store_id=store_id)
+            cls.objects.filter(store_id=store_id).update(updated_at=timezone.now(), **values)
+
+        if "review_count" in deltas or "rating_sum" in deltas:
+            # SET 절은 갱신 전 값을 읽으므로 파생 값은 증감 후 별도로 갱신
+            review_count = Cast(models.F("review_count"), models.FloatField())
+            rating_sum = Cast(models.F("rating_sum"), models.FloatField())
+            cls.objects.filter(store_id=store_id).update(
+                rating_mean=models.Case(
+                    models.When(review_count__gt=0, then=rating_sum / review_count),
+                    default=None,
+                    output_field=models.FloatField()
+                ),
+                rating_score=(
+                    (models.Value(cls.RATING_PRIOR_MEAN * cls.RATING_PRIOR_WEIGHT) + rating_sum)
+                    / (models.Value(float(cls.RATING_PRIOR_WEIGHT)) + review_count)
+                )
+            )
+
+    @classmethod
+    def rebuild(cls, batch_size=1000):
+        """
+        모든 스토어의 집계 값을 원본 테이블에서 다시 계산
+
+        :return: 재계산한 스토어 수
+        """
+        from moree.models import UserReview, UserStoreBookmark, UserStoreStamp
+
+        reviews = {
+            row["store_id"]: row
+            for row in UserReview.objects.filter(
+                status=StatusEnum.ACTIVE.value
+            ).values("store_id").annotate(
+                count=models.Count("id"),
+                rating_sum=models.Sum("rating"),
+                **{
+                    f"rating_{bucket}_count": models.Count("id", filter=cls.get_rating_bucket_q(bucket))
+                    for bucket in cls.RATING_BUCKETS
+                }
+            ).order_by()
+        }
+        stamps = dict(
+            UserStoreStamp.objects.filter(
+                status=StatusEnum.ACTIVE.value
+            ).values("store_id").annotate(
+                count=models.Count("id")
+            ).order_by().values_list("store_id", "count")
+        )
+        bookmarks = dict(
+            UserStoreBookmark.stores.through.objects.filter(
+                userstorebookmark__status=StatusEnum.ACTIVE.value
+            ).values("store_id").annotate(
+                count=models.Count("id")
+            ).order_by().values_list("store_id", "count")
+        )
+
+        with transaction.atomic():
+            existing_store_ids = set(cls.objects.values_list("store_id", flat=True))
+            cls.objects.bulk_create(
+                [
+                    cls(store_id=store_id)
+                    for store_id in Store.objects.values_list("id", flat=True)
+                    if store_id not in existing_store_ids
+                ],
+                batch_size=batch_size
+            )
+
+            statistics = []
+            now = timezone.now()
+            for store_statistics in cls.objects.all().iterator(chunk_size=batch_size):
+                review = reviews.get(store_statistics.store_id, {})
+                store_statistics.review_count = review.get("count", 0)
+                store_statistics.rating_sum = review.get("rating_sum") or 0
+                for bucket in cls.RATING_BUCKETS:
+                    setattr(store_statistics, f"rating_{bucket}_count", review.get(f"rating_{bucket}_count", 0))
+                store_statistics.rating_mean, store_statistics.rating_score = cls.get_rating_summary(
+                    store_statistics.review_count,
+                    store_statistics.rating_sum
+                )
+                store_statistics.bookmark_count = bookmarks.get(store_statistics.store_id, 0)
+                store_statistics.stamp_count = stamps.get(store_statistics.store_id, 0)
+                store_statistics.updated_at = now
+                statistics.append(store_statistics)
+            cls.objects.bulk_update(
+                statistics,
+                [
+                    "review_count",
+                    "rating_sum",
+                    "bookmark_count",
+                    "stamp_count",
+                    *(f"rating_{bucket}_count" for bucket in cls.RATING_BUCKETS),
+                    "rating_mean",
+                    "rating_score",
+                    "updated_at"
+                ],
+                batch_size=batch_size
+            )
+        return len(statistics)
+
+
+class StoreTileCache:
+    """
+    프로세스별 지도 타일 캐시
+    StoreGridCell 의 updated_at 을 워터마크로 변경된 셀을 포함하는 타일만 무효화
+    """
+    SYNC_INTERVAL = 1.0
+    TTL = 300
+
+    def __init__(self):
+        self.tiles = TTLCache(ttl=self.TTL)
+        self.sync_lock = threading.Lock()
+        self.synced_at = None
+        self.watermark = None
+
+    def get(self, zoom, x, y, builder):
+        self.sync()
+        key = (zoom, x, y)
+        tile = self.tiles.get(key)
+        if tile is None:
+            tile = builder()
+            self.tiles.set(key, tile)
+        return tile
+
+    def sync(self):
+        now = time.monotonic()
+        if self.synced_at is not None and now - self.synced_at < self.SYNC_INTERVAL:
+            return
+        with self.sync_lock:
+            if self.synced_at is not None and now - self.synced_at < self.SYNC_INTERVAL:
+                return
+            self.synced_at = now
+
+            if self.watermark is None:
+                self.watermark = StoreGridCell.objects.aggregate(
+                    watermark=models.Max("updated_at")
+                )["watermark"] or timezone.now()
+                self.tiles.clear()
+                return
+
+            # 같은 시각에 갱신된 셀을 놓치지 않도록 워터마크 시각도 포함 (중복 무효화는 무해)
+            cells = StoreGridCell.objects.filter(
+                zoom=StoreGridCell.MAX_ZOOM,
+                updated_at__gte=self.watermark
+            ).values_list("x", "y", "updated_at")
+            for cell_x, cell_y, updated_at in cells:
+                for zoom in range(StoreGridCell.MAX_ZOOM + 1):
+                    shift = StoreGridCell.MAX_ZOOM - zoom
+                    self.tiles.delete((zoom, cell_x >> shift, cell_y >> shift))
+                self.watermark = max(self.watermark, updated_at)
+
+
+class StoreGridCell(models.Model):
+    """
+    활성 스토어 좌표의 다중 해상도 격자 집계 (Web Mercator 타일 좌표 기준)
+    Store.save 에서 증감하며, 누락분은 `manage.py rebuild_store_index` 로 재계산
+    """
+    MIN_ZOOM = 0
+    MAX_ZOOM = 18
+    # 타일 하나를 2^CLUSTER_ZOOM_OFFSET x 2^CLUSTER_ZOOM_OFFSET 개 이하의 클러스터로 나눔
+    CLUSTER_ZOOM_OFFSET = 3
+    tile_cache = StoreTileCache()
+
+    zoom = models.PositiveSmallIntegerField()
+    x = models.PositiveIntegerField()
+    y = models.PositiveIntegerField()
+    count = models.PositiveIntegerField(default=0)
+    latitude_sum = models.FloatField(default=0)
+    longitude_sum = models.FloatField(default=0)
+    updated_at = models.DateTimeField(
+        auto_now=True,
+        db_index=True
+    )
+
+    class Meta:
+        verbose_name = _("Store Grid Cell")
+        verbose_name_plural = _("Store Grid Cells")
+        constraints = [
+            models.UniqueConstraint(
+                fields=["zoom", "x", "y"],
+                name="unique_store_grid_cell"
+            ),
+        ]
+
+    @classmethod
+    def get_cells(cls, latitude, longitude):
+        return [(zoom, *get_tile(latitude, longitude, zoom)) for zoom in range(cls.MIN_ZOOM, cls.MAX_ZOOM + 1)]
+
+    @classmethod
+    def add(cls, latitude, longitude, delta):
+        """
+        좌표를 포함하는 모든 줌 레벨의 셀에 스토어 `delta` 개를 더함
+        """
+        cells = cls.get_cells(latitude, longitude)
+        cls.objects.bulk_create(
+            [cls(zoom=zoom, x=x, y=y) for zoom, x, y in cells],
+            ignore_conflicts=True
+        )
+        condition = models.Q()
+        for zoom, x, y in cells:
+            condition |= models.Q(zoom=zoom, x=x, y=y)
+        cls.objects.filter(condition).update(
+            count=Greatest(models.F("count") + delta, 0),
+            latitude_sum=models.F("latitude_sum") + latitude * delta,
+            longitude_sum=models.F("longitude_sum") + longitude * delta,
+            updated_at=timezone.now()
+        )
+
+    @classmethod
+    def move(cls, previous_position, position):
+        """
+        :param previous_position: 변경 전 (latitude, longitude), 집계되지 않았으면 None
+        :param position: 변경 후 (latitude, longitude), 집계하지 않으면 None
+        """
+        if previous_position == position:
+            return
+        if previous_position is not None:
+            cls.add(*previous_position, -1)
+        if position is not None:
+            cls.add(*position, 1)
+
+    @classmethod
+    def rebuild(cls, batch_size=1000):
+        """
+        활성 스토어로부터 모든 셀을 다시 계산
+
+        :return: 집계된 스토어 수
+        """
+        cells = {}
+        count = 0
+        stores = Store.objects.filter(
+            status=StatusEnum.ACTIVE.value
+        ).only("id", "latitude", "longitude", "status").iterator(chunk_size=batch_size)
+        for store in stores:
+            latitude, longitude = store.get_grid_position()
+            for cell in cls.get_cells(latitude, longitude):
+                cell_count, latitude_sum, longitude_sum = cells.get(cell, (0, 0.0, 0.0))
+                cells[cell] = (cell_count + 1, latitude_sum + latitude, longitude_sum + longitude)
+            count += 1
+
+        with transaction.atomic():
+            cls.objects.all().delete()
+            cls.objects.bulk_create(
+                [
+                    cls(zoom=zoom, x=x, y=y, count=cell_count, latitude_sum=latitude_sum, longitude_sum=longitude_sum)
+                    for (zoom, x, y), (cell_count, latitude_sum, longitude_sum) in cells.items()
+                ],
+                batch_size=batch_size
+            )
+        cls.tile_cache.tiles.clear()
+        return count
+
+    @classmethod
+    def get_tile_clusters(cls, zoom, x, y):
+        """
+        타일 (zoom, x, y) 안의 클러스터 목록, 하위 줌 레벨 셀 하나가 클러스터 하나
+
+        :return: [{"count", "latitude", "longitude"}] (latitude/longitude 는 셀 안 스토어들의 중심)
+        """
+        cell_zoom = min(zoom + cls.CLUSTER_ZOOM_OFFSET, cls.MAX_ZOOM)
+        shift = cell_zoom - zoom
+        cells = cls.objects.filter(
+            zoom=cell_zoom,
+            x__gte=x << shift,
+            x__lt=(x + 1) << shift,
+            y__gte=y << shift,
+            y__lt=(y + 1) << shift,
+            count__gt=0
+        ).order_by("y", "x").values_list("count", "latitude_sum", "longitude_sum")
+        return [
+            {
+                "count": count,
+                "latitude": round(latitude_sum / count, 7),
+                "longitude": round(longitude_sum / count, 7),
+            }
+            for count, latitude_sum, longitude_sum in cells
+        ]
+
+
+class StoreWaitingRoom(models.Model):
+    """
+    Store.pre_order_start_at 부터 DURATION 동안 뽑기/스탬프/북마크 요청의 입장 대기열 (스토어, 오픈 시각별 발급 번호표 수)
+    번호표 발급만 DB 에서 증가시키고, 입장 여부는 번호표와 경과 시간으로 계산하므로 모든 프로세스에서 같은 순서로 입장
+    """
+    # 오픈 직후 바로 입장하는 번호표 수, 이후 초당 입장하는 번호표 수
+    ADMISSION_BURST = 50
+    ADMISSION_RATE = 20
+    DURATION = timedelta(minutes=30)
+    TICKET_HEADER = "X-Waiting-Room-Ticket"
+    room = WaitingRoom(salt="moree.StoreWaitingRoom", rate=ADMISSION_RATE, burst=ADMISSION_BURST)
+
+    store = models.ForeignKey(
+        "moree.Store",
+        on_delete=models.CASCADE,
+        db_index=True
+    )
+    opened_at = models.DateTimeField(
+        help_text="대기열을 연 Store.pre_order_start_at"
+    )
+    issued_count = models.PositiveIntegerField(
+        default=0,
+        help_text="발급한 번호표 수 (마지막 번호)"
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = _("Store Waiting Room")
+        verbose_name_plural = _("Store Waiting Rooms")
+        constraints = [
+            models.UniqueConstraint(
+                fields=["store", "opened_at"],
+                name="unique_store_waiting_room"
+            ),
+        ]
+
+    @classmethod
+    def get_opened_at(cls, store, now=None):
+        """
+        :return: 대기열이 열려 있으면 오픈 시각 (Store.pre_order_start_at), 아니면 None
+        """
+        now = now or timezone.now()
+        opened_at = store.pre_order_start_at
+        if opened_at is None or not opened_at <= now < opened_at + cls.DURATION:
+            return None
+        return opened_at
+
+    @classmethod
+    def issue(cls, store_id, opened_at, user_id):
+        """
+        번호표 번호 (1 부터) 를 발급, 같은 오픈에서 같은 유저에게는 처음 발급한 번호를 다시 반환
+        (번호표 없이 재시도해도 대기 순서가 뒤로 밀리지 않음)
+        """
+        tickets = StoreWaitingRoomTicket.objects.filter(
+            waiting_room__store_id=store_id,
+            waiting_room__opened_at=opened_at,
+            user_id=user_id
+        ).values_list("number", flat=True)
+        number = tickets.first()
+        if number is not None:
+            return number
+
+        waiting_room, _ = cls.objects.get_or_create(store_id=store_id, opened_at=opened_at)
+        try:
+            with transaction.atomic():
+                cls.objects.filter(id=waiting_room.id).update(issued_count=models.F("issued_count") + 1)
+                # 같은 트랜잭션에서 읽으므로 다른 요청의 증가분이 섞이지 않음
+                number = cls.objects.filter(id=waiting_room.id).values_list("issued_count", flat=True).get()
+                StoreWaitingRoomTicket.objects.create(waiting_room=waiting_room, user_id=user_id, number=number)
+            return number
+        except IntegrityError:
+            # 같은 유저의 동시 요청이 먼저 발급 (번호 증가분도 함께 롤백됨)
+            return tickets.get()
+
+    @classmethod
+    def admit(cls, store, user_id, tickets=(), now=None):
+        """
+        대기실이 열려 있지 않거나 `tickets` 중 입장 가능한 번호표가 있으면 통과
+        그 외에는 이 스토어/유저의 유효한 번호표가 없으면 새로 발급
+
+        :param store: id, pre_order_start_at 만 사용
+        :param tickets: 클라이언트가 보낸 번호표 (TICKET_HEADER, 스토어별로 쉼표 구분)
+        :raises WaitingRoomError: 대기해야 하는 경우, 다시 보낼 번호표와 대기 순서를 포함
+        """
+        now = now or timezone.now()
+        opened_at = cls.get_opened_at(store, now)
+        if opened_at is None:
+            return
+
+        number, ticket = None, None
+        for ticket in tickets:
+            number = cls.room.loads_ticket(ticket, store.id, opened_at, user_id)
+            if number is not None:
+                break
+        if number is None:
+            number = cls.issue(store.id, opened_at, user_id)
+            ticket = cls.room.dumps_ticket(store.id, opened_at, number, user_id)
+
+        position, retry_after = cls.room.get_position(opened_at, number, now)
+        if position > 0:
+            raise WaitingRoomError(ticket, position, retry_after)
+
+    @classmethod
+    def get_tickets(cls, request):
+        value = request.headers.get(cls.TICKET_HEADER) or ""
+        return [ticket.strip() for ticket in value.split(",") if ticket.strip()]
+
+    @classmethod
+    def get_status(cls, ticket, now=None):
+        """
+        DB 조회 없이 번호표의 대기 상태를 계산 (폴링용)
+
+        :return: {"store", "number", "position", "retry_after", "is_admitted"}, 잘못된 번호표면 None
+        """
+        now = now or timezone.now()
+        values = cls.room.read_ticket(ticket)
+        if values is None:
+            return None
+        store_id, opened_at, number, _ = values
+        if now >= opened_at + cls.DURATION:
+            position, retry_after = 0, 0
+        else:
+            position, retry_after = cls.room.get_position(opened_at, number, now)
+        return {
+            "store": store_id,
+            "number": number,
+            "position": position,
+            "retry_after": retry_after,
+            "is_admitted": position == 0
+        }
+
+
+class StoreWaitingRoomTicket(models.Model):
+    """
+    입장 대기열에서 유저에게 발급한 번호표 (유저당 하나)
+    """
+    waiting_room = models.ForeignKey(
+        "moree.StoreWaitingRoom",
+        on_delete=models.CASCADE,
+        db_index=True
+    )
+    user = models.ForeignKey(
+        "moree.User",
+        on_delete=models.CASCADE,
+        db_index=True
+    )
+    number = models.PositiveIntegerField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = _("Store Waiting Room Ticket")
+        verbose_name_plural = _("Store Waiting Room Tickets")
+        constraints = [
+            models.UniqueConstraint(
+                fields=["waiting_room", "user"],
+                name="unique_store_waiting_room_ticket"
+            ),
+        ]
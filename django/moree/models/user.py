@@ -1,7 +1,20 @@
-from django.db import models
+import hashlib
+import math
+import threading
+import time
+import uuid
+
+from datetime import timedelta
+
+from django.core import signing
+from django.db import IntegrityError, models, transaction
+from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 
+from core.bloom import BloomFilter
+from core.cache import RevocationList, TTLCache
 from core.enums import StatusEnum
+from core.environment import env
 from moree.enums import (
     UserStatusEnum,
     UserGenderEnum,
@@ -76,17 +89,116 @@ class UserAccessToken(models.Model):
         db_index=True
     )
     token = models.CharField(
-        max_length=2048,
-        db_index=True
+        max_length=2048
+    )
+    jti = models.CharField(
+        max_length=32,
+        unique=True,
+        editable=False,
+        null=True,
+        default=None,
+        help_text="서명된 토큰의 고유 id, 폐기 목록의 키"
     )
     expire_at = models.DateTimeField()
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    # 서명된 토큰: base64(json payload):base64(HMAC-SHA256(SECRET_KEY))
+    # payload = {"uid": user id, "did": device id, "exp": expire_at(unix timestamp), "jti": token id}
+    SIGNING_SALT = "moree.UserAccessToken"
+
     class Meta:
         verbose_name = _("User Access Token")
         verbose_name_plural = _("User Access Tokens")
 
+    @classmethod
+    def issue(cls, user_refresh_token):
+        """
+        유저의 access token 을 새로 서명해 발급하고, 이전 access token 은 폐기
+        """
+        jti = uuid.uuid4().hex
+        expire_at = timezone.now() + timedelta(seconds=int(env.get("USER_ACCESS_TOKEN_EXPIRE_TIME", 3600)))
+        token = signing.dumps(
+            {
+                "uid": user_refresh_token.user_id,
+                "did": user_refresh_token.device_id,
+                "exp": int(expire_at.timestamp()),
+                "jti": jti,
+            },
+            salt=cls.SIGNING_SALT
+        )
+
+        with transaction.atomic():
+            user_access_token = cls.objects.select_for_update().filter(user_id=user_refresh_token.user_id).first()
+            if user_access_token is None:
+                user_access_token = cls(user_id=user_refresh_token.user_id)
+            elif user_access_token.jti:
+                UserAccessTokenRevocation.revoke(user_access_token.jti, user_access_token.expire_at)
+            user_access_token.user_refresh_token = user_refresh_token
+            user_access_token.device_id = user_refresh_token.device_id
+            user_access_token.token = token
+            user_access_token.jti = jti
+            user_access_token.expire_at = expire_at
+            user_access_token.save()
+        return user_access_token
+
+    @classmethod
+    def verify(cls, token):
+        """
+        DB 조회 없이 서명, 만료, 폐기 여부만 확인
+
+        :return: 유효하면 payload, 아니면 None
+        """
+        try:
+            payload = signing.loads(token, salt=cls.SIGNING_SALT)
+        except signing.BadSignature:
+            return None
+        if not isinstance(payload, dict) or payload.get("exp", 0) <= time.time():
+            return None
+        if payload.get("jti") in UserAccessTokenRevocation.revocations:
+            return None
+        return payload
+
+
+class UserAccessTokenRevocation(models.Model):
+    jti = models.CharField(
+        max_length=32,
+        unique=True
+    )
+    expire_at = models.DateTimeField(
+        db_index=True,
+        help_text="폐기된 토큰의 원래 만료 시각, 이후에는 삭제해도 됨"
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    # 프로세스별 폐기 목록, 다른 프로세스의 폐기는 최대 sync_interval 만큼 늦게 반영됨
+    revocations = RevocationList(
+        loader=lambda last_id: UserAccessTokenRevocation.get_revocations(last_id),
+        sync_interval=5.0
+    )
+
+    class Meta:
+        verbose_name = _("User Access Token Revocation")
+        verbose_name_plural = _("User Access Token Revocations")
+
+    @classmethod
+    def get_revocations(cls, last_id):
+        for id_, jti, expire_at in cls.objects.filter(
+            id__gt=last_id,
+            expire_at__gt=timezone.now()
+        ).order_by("id").values_list("id", "jti", "expire_at"):
+            yield id_, jti, expire_at.timestamp()
+
+    @classmethod
+    def revoke(cls, jti, expire_at):
+        if not jti or expire_at <= timezone.now():
+            return
+        cls.revocations.add(jti, expire_at.timestamp())
+        cls.objects.get_or_create(jti=jti, defaults={"expire_at": expire_at})
+        cls.objects.filter(expire_at__lte=timezone.now()).delete()
+
+
 
 class UserRefreshToken(models.Model):
     user = models.OneToOneField(
@@ -111,8 +223,13 @@ class UserRefreshToken(models.Model):
         db_index=True
     )
     token = models.CharField(
-        max_length=2048,
-        db_index=True
+        max_length=2048
+    )
+    token_digest = models.CharField(
+        max_length=64,
+        unique=True,
+        editable=False,
+        help_text="sha256(token), 토큰 조회용 고정 길이 키"
     )
     expire_at = models.DateTimeField()
     created_at = models.DateTimeField(auto_now_add=True)
@@ -122,6 +239,14 @@ class UserRefreshToken(models.Model):
         verbose_name = _("User Refresh Token")
         verbose_name_plural = _("User Refresh Tokens")
 
+    def save(self, *args, **kwargs):
+        self.token_digest = self.get_digest(self.token)
+        super().save(*args, **kwargs)
+
+    @staticmethod
+    def get_digest(token):
+        return hashlib.sha256(token.encode()).hexdigest()
+
 
 class UserCharacterInventory(models.Model):
     user = models.ForeignKey(
@@ -140,6 +265,13 @@ class UserCharacterInventory(models.Model):
         db_index=True,
         help_text="유저가 해당 스토어에서 뽑기를 진행한 적이 있는지 없는지 판별하기 위함"
     )
+    user_character_draw = models.ForeignKey(
+        "moree.UserCharacterDraw",
+        on_delete=models.SET_NULL,
+        db_index=True,
+        null=True,
+        default=None
+    )
     status = models.CharField(
         max_length=64,
         choices=StatusEnum.choices,
@@ -154,6 +286,289 @@ class UserCharacterInventory(models.Model):
         verbose_name_plural = _("User Character Inventories")
 
 
+class UserCharacterDraw(models.Model):
+    user = models.ForeignKey(
+        "moree.User",
+        on_delete=models.CASCADE,
+        db_index=True
+    )
+    store = models.ForeignKey(
+        "moree.Store",
+        on_delete=models.CASCADE,
+        db_index=True
+    )
+    idempotency_key = models.CharField(
+        max_length=64,
+        null=True,
+        default=None,
+        help_text="클라이언트 재시도 시 중복 지급 방지용 (Idempotency-Key 헤더)"
+    )
+    count = models.PositiveSmallIntegerField()
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = _("User Character Draw")
+        verbose_name_plural = _("User Character Draws")
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "idempotency_key"],
+                name="unique_user_character_draw_idempotency_key"
+            ),
+        ]
+
+
+class UserStoreDrawIndex:
+    """
+    UserStoreDrawSummary 의 (user id, store id) 프로세스별 Bloom filter
+    있다고 판단되면 오탐일 수 있으므로 DB 확인 필요
+    없다고 판단되면 그대로 사용하며, 다른 프로세스에서 추가된 행은 id 를 워터마크로 최대 SYNC_INTERVAL 초 후 반영됨
+    (같은 프로세스의 뽑기는 UserStoreDrawSummary.record 에서 바로 추가)
+    """
+    SYNC_INTERVAL = 1.0
+    INITIAL_CAPACITY = 100000
+    ERROR_RATE = 0.001
+
+    def __init__(self):
+        self.sync_lock = threading.Lock()
+        self.synced_at = None
+        self.last_id = None
+        self.bloom_filter = None
+
+    def __contains__(self, key):
+        return self.bloom_filter is not None and key in self.bloom_filter
+
+    def add(self, user_id, store_id):
+        bloom_filter = self.bloom_filter
+        if bloom_filter is not None:
+            bloom_filter.add((user_id, store_id))
+
+    def sync(self, force=False):
+        now = time.monotonic()
+        if not force and self.synced_at is not None and now - self.synced_at < self.SYNC_INTERVAL:
+            return
+        with self.sync_lock:
+            if not force and self.synced_at is not None and now - self.synced_at < self.SYNC_INTERVAL:
+                return
+            self.synced_at = now
+
+            if self.bloom_filter is None or self.bloom_filter.is_full():
+                self.rebuild()
+                return
+            rows = UserStoreDrawSummary.objects.filter(
+                id__gt=self.last_id
+            ).order_by("id").values_list("id", "user_id", "store_id")
+            for id_, user_id, store_id in rows:
+                self.bloom_filter.add((user_id, store_id))
+                self.last_id = id_
+
+    def rebuild(self):
+        # 용량을 넘기면 오탐률이 올라가므로 두 배로 다시 구축
+        count = UserStoreDrawSummary.objects.count()
+        bloom_filter = BloomFilter(max(self.INITIAL_CAPACITY, count * 2), self.ERROR_RATE)
+        last_id = 0
+        rows = UserStoreDrawSummary.objects.order_by("id").values_list("id", "user_id", "store_id")
+        for id_, user_id, store_id in rows.iterator(chunk_size=10000):
+            bloom_filter.add((user_id, store_id))
+            last_id = id_
+        self.bloom_filter, self.last_id = bloom_filter, last_id
+
+
+class UserStoreDrawSummary(models.Model):
+    """
+    유저가 스토어에서 뽑기를 진행한 적이 있는지 (user, store) 당 한 행
+    계속 늘어나는 UserCharacterInventory 대신 조회하며, 앞단의 draw_index 로 "없음" 은 DB 조회 없이 판단
+    (다른 프로세스의 뽑기는 최대 UserStoreDrawIndex.SYNC_INTERVAL 초 늦게 반영)
+    """
+    draw_index = UserStoreDrawIndex()
+
+    user = models.ForeignKey(
+        "moree.User",
+        on_delete=models.CASCADE,
+        db_index=True
+    )
+    store = models.ForeignKey(
+        "moree.Store",
+        on_delete=models.CASCADE,
+        db_index=True
+    )
+    inventory_count = models.PositiveIntegerField(
+        default=0,
+        help_text="스토어에서 뽑은 캐릭터 수"
+    )
+    # rebuild 시 원래 시각을 유지하도록 auto_now 대신 기본값으로 채움
+    first_drawn_at = models.DateTimeField(default=timezone.now)
+    last_drawn_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        verbose_name = _("User Store Draw Summary")
+        verbose_name_plural = _("User Store Draw Summaries")
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "store"],
+                name="unique_user_store_draw_summary"
+            ),
+        ]
+
+    @classmethod
+    def get_drawn_store_ids(cls, user_id, store_ids, strict=False):
+        """
+        `store_ids` 중 뽑기를 진행한 적이 있는 store id 집합
+        draw_index 에 있는 스토어만 한 번의 쿼리로 확인하며, 모두 없으면 DB 조회 없음
+
+        :param strict: 다른 프로세스의 최근 뽑기까지 반영해야 하는 경우 True (워터마크 이후 행을 먼저 반영)
+        """
+        cls.draw_index.sync(force=strict)
+        candidate_ids = {store_id for store_id in store_ids if (user_id, store_id) in cls.draw_index}
+        if not candidate_ids:
+            return set()
+        return set(cls.objects.filter(user_id=user_id, store_id__in=candidate_ids).values_list("store_id", flat=True))
+
+    @classmethod
+    def has_drawn(cls, user_id, store_id, strict=False):
+        return store_id in cls.get_drawn_store_ids(user_id, [store_id], strict=strict)
+
+    @classmethod
+    def record(cls, user_id, store_id, inventory_count=1):
+        """
+        뽑기 결과를 반영
+
+        :return: 해당 스토어에서의 첫 뽑기인지
+        """
+        values = {
+            "inventory_count": models.F("inventory_count") + inventory_count,
+            "last_drawn_at": timezone.now(),
+        }
+        created = False
+        if not cls.objects.filter(user_id=user_id, store_id=store_id).update(**values):
+            try:
+                with transaction.atomic():
+                    cls.objects.create(user_id=user_id, store_id=store_id, inventory_count=inventory_count)
+                created = True
+            except IntegrityError:
+                # 동시에 첫 뽑기가 반영된 경우
+                cls.objects.filter(user_id=user_id, store_id=store_id).update(**values)
+        cls.draw_index.add(user_id, store_id)
+        return created
+
+    @classmethod
+    def rebuild(cls, batch_size=1000):
+        """
+        UserCharacterInventory 로부터 다시 계산
+
+        :return: (user, store) 수
+        """
+        summaries = list(UserCharacterInventory.objects.values(
+            "user_id", "store_id"
+        ).annotate(
+            inventory_count=models.Count("id"),
+            first_drawn_at=models.Min("created_at"),
+            last_drawn_at=models.Max("created_at")
+        ).order_by("user_id", "store_id"))
+
+        with transaction.atomic():
+            cls.objects.all().delete()
+            cls.objects.bulk_create([cls(**summary) for summary in summaries], batch_size=batch_size)
+        cls.draw_index.rebuild()
+        return len(summaries)
+
+
+class UserStoreCollection(models.Model):
+    """
+    유저가 스토어에서 뽑은 활성 인벤토리의 캐릭터별 보유 수 (user, store) 당 한 행
+    수집 진행도는 이 집합과 스토어의 활성 StoreCharacterPool 캐릭터의 교집합으로 계산
+    """
+    user = models.ForeignKey(
+        "moree.User",
+        on_delete=models.CASCADE,
+        db_index=True
+    )
+    store = models.ForeignKey(
+        "moree.Store",
+        on_delete=models.CASCADE,
+        db_index=True
+    )
+    character_counts = models.JSONField(
+        default=dict,
+        help_text="{character_id: 보유 수}, 보유 수가 0 이 되면 제거"
+    )
+    character_count = models.PositiveIntegerField(
+        default=0,
+        help_text="보유한 캐릭터 종류 수 (현재 pool 과 무관)"
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = _("User Store Collection")
+        verbose_name_plural = _("User Store Collections")
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "store"],
+                name="unique_user_store_collection"
+            ),
+        ]
+
+    @property
+    def character_ids(self):
+        return {int(character_id) for character_id in self.character_counts}
+
+    @classmethod
+    def apply(cls, user_id, store_id, deltas):
+        """
+        캐릭터별 보유 수를 증감
+
+        :param deltas: {character_id: 증감량}
+        """
+        deltas = {character_id: delta for character_id, delta in deltas.items() if delta}
+        if not deltas:
+            return
+        with transaction.atomic():
+            collection = cls.objects.select_for_update().filter(user_id=user_id, store_id=store_id).first()
+            if collection is None:
+                try:
+                    with transaction.atomic():
+                        collection = cls.objects.create(user_id=user_id, store_id=store_id)
+                except IntegrityError:
+                    # 동시에 생성된 경우
+                    collection = cls.objects.select_for_update().get(user_id=user_id, store_id=store_id)
+
+            character_counts = collection.character_counts
+            for character_id, delta in deltas.items():
+                count = max(character_counts.get(str(character_id), 0) + delta, 0)
+                if count:
+                    character_counts[str(character_id)] = count
+                else:
+                    character_counts.pop(str(character_id), None)
+            collection.character_count = len(character_counts)
+            collection.save(update_fields=["character_counts", "character_count", "updated_at"])
+
+    @classmethod
+    def rebuild(cls, batch_size=1000):
+        """
+        활성 UserCharacterInventory 로부터 다시 계산
+
+        :return: (user, store) 수
+        """
+        collections = {}
+        inventories = UserCharacterInventory.objects.filter(
+            status=StatusEnum.ACTIVE.value
+        ).values_list("user_id", "store_id", "character_id").annotate(count=models.Count("id")).order_by()
+        for user_id, store_id, character_id, count in inventories:
+            collections.setdefault((user_id, store_id), {})[str(character_id)] = count
+
+        with transaction.atomic():
+            cls.objects.all().delete()
+            cls.objects.bulk_create(
+                [
+                    cls(user_id=user_id, store_id=store_id, character_counts=character_counts, character_count=len(character_counts))
+                    for (user_id, store_id), character_counts in collections.items()
+                ],
+                batch_size=batch_size
+            )
+        return len(collections)
+
+
 class UserFolloing(models.Model):
     user = models.OneToOneField(
         "moree.User",
@@ -396,6 +811,174 @@ class UserStoreCategory(models.Model):
         verbose_name_plural = _("User Store Categories")
 
 
+class UserStoreRecommendation(models.Model):
+    """
+    유저별 "for you" 스토어 랭킹 캐시 (위치와 무관한 점수, 거리는 요청 시 반영)
+    `manage.py build_user_store_recommendations` 로 미리 계산하며, 선호 카테고리가 바뀌면 삭제되어 다음 실행 시 다시 계산
+    (요청 중에는 계산하지 않음)
+    """
+    MAX_STORES = 500
+    # 점수 = 선호 카테고리 일치율, 인기도(리뷰+북마크+스탬프 수의 로그 정규화), 베이지안 평점의 가중합 (0~1)
+    PREFERENCE_WEIGHT = 0.6
+    POPULARITY_WEIGHT = 0.25
+    RATING_WEIGHT = 0.15
+    # 거리 d(m) 인 스토어의 점수는 1 / (1 + d / DISTANCE_SCALE_M) 배
+    DISTANCE_SCALE_M = 1000.0
+
+    user = models.OneToOneField(
+        "moree.User",
+        on_delete=models.CASCADE,
+        db_index=True,
+        related_name="store_recommendation"
+    )
+    store_scores = models.JSONField(
+        default=list,
+        help_text="[[store_id, score], ...] score 내림차순"
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = _("User Store Recommendation")
+        verbose_name_plural = _("User Store Recommendations")
+
+    @classmethod
+    def get_store_scores(cls, user):
+        """
+        :return: [(store_id, score), ...] score 내림차순, 아직 계산되지 않았으면 None
+        """
+        recommendation = cls.objects.filter(user=user).only("store_scores").first()
+        if recommendation is None:
+            return None
+        return [(store_id, score) for store_id, score in recommendation.store_scores]
+
+    @classmethod
+    def build(cls, user_ids):
+        """
+        유저들의 랭킹을 계산해서 저장 (스토어는 한 번만 조회)
+
+        :return: {user_id: [(store_id, score), ...]}
+        """
+        from moree.models import Store, StoreCategory
+
+        user_ids = list(user_ids)
+        if not user_ids:
+            return {}
+
+        user_masks = {user_id: 0 for user_id in user_ids}
+        preferences = UserStoreCategory.objects.filter(
+            user_id__in=user_ids,
+            status=StatusEnum.ACTIVE.value
+        ).values_list("user_id", "store_category_id")
+        for user_id, store_category_id in preferences:
+            user_masks[user_id] |= StoreCategory.get_mask((store_category_id,))
+
+        stores = list(Store.objects.filter(
+            status=StatusEnum.ACTIVE.value
+        ).values_list(
+            "id",
+            "category_mask",
+            "statistics__review_count",
+            "statistics__bookmark_count",
+            "statistics__stamp_count",
+            "statistics__rating_score"
+        ))
+        engagements = [sum(count or 0 for count in store[2:5]) for store in stores]
+        max_engagement = math.log1p(max(engagements, default=0)) or 1.0
+        # 선호도와 무관한 부분은 유저마다 같음
+        base_scores = [
+            cls.POPULARITY_WEIGHT * math.log1p(engagement) / max_engagement
+            + cls.RATING_WEIGHT * (store[5] or 0) / 5
+            for store, engagement in zip(stores, engagements)
+        ]
+
+        results = {}
+        for user_id, user_mask in user_masks.items():
+            preference_count = bin(user_mask).count("1")
+            scores = []
+            for store, base_score in zip(stores, base_scores):
+                preference = bin(store[1] & user_mask).count("1") / preference_count if preference_count else 0.0
+                scores.append((store[0], round(cls.PREFERENCE_WEIGHT * preference + base_score, 6)))
+            scores.sort(key=lambda item: (-item[1], -item[0]))
+            results[user_id] = scores[:cls.MAX_STORES]
+
+        with transaction.atomic():
+            cls.objects.filter(user_id__in=user_ids).delete()
+            # 같은 유저를 동시에 계산한 경우 먼저 저장된 결과를 유지
+            cls.objects.bulk_create([
+                cls(user_id=user_id, store_scores=[list(item) for item in store_scores])
+                for user_id, store_scores in results.items()
+            ], ignore_conflicts=True)
+        return results
+
+    @classmethod
+    def invalidate(cls, user_id):
+        cls.objects.filter(user_id=user_id).delete()
+
+
+class UserStoreFlags:
+    """
+    유저가 스토어를 북마크/스탬프/뽑기 했는지 여부를 여러 스토어에 대해 한 번에 조회
+    북마크/스탬프는 유저별 store id 집합을 프로세스별로 캐시하며 (MAX_CACHED_STORES 개 이하인 경우),
+    다른 프로세스에서의 변경은 최대 ttl 만큼 늦게 반영됨
+    뽑기는 캐시하지 않고 UserStoreDrawSummary.get_drawn_store_ids 로 조회 (최대 SYNC_INTERVAL 초 늦게 반영)
+    """
+    BOOKMARKED = "bookmarked"
+    STAMPED = "stamped"
+    DRAWN = "drawn"
+    RELATIONS = (BOOKMARKED, STAMPED, DRAWN)
+    CACHED_RELATIONS = (BOOKMARKED, STAMPED)
+    MAX_CACHED_STORES = 1000
+
+    # (user id, relation) -> frozenset(store id)
+    memberships = TTLCache(ttl=30)
+
+    @classmethod
+    def get_store_id_queryset(cls, user_id, relation):
+        if relation == cls.BOOKMARKED:
+            return UserStoreBookmark.stores.through.objects.filter(
+                userstorebookmark__user_id=user_id,
+                userstorebookmark__status=StatusEnum.ACTIVE.value
+            ).values_list("store_id", flat=True)
+        return UserStoreStamp.objects.filter(
+            user_id=user_id,
+            status=StatusEnum.ACTIVE.value
+        ).values_list("store_id", flat=True)
+
+    @classmethod
+    def get(cls, user_id, store_ids):
+        """
+        :return: {relation: `store_ids` 중 해당하는 store id 집합}, relation 당 최대 한 번의 쿼리
+        """
+        store_ids = set(store_ids)
+        flags = {relation: set() for relation in cls.RELATIONS}
+        if not store_ids:
+            return flags
+        # 인벤토리 상태와 관계없이 뽑기를 진행한 적이 있는지
+        flags[cls.DRAWN] = UserStoreDrawSummary.get_drawn_store_ids(user_id, store_ids)
+        for relation in cls.CACHED_RELATIONS:
+            membership = cls.memberships.get((user_id, relation))
+            if membership is None:
+                queryset = cls.get_store_id_queryset(user_id, relation).distinct()
+                store_id_list = list(queryset[:cls.MAX_CACHED_STORES + 1])
+                if len(store_id_list) > cls.MAX_CACHED_STORES:
+                    # 너무 많으면 캐시하지 않고 해당 스토어들만 조회
+                    flags[relation] = set(queryset.filter(store_id__in=store_ids))
+                    continue
+                membership = frozenset(store_id_list)
+                cls.memberships.set((user_id, relation), membership)
+            flags[relation] = store_ids & membership
+        return flags
+
+    @classmethod
+    def invalidate(cls, user_id, relation):
+        cls.memberships.delete((user_id, relation))
+
+    @classmethod
+    def invalidate_all(cls, relation):
+        cls.memberships.delete_where(lambda key, value: key[1] == relation)
+
+
 class UserLog(models.Model):
     user = models.ForeignKey(
         "moree.User",
@@ -1,22 +1,51 @@
 from rest_framework.permissions import BasePermission
-from moree.models import User
+
+from core.cache import TTLCache
+from moree.enums import UserStatusEnum
+from moree.models import User, UserAccessToken
 
 
 class UserPermission(BasePermission):
+    # user id -> user
+    # 토큰 검증은 서명만 확인하므로 DB 조회는 user 정보가 캐시에 없을 때만 발생
+    # 캐시된 user 는 폐기 목록 확인(UserAccessToken.verify)을 통과한 토큰에만 사용되며,
+    # 유저 비활성화/토큰 폐기는 폐기 목록으로 다른 프로세스에도 최대 sync_interval(5초) 안에 반영됨
+    # 그 밖의 유저 정보 변경은 다른 프로세스에서 최대 ttl 만큼 늦게 반영됨
+    principals = TTLCache(ttl=30)
 
     def has_permission(self, request, view):
-        # TODO: 추후 provider login-in 구현
-        request.user = User.objects.get(id=1)
-        return True
-
+        # check_permissions 등에서 여러 번 호출되어도 요청당 한 번만 인증
+        if not hasattr(request, "authenticated_user"):
+            request.authenticated_user = self.authenticate(request)
+            if request.authenticated_user is not None:
+                request.user = request.authenticated_user
+        return request.authenticated_user is not None
+
+    def authenticate(self, request):
         authorization_header = request.headers.get("Authorization")
 
         if authorization_header is None:
-            return False
+            return None
 
         if not authorization_header.startswith("Bearer "):
-            return False
-
-        user_access_token = authorization_header[7:]
-
-        return False
+            return None
+
+        payload = UserAccessToken.verify(authorization_header[7:].strip())
+        if payload is None:
+            return None
+
+        user_id = payload.get("uid")
+        user = self.principals.get(user_id)
+        if user is None:
+            user = User.objects.filter(id=user_id).first()
+            if user is None:
+                return None
+            self.principals.set(user_id, user)
+
+        if user.status != UserStatusEnum.ACTIVE.value:
+            return None
+        return user
+
+    @classmethod
+    def revoke(cls, user_id):
+        cls.principals.delete(user_id)
@@ -9,12 +9,21 @@ from .user import (
     UserStoreBookmarkSerializer,
     UserStoreCategorySerializer,
     UserStoreStampSerializer,
+    UserStoreCollectionSerializer,
     UserTermAgreementSerializer,
 )
 from .store import (
     StoreSerializer,
+    StoreDetailSerializer,
     StoreCategorySerializer,
-    StoreCharacterPoolSerializer
+    StoreCharacterPoolSerializer,
+    StoreCharacterDrawSerializer,
+    StoreAutocompleteSerializer,
+    StoreTileSerializer,
+    StoreSnapshotSerializer,
+    StoreDropRateSerializer,
+    StoreWaitingRoomSerializer,
+    StoreWaitingRoomStatusSerializer
 )
 from .character import (
     CharacterSerializer
@@ -1,11 +1,13 @@
-from rest_framework import serializers
-
+from core.serializers import BaseModelSerializer
 from moree.models import (
     Character
 )
 
 
-class CharacterSerializer(serializers.ModelSerializer):
+class CharacterSerializer(BaseModelSerializer):
     class Meta:
         model = Character
         exclude = ("status",)
+        expandable_fields = {
+            "profile_img_stored_file": "common.serializers.StoredFileSerializer"
+        }
@@ -1,9 +1,12 @@
 from rest_framework import serializers
 
+from core.serializers import BaseModelSerializer, get_root_query_param
 from moree.models import (
     Store,
     StoreCategory,
-    StoreCharacterPool
+    StoreCharacterPool,
+    StoreStatistics,
+    UserStoreFlags
 )
 
 
@@ -40,14 +43,81 @@ class BusinessDayMultipleChoiceField(serializers.MultipleChoiceField):
         return mask
 
 
-class StoreSerializer(serializers.ModelSerializer):
+class StoreListSerializer(serializers.ListSerializer):
+    def to_representation(self, data):
+        # 유저별 플래그는 페이지 단위로 relation 당 한 번에 조회
+        stores = list(data.all() if hasattr(data, "all") else data)
+        if self.child.get_user() is not None:
+            self.child.user_store_flags = UserStoreFlags.get(self.child.get_user().id, [store.id for store in stores])
+        return super().to_representation(stores)
+
+
+class StoreSerializer(BaseModelSerializer):
+    USER_FLAG_FIELDS = {
+        "is_bookmarked": UserStoreFlags.BOOKMARKED,
+        "is_stamped": UserStoreFlags.STAMPED,
+        "is_drawn": UserStoreFlags.DRAWN,
+    }
+    user_flags_query_param = "user_flags"
+
     business_day_list = BusinessDayMultipleChoiceField(write_only=True)
     business_day = BusinessDayMultipleChoiceField(read_only=True)
+    distance = serializers.SerializerMethodField()
+    review_count = serializers.IntegerField(source="statistics.review_count", read_only=True, default=0)
+    rating_average = serializers.FloatField(source="statistics.rating_mean", read_only=True, default=None)
+    bookmark_count = serializers.IntegerField(source="statistics.bookmark_count", read_only=True, default=0)
+    stamp_count = serializers.IntegerField(source="statistics.stamp_count", read_only=True, default=0)
+    # ?user_flags=true 인 경우에만 포함 (로그인 필요)
+    is_bookmarked = serializers.SerializerMethodField()
+    is_stamped = serializers.SerializerMethodField()
+    is_drawn = serializers.SerializerMethodField()
 
     class Meta:
         model = Store
+        list_serializer_class = StoreListSerializer
         read_only_fields = ("business_day",)
-        exclude = ("status",)
+        exclude = ("status", "geohash", "category_mask")
+        expandable_fields = {
+            "store_categories": "moree.serializers.StoreCategorySerializer",
+            "profile_img_stored_files_group": "common.serializers.StoredFilesGroupSerializer"
+        }
+
+    def get_distance(self, obj):
+        # near 필터를 사용한 경우에만 값이 존재 (m)
+        distance = getattr(obj, "distance", None)
+        return round(distance, 1) if distance is not None else None
+
+    def get_fields(self):
+        fields = super().get_fields()
+        if self.get_user() is None:
+            for name in self.USER_FLAG_FIELDS:
+                fields.pop(name, None)
+        return fields
+
+    def get_user(self):
+        """
+        플래그를 계산할 유저, ?user_flags=true 가 아니거나 인증되지 않은 경우 None
+        """
+        if get_root_query_param(self, self.user_flags_query_param) not in serializers.BooleanField.TRUE_VALUES:
+            return None
+        request = self.context.get("request")
+        return getattr(request, "authenticated_user", None)
+
+    def get_user_flag(self, obj, name):
+        user_store_flags = getattr(self, "user_store_flags", None)
+        if user_store_flags is None:
+            # 단일 객체 직렬화
+            user_store_flags = UserStoreFlags.get(self.get_user().id, [obj.id])
+        return obj.id in user_store_flags[self.USER_FLAG_FIELDS[name]]
+
+    def get_is_bookmarked(self, obj):
+        return self.get_user_flag(obj, "is_bookmarked")
+
+    def get_is_stamped(self, obj):
+        return self.get_user_flag(obj, "is_stamped")
+
+    def get_is_drawn(self, obj):
+        return self.get_user_flag(obj, "is_drawn")
 
     def create(self, validated_data):
         business_day = validated_data.pop("business_day_list", None)
@@ -62,13 +132,104 @@ class StoreSerializer(serializers.ModelSerializer):
         return super().update(instance, validated_data)
 
 
-class StoreCategorySerializer(serializers.ModelSerializer):
+class StoreDetailSerializer(StoreSerializer):
+    rating_summary = serializers.SerializerMethodField()
+
+    def get_rating_summary(self, obj):
+        statistics = getattr(obj, "statistics", None)
+        if statistics is None:
+            statistics = StoreStatistics(store=obj)
+            statistics.rating_mean, statistics.rating_score = statistics.get_rating_summary(0, 0)
+        return {
+            "review_count": statistics.review_count,
+            "histogram": statistics.rating_histogram,
+            "mean": statistics.rating_mean,
+            "score": statistics.rating_score,
+        }
+
+
+class StoreCategorySerializer(BaseModelSerializer):
     class Meta:
         model = StoreCategory
         exclude = ("status",)
 
 
-class StoreCharacterPoolSerializer(serializers.ModelSerializer):
+class StoreCharacterPoolSerializer(BaseModelSerializer):
     class Meta:
         model = StoreCharacterPool
         exclude = ("status",)
+        expandable_fields = {
+            "store": "moree.serializers.StoreSerializer",
+            "character": "moree.serializers.CharacterSerializer"
+        }
+
+
+class StoreCharacterDrawSerializer(serializers.Serializer):
+    MAX_COUNT = 100
+
+    count = serializers.IntegerField(min_value=1, max_value=MAX_COUNT, default=1)
+
+
+class StoreAutocompleteSerializer(serializers.Serializer):
+    MAX_LIMIT = 50
+
+    q = serializers.CharField(max_length=64)
+    limit = serializers.IntegerField(min_value=1, max_value=MAX_LIMIT, default=10)
+
+
+class StoreTileClusterSerializer(serializers.Serializer):
+    count = serializers.IntegerField()
+    latitude = serializers.FloatField()
+    longitude = serializers.FloatField()
+
+
+class StoreTileBoundsSerializer(serializers.Serializer):
+    min_latitude = serializers.FloatField()
+    max_latitude = serializers.FloatField()
+    min_longitude = serializers.FloatField()
+    max_longitude = serializers.FloatField()
+
+
+class StoreTileSerializer(serializers.Serializer):
+    z = serializers.IntegerField()
+    x = serializers.IntegerField()
+    y = serializers.IntegerField()
+    bounds = StoreTileBoundsSerializer()
+    count = serializers.IntegerField()
+    clusters = StoreTileClusterSerializer(many=True)
+
+
+class StoreDropRateItemSerializer(serializers.Serializer):
+    character = serializers.DictField(help_text="CharacterSerializer (profile_img_stored_file 포함)")
+    weight = serializers.IntegerField()
+    probability = serializers.FloatField(help_text="0~1")
+
+
+class StoreDropRateSerializer(serializers.Serializer):
+    store = serializers.IntegerField()
+    version = serializers.IntegerField(help_text="Store.character_pool_version")
+    total_weight = serializers.IntegerField()
+    drop_rates = StoreDropRateItemSerializer(many=True)
+
+
+class StoreWaitingRoomSerializer(serializers.Serializer):
+    ticket = serializers.CharField(
+        max_length=512,
+        help_text="입장 대기 응답(429)의 ticket"
+    )
+
+
+class StoreWaitingRoomStatusSerializer(serializers.Serializer):
+    store = serializers.IntegerField()
+    number = serializers.IntegerField(help_text="번호표 번호")
+    position = serializers.IntegerField(help_text="대기 순서 (1=다음 입장, 0=입장 가능)")
+    retry_after = serializers.IntegerField(help_text="입장까지 남은 초")
+    is_admitted = serializers.BooleanField()
+
+
+class StoreSnapshotSerializer(serializers.Serializer):
+    since = serializers.IntegerField(
+        min_value=0,
+        required=False,
+        help_text="가지고 있는 스냅샷 버전, 주어지면 이후 변경분만 반환"
+    )
@@ -1,18 +1,20 @@
-from rest_framework import serializers
-
+from core.serializers import BaseModelSerializer
 from moree.models import (
     Term,
     TermCategory
 )
 
 
-class TermSerializer(serializers.ModelSerializer):
+class TermSerializer(BaseModelSerializer):
     class Meta:
         model = Term
         exclude = ("status",)
+        expandable_fields = {
+            "term_category": "moree.serializers.TermCategorySerializer"
+        }
 
 
-class TermCategorySerializer(serializers.ModelSerializer):
+class TermCategorySerializer(BaseModelSerializer):
     class Meta:
         model = TermCategory
         exclude = ("status",)
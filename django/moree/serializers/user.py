@@ -1,6 +1,9 @@
-from rest_framework import serializers
+from django.utils import timezone
+from rest_framework import exceptions, serializers
 
+from core.serializers import BaseModelSerializer
 from moree.models import (
+    StoreCharacterPool,
     User,
     UserAccessToken,
     UserRefreshToken,
@@ -10,27 +13,33 @@ from moree.models import (
     UserReviewReport,
     UserStoreBookmark,
     UserStoreCategory,
+    UserStoreCollection,
     UserStoreStamp,
     UserTermAgreement
 )
-from moree.enums import UserGenderEnum
+from moree.enums import UserGenderEnum, UserStatusEnum
 
 
-class UserSerializer(serializers.ModelSerializer):
+class UserSerializer(BaseModelSerializer):
     gender = serializers.ChoiceField(choices=UserGenderEnum.choices)
 
     class Meta:
         model = User
         read_only_fields = ("email",)
         exclude = ("status",)
+        expandable_fields = {
+            "profile_img_stored_file": "common.serializers.StoredFileSerializer",
+            "profile_backgroud_img_stored_files_group": "common.serializers.StoredFilesGroupSerializer"
+        }
 
 
-class UserAccessTokenSerializer(serializers.ModelSerializer):
+class UserAccessTokenSerializer(BaseModelSerializer):
     refresh_token = serializers.CharField(write_only=True)
     class Meta:
         model = UserAccessToken
-        read_only_fields = ("user",)
+        read_only_fields = ("user", "token")
         exclude = (
+            "jti",
             "user_refresh_token",
             "device_id",
             "expire_at",
@@ -38,13 +47,23 @@ class UserAccessTokenSerializer(serializers.ModelSerializer):
             "updated_at"
         )
 
+    def create(self, validated_data):
+        user_refresh_token = UserRefreshToken.objects.select_related("user").filter(
+            token_digest=UserRefreshToken.get_digest(validated_data["refresh_token"]),
+            expire_at__gt=timezone.now()
+        ).first()
+        if user_refresh_token is None or user_refresh_token.user.status != UserStatusEnum.ACTIVE.value:
+            raise exceptions.AuthenticationFailed()
+        return UserAccessToken.issue(user_refresh_token)
+
 
-class UserRefreshTokenSerializer(serializers.ModelSerializer):
+class UserRefreshTokenSerializer(BaseModelSerializer):
     provider_token = serializers.CharField(write_only=True)
     class Meta:
         model = UserRefreshToken
         read_only_fields = ("user",)
         exclude = (
+            "token_digest",
             "device_id",
             "provider",
             "provider_user_id",
@@ -55,49 +74,112 @@ class UserRefreshTokenSerializer(serializers.ModelSerializer):
         )
 
 
-# class UserLogSerializer(serializers.ModelSerializer):
+# class UserLogSerializer(BaseModelSerializer):
 #     class Meta:
 #         model = UserLog
 #         exclude = ("status",)
 
 
-class UserCharacterInventorySerializer(serializers.ModelSerializer):
+class UserCharacterInventorySerializer(BaseModelSerializer):
     class Meta:
         model = UserCharacterInventory
         exclude = ("status",)
+        expandable_fields = {
+            "character": "moree.serializers.CharacterSerializer",
+            "store": "moree.serializers.StoreSerializer"
+        }
 
 
-class UserReviewSerializer(serializers.ModelSerializer):
+class UserReviewSerializer(BaseModelSerializer):
     class Meta:
         model = UserReview
         exclude = ("status",)
+        expandable_fields = {
+            "store": "moree.serializers.StoreSerializer",
+            "img_stored_files_group": "common.serializers.StoredFilesGroupSerializer"
+        }
 
 
-class UserReviewReportSerializer(serializers.ModelSerializer):
+class UserReviewReportSerializer(BaseModelSerializer):
     class Meta:
         model = UserReviewReport
         exclude = ("status",)
 
 
-class UserStoreBookmarkSerializer(serializers.ModelSerializer):
+class UserStoreBookmarkSerializer(BaseModelSerializer):
     class Meta:
         model = UserStoreBookmark
         exclude = ("status",)
+        expandable_fields = {
+            "stores": "moree.serializers.StoreSerializer",
+            "icon_img_stored_file": "common.serializers.StoredFileSerializer"
+        }
 
 
-class UserStoreCategorySerializer(serializers.ModelSerializer):
+class UserStoreCategorySerializer(BaseModelSerializer):
     class Meta:
         model = UserStoreCategory
         exclude = ("status",)
+        expandable_fields = {
+            "store_category": "moree.serializers.StoreCategorySerializer"
+        }
 
 
-class UserStoreStampSerializer(serializers.ModelSerializer):
+class UserStoreStampSerializer(BaseModelSerializer):
     class Meta:
         model = UserStoreStamp
         exclude = ("status",)
+        expandable_fields = {
+            "store": "moree.serializers.StoreSerializer",
+            "img_stored_file": "common.serializers.StoredFileSerializer"
+        }
+
+
+class UserStoreCollectionListSerializer(serializers.ListSerializer):
+    def to_representation(self, data):
+        # 스토어별 pool 캐릭터는 페이지 단위로 한 번에 조회
+        collections = list(data.all() if hasattr(data, "all") else data)
+        self.child.pool_character_ids = StoreCharacterPool.get_character_ids(
+            {collection.store_id for collection in collections}
+        )
+        return super().to_representation(collections)
+
+
+class UserStoreCollectionSerializer(BaseModelSerializer):
+    owned_count = serializers.SerializerMethodField(help_text="보유한 pool 캐릭터 종류 수")
+    total_count = serializers.SerializerMethodField(help_text="pool 캐릭터 종류 수")
+    owned_character_ids = serializers.SerializerMethodField()
+
+    class Meta:
+        model = UserStoreCollection
+        list_serializer_class = UserStoreCollectionListSerializer
+        fields = ("id", "store", "owned_count", "total_count", "owned_character_ids", "created_at", "updated_at")
+        expandable_fields = {
+            "store": "moree.serializers.StoreSerializer"
+        }
+
+    def get_pool_character_ids(self, obj):
+        pool_character_ids = getattr(self, "pool_character_ids", None)
+        if pool_character_ids is None or obj.store_id not in pool_character_ids:
+            # 단일 객체 직렬화
+            pool_character_ids = StoreCharacterPool.get_character_ids([obj.store_id])
+            self.pool_character_ids = pool_character_ids
+        return pool_character_ids[obj.store_id]
+
+    def get_owned_count(self, obj):
+        return len(obj.character_ids & self.get_pool_character_ids(obj))
+
+    def get_total_count(self, obj):
+        return len(self.get_pool_character_ids(obj))
+
+    def get_owned_character_ids(self, obj):
+        return sorted(obj.character_ids & self.get_pool_character_ids(obj))
 
 
-class UserTermAgreementSerializer(serializers.ModelSerializer):
+class UserTermAgreementSerializer(BaseModelSerializer):
     class Meta:
         model = UserTermAgreement
         exclude = ("status",)
+        expandable_fields = {
+            "term": "moree.serializers.TermSerializer"
+        }
@@ -0,0 +1,8 @@
+from .store import (
+    bump_character_pool_version,
+    bump_character_pool_version_by_character
+)
+from .user import (
+    revoke_user_principals,
+    revoke_user_access_token_principals
+)
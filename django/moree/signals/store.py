@@ -0,0 +1,192 @@
+from decimal import Decimal
+
+from django.db.models.signals import m2m_changed, post_delete, post_migrate, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from core.enums import StatusEnum
+from moree.models import (
+    Character,
+    Store,
+    StoreChangeLog,
+    StoreGridCell,
+    StoreCharacterPool,
+    StoreStatistics,
+    UserReview,
+    UserStoreBookmark,
+    UserStoreStamp
+)
+
+
+@receiver((post_save, post_delete), sender=StoreCharacterPool)
+def bump_character_pool_version(sender, instance, **kwargs):
+    StoreCharacterPool.bump_version(instance.store_id)
+
+
+@receiver(post_save, sender=Character)
+def bump_character_pool_version_by_character(sender, instance, **kwargs):
+    store_ids = StoreCharacterPool.objects.filter(
+        character=instance
+    ).values_list("store_id", flat=True).distinct()
+    for store_id in store_ids:
+        StoreCharacterPool.bump_version(store_id)
+
+
+@receiver(post_migrate)
+def create_store_search_index(sender, **kwargs):
+    # 가상 테이블은 모델/마이그레이션으로 관리되지 않으므로 migrate 후 생성
+    if sender.label == "moree":
+        Store.search_index.create()
+
+
+@receiver(post_delete, sender=Store)
+def log_store_delete(sender, instance, **kwargs):
+    # Store.delete 는 비활성화이므로 queryset.delete() 등으로 실제 삭제된 경우
+    StoreGridCell.move(instance.get_grid_position(), None)
+    StoreChangeLog.objects.create(store_id=instance.id)
+
+
+@receiver(m2m_changed, sender=Store.store_categories.through)
+def update_store_category_mask(sender, instance, action, reverse, pk_set, **kwargs):
+    # reverse 이면 instance 는 StoreCategory, pk_set 은 스토어 id
+    if action == "pre_clear" and reverse:
+        instance._cleared_store_ids = set(instance.store_set.values_list("id", flat=True))
+        return
+    if action not in ("post_add", "post_remove", "post_clear"):
+        return
+
+    if not reverse:
+        store_ids = {instance.id}
+    elif action == "post_clear":
+        store_ids = getattr(instance, "_cleared_store_ids", set())
+    else:
+        store_ids = pk_set
+    Store.update_category_masks(store_ids)
+    StoreChangeLog.objects.bulk_create([StoreChangeLog(store_id=store_id) for store_id in sorted(store_ids)])
+
+
+@receiver(post_save, sender=Store)
+def create_store_statistics(sender, instance, created, **kwargs):
+    if created and not kwargs.get("raw"):
+        StoreStatistics.objects.get_or_create(store=instance)
+
+
+def get_statistics_contribution(instance):
+    """
+    리뷰/스탬프 한 건이 StoreStatistics 에 기여하는 값 -> (store_id, {필드명: 값})
+    """
+    if instance is None or instance.status != StatusEnum.ACTIVE.value:
+        return None, {}
+    if isinstance(instance, UserReview):
+        rating = Decimal(str(instance.rating))
+        return instance.store_id, {
+            "review_count": 1,
+            "rating_sum": rating,
+            f"rating_{StoreStatistics.get_rating_bucket(rating)}_count": 1
+        }
+    return instance.store_id, {"stamp_count": 1}
+
+
+def apply_statistics_contribution(previous, current):
+    previous_store_id, previous_values = previous
+    current_store_id, current_values = current
+    if previous_store_id == current_store_id:
+        deltas = {
+            name: current_values.get(name, 0) - previous_values.get(name, 0)
+            for name in set(previous_values) | set(current_values)
+        }
+        if current_store_id is not None:
+            StoreStatistics.increment(current_store_id, **deltas)
+        return
+    if previous_store_id is not None:
+        StoreStatistics.increment(previous_store_id, **{name: -value for name, value in previous_values.items()})
+    if current_store_id is not None:
+        StoreStatistics.increment(current_store_id, **current_values)
+
+
+@receiver(pre_save, sender=UserReview)
+@receiver(pre_save, sender=UserStoreStamp)
+def remember_store_statistics_contribution(sender, instance, **kwargs):
+    previous = None
+    if instance.pk is not None and not kwargs.get("raw"):
+        previous = sender.objects.filter(pk=instance.pk).first()
+    instance._previous_statistics_contribution = get_statistics_contribution(previous)
+
+
+@receiver(post_save, sender=UserReview)
+@receiver(post_save, sender=UserStoreStamp)
+def update_store_statistics(sender, instance, **kwargs):
+    if kwargs.get("raw"):
+        return
+    apply_statistics_contribution(
+        getattr(instance, "_previous_statistics_contribution", (None, {})),
+        get_statistics_contribution(instance)
+    )
+    instance._previous_statistics_contribution = get_statistics_contribution(instance)
+
+
+@receiver(post_delete, sender=UserReview)
+@receiver(post_delete, sender=UserStoreStamp)
+def update_store_statistics_by_delete(sender, instance, **kwargs):
+    apply_statistics_contribution(get_statistics_contribution(instance), (None, {}))
+
+
+@receiver(m2m_changed, sender=UserStoreBookmark.stores.through)
+def update_store_statistics_by_bookmark_stores(sender, instance, action, reverse, pk_set, **kwargs):
+    # reverse 이면 instance 는 Store, pk_set 은 북마크 id
+    if action in ("pre_remove", "pre_clear"):
+        # remove 의 pk_set 에는 담겨있지 않은 id 도 포함되고 clear 는 pk_set 이 없으므로 실제로 빠지는 행을 미리 기록
+        if reverse:
+            queryset = instance.userstorebookmark_set.filter(status=StatusEnum.ACTIVE.value)
+        else:
+            queryset = instance.stores.all()
+        if action == "pre_remove":
+            queryset = queryset.filter(id__in=pk_set)
+        instance._removed_bookmark_relation_ids = set(queryset.values_list("id", flat=True))
+        return
+
+    if action == "post_add":
+        ids, delta = pk_set, 1
+        if reverse:
+            ids = UserStoreBookmark.objects.filter(
+                id__in=pk_set,
+                status=StatusEnum.ACTIVE.value
+            ).values_list("id", flat=True)
+    elif action in ("post_remove", "post_clear"):
+        ids, delta = getattr(instance, "_removed_bookmark_relation_ids", ()), -1
+    else:
+        return
+
+    if reverse:
+        StoreStatistics.increment(instance.id, bookmark_count=delta * len(ids))
+    elif instance.status == StatusEnum.ACTIVE.value:
+        for store_id in ids:
+            StoreStatistics.increment(store_id, bookmark_count=delta)
+
+
+@receiver(pre_save, sender=UserStoreBookmark)
+def remember_bookmark_status(sender, instance, **kwargs):
+    instance._previous_status = None
+    if instance.pk is not None and not kwargs.get("raw"):
+        instance._previous_status = sender.objects.filter(pk=instance.pk).values_list("status", flat=True).first()
+
+
+@receiver(post_save, sender=UserStoreBookmark)
+def update_store_statistics_by_bookmark_status(sender, instance, created, **kwargs):
+    # 생성 직후에는 담긴 스토어가 없음 (m2m_changed 에서 반영)
+    if created or kwargs.get("raw"):
+        return
+    was_active = getattr(instance, "_previous_status", None) == StatusEnum.ACTIVE.value
+    is_active = instance.status == StatusEnum.ACTIVE.value
+    if was_active == is_active:
+        return
+    for store_id in instance.stores.values_list("id", flat=True):
+        StoreStatistics.increment(store_id, bookmark_count=1 if is_active else -1)
+
+
+@receiver(pre_delete, sender=UserStoreBookmark)
+def update_store_statistics_by_bookmark_delete(sender, instance, **kwargs):
+    # 북마크 삭제 시 m2m 행은 m2m_changed 없이 삭제됨
+    if instance.status != StatusEnum.ACTIVE.value:
+        return
+    for store_id in instance.stores.values_list("id", flat=True):
+        StoreStatistics.increment(store_id, bookmark_count=-1)
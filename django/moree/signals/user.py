@@ -0,0 +1,135 @@
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from core.enums import StatusEnum
+from moree.enums import UserStatusEnum
+from moree.models import (
+    User,
+    UserAccessToken,
+    UserAccessTokenRevocation,
+    UserRefreshToken,
+    UserCharacterInventory,
+    UserStoreBookmark,
+    UserStoreCategory,
+    UserStoreCollection,
+    UserStoreDrawSummary,
+    UserStoreFlags,
+    UserStoreRecommendation,
+    UserStoreStamp
+)
+from moree.permissions import UserPermission
+
+
+@receiver(post_save, sender=User)
+def revoke_user_principals(sender, instance, **kwargs):
+    UserPermission.revoke(instance.id)
+    if kwargs.get("raw") or instance.status == UserStatusEnum.ACTIVE.value:
+        return
+    # 다른 프로세스에 캐시된 유저 정보(principals)와 무관하게 폐기 목록으로 access token 을 거부
+    user_access_token = UserAccessToken.objects.filter(user_id=instance.id).only("jti", "expire_at").first()
+    if user_access_token is not None:
+        UserAccessTokenRevocation.revoke(user_access_token.jti, user_access_token.expire_at)
+
+
+@receiver((post_save, post_delete), sender=UserAccessToken)
+def revoke_user_access_token_principals(sender, instance, **kwargs):
+    UserPermission.revoke(instance.user_id)
+
+
+@receiver(post_delete, sender=UserAccessToken)
+def revoke_deleted_user_access_token(sender, instance, **kwargs):
+    UserAccessTokenRevocation.revoke(instance.jti, instance.expire_at)
+
+
+@receiver(post_save, sender=UserRefreshToken)
+def revoke_rotated_user_access_token(sender, instance, created, **kwargs):
+    # refresh token 이 교체되면 그 refresh token 으로 발급된 access token 은 폐기
+    if created or kwargs.get("raw"):
+        return
+    user_access_token = UserAccessToken.objects.filter(
+        user_refresh_token=instance
+    ).only("jti", "expire_at").first()
+    if user_access_token is not None:
+        UserAccessTokenRevocation.revoke(user_access_token.jti, user_access_token.expire_at)
+
+
+@receiver((post_save, post_delete), sender=UserStoreCategory)
+def invalidate_user_store_recommendation(sender, instance, **kwargs):
+    if kwargs.get("raw"):
+        return
+    UserStoreRecommendation.invalidate(instance.user_id)
+
+
+@receiver((post_save, post_delete), sender=UserStoreBookmark)
+def invalidate_user_store_bookmarked_flags(sender, instance, **kwargs):
+    UserStoreFlags.invalidate(instance.user_id, UserStoreFlags.BOOKMARKED)
+
+
+@receiver(m2m_changed, sender=UserStoreBookmark.stores.through)
+def invalidate_user_store_bookmarked_flags_by_stores(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ("post_add", "post_remove", "post_clear"):
+        return
+    if not reverse:
+        UserStoreFlags.invalidate(instance.user_id, UserStoreFlags.BOOKMARKED)
+    elif pk_set:
+        # instance 는 Store, pk_set 은 북마크 id
+        for user_id in UserStoreBookmark.objects.filter(id__in=pk_set).values_list("user_id", flat=True).distinct():
+            UserStoreFlags.invalidate(user_id, UserStoreFlags.BOOKMARKED)
+    else:
+        # 스토어에서 clear 된 경우 어떤 유저의 북마크였는지 알 수 없음
+        UserStoreFlags.invalidate_all(UserStoreFlags.BOOKMARKED)
+
+
+@receiver((post_save, post_delete), sender=UserStoreStamp)
+def invalidate_user_store_stamped_flags(sender, instance, **kwargs):
+    UserStoreFlags.invalidate(instance.user_id, UserStoreFlags.STAMPED)
+
+
+@receiver(post_save, sender=UserCharacterInventory)
+def record_user_store_draw_summary(sender, instance, created, **kwargs):
+    # 뽑기 API 는 bulk_create 후 직접 반영하므로 여기서는 그 외 경로 (관리자 지급 등)
+    if created and not kwargs.get("raw"):
+        UserStoreDrawSummary.record(instance.user_id, instance.store_id)
+
+
+def get_collection_contribution(instance):
+    """
+    인벤토리 한 건이 UserStoreCollection 에 기여하는 값 -> (user_id, store_id, character_id), 비활성이면 None
+    """
+    if instance is None or instance.status != StatusEnum.ACTIVE.value:
+        return None
+    return instance.user_id, instance.store_id, instance.character_id
+
+
+def apply_collection_contribution(previous, current):
+    if previous == current:
+        return
+    if previous is not None:
+        UserStoreCollection.apply(previous[0], previous[1], {previous[2]: -1})
+    if current is not None:
+        UserStoreCollection.apply(current[0], current[1], {current[2]: 1})
+
+
+@receiver(pre_save, sender=UserCharacterInventory)
+def remember_user_store_collection_contribution(sender, instance, **kwargs):
+    previous = None
+    if instance.pk is not None and not kwargs.get("raw"):
+        previous = sender.objects.filter(pk=instance.pk).first()
+    instance._previous_collection_contribution = get_collection_contribution(previous)
+
+
+@receiver(post_save, sender=UserCharacterInventory)
+def update_user_store_collection(sender, instance, **kwargs):
+    # 뽑기 API 는 bulk_create 후 직접 반영
+    if kwargs.get("raw"):
+        return
+    apply_collection_contribution(
+        getattr(instance, "_previous_collection_contribution", None),
+        get_collection_contribution(instance)
+    )
+    instance._previous_collection_contribution = get_collection_contribution(instance)
+
+
+@receiver(post_delete, sender=UserCharacterInventory)
+def update_user_store_collection_by_delete(sender, instance, **kwargs):
+    apply_collection_contribution(get_collection_contribution(instance), None)
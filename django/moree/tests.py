@@ -1,3 +1,545 @@
+import datetime
+import struct
+
+from unittest import mock
+
 from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from common.models import StoredFilesGroup
+from core.enums import StatusEnum
+from core.sampler import AliasTable
+from core.pagenation import BasePagination
+from moree.enums import UserGenderEnum, UserProviderEnum, UserStatusEnum
+from moree.models import (
+    Character,
+    Store,
+    StoreCategory,
+    StoreCharacterPool,
+    StoreWaitingRoom,
+    User,
+    UserAccessToken,
+    UserAccessTokenRevocation,
+    UserCharacterDraw,
+    UserCharacterInventory,
+    UserRefreshToken,
+    UserStoreDrawSummary,
+    UserStoreFlags,
+    UserStoreRecommendation
+)
+from moree.permissions import UserPermission
+from moree.views import StoreDropRateView
+
+
+def create_store(**kwargs):
+    return Store.objects.create(**{
+        "title": "store",
+        "address": "address",
+        "latitude": "37.5665000",
+        "longitude": "126.9780000",
+        "description": "description",
+        "start_date": datetime.date(2025, 1, 1),
+        "opening_time": datetime.time(10, 0),
+        "closing_time": datetime.time(20, 0),
+        "profile_img_stored_files_group": StoredFilesGroup.objects.create(),
+        "status": StatusEnum.ACTIVE.value,
+        **kwargs
+    })
+
+
+def create_pool(store, weight=1, **kwargs):
+    character = Character.objects.create(name="character", description="description")
+    return StoreCharacterPool.objects.create(store=store, character=character, weight=weight, **kwargs)
+
+
+def create_user(**kwargs):
+    return User.objects.create(**{
+        "name": "user",
+        "email": "user@example.com",
+        "gender": UserGenderEnum.FEMALE.value,
+        "birthday": datetime.date(2000, 1, 1),
+        **kwargs
+    })
+
+
+def get_client(user):
+    user_refresh_token = UserRefreshToken.objects.create(
+        user=user,
+        device_id="device",
+        provider=UserProviderEnum.APPLE.value,
+        provider_user_id="provider-user",
+        provider_token=f"provider-token-{user.id}",
+        token=f"refresh-token-{user.id}",
+        expire_at=timezone.now() + datetime.timedelta(days=1)
+    )
+    client = APIClient()
+    client.credentials(HTTP_AUTHORIZATION="Bearer " + UserAccessToken.issue(user_refresh_token).token)
+    return client
+
+
+class StoreSaveTest(TestCase):
+    def setUp(self):
+        # 롤백된 테스트의 스토어 id/버전이 재사용되므로 프로세스 캐시를 비움
+        StoreCharacterPool.samplers.clear()
+
+    def test_stale_instance_does_not_reset_character_pool_version(self):
+        store = create_store()
+        stale_store = Store.objects.get(pk=store.pk)
+        create_pool(store)
+        store.refresh_from_db()
+        bumped_version = store.character_pool_version
+        self.assertGreater(bumped_version, stale_store.character_pool_version)
+        self.assertEqual(len(StoreCharacterPool.get_sampler(store)), 1)
+
+        stale_store.title = "renamed"
+        stale_store.save()
+        store.refresh_from_db()
+        self.assertEqual(store.title, "renamed")
+        self.assertEqual(store.character_pool_version, bumped_version)
+
+        # 다음 변경은 새 버전이므로 캐시된 뽑기 테이블이 다시 만들어짐
+        create_pool(store)
+        store.refresh_from_db()
+        self.assertGreater(store.character_pool_version, bumped_version)
+        self.assertEqual(len(StoreCharacterPool.get_sampler(store)), 2)
+
+
+class StoreCharacterDrawStockTest(TestCase):
+    def setUp(self):
+        StoreCharacterPool.samplers.clear()
+        self.store = create_store()
+        self.limited_pool = create_pool(self.store, weight=1000, stock=1)
+        self.unlimited_pool = create_pool(self.store, weight=1)
+        self.store.refresh_from_db()
+        self.client = get_client(create_user())
+
+    def test_sample_within_stocks(self):
+        results = StoreCharacterPool.sample(self.store, 5, {self.limited_pool.id: 1})
+        self.assertEqual(len(results), 5)
+        self.assertEqual(sum(1 for pool_id, _ in results if pool_id == self.limited_pool.id), 1)
+        self.assertIsNone(StoreCharacterPool.sample(self.store, 1, {self.limited_pool.id: 0, self.unlimited_pool.id: 0}))
+
+    def test_draw_more_than_low_stock(self):
+        # 첫 시도에서 거의 항상 수량 한정 pool 을 2 개 이상 뽑아 부족해짐 (stock 은 0 이 아님)
+        response = self.client.post(f"/store/{self.store.id}/draw/", {"count": 5}, format="json")
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(len(response.json()), 5)
+
+        self.limited_pool.refresh_from_db()
+        self.assertEqual(self.limited_pool.stock, 0)
+        self.assertEqual(UserCharacterInventory.objects.filter(character=self.limited_pool.character).count(), 1)
+
+
+class StoreCharacterDrawIdempotencyTest(TestCase):
+    def setUp(self):
+        StoreCharacterPool.samplers.clear()
+        self.store = create_store()
+        create_pool(self.store)
+        create_pool(self.store)
+        self.store.refresh_from_db()
+        self.user = create_user()
+        self.client = get_client(self.user)
+
+    def draw(self, count, idempotency_key, store=None):
+        return self.client.post(
+            f"/store/{(store or self.store).id}/draw/",
+            {"count": count},
+            format="json",
+            HTTP_IDEMPOTENCY_KEY=idempotency_key
+        )
+
+    def test_retry_replays_the_first_draw(self):
+        response = self.draw(3, "key")
+        self.assertEqual(response.status_code, 201)
+
+        replay_response = self.draw(3, " key ")
+        self.assertEqual(replay_response.status_code, 200)
+        self.assertEqual(replay_response.json(), response.json())
+        self.assertEqual(UserCharacterInventory.objects.filter(user=self.user).count(), 3)
+
+    def test_same_key_with_other_request_conflicts(self):
+        self.assertEqual(self.draw(3, "key").status_code, 201)
+        self.assertEqual(self.draw(2, "key").status_code, 409)
+        other_store = create_store()
+        create_pool(other_store)
+        self.assertEqual(self.draw(3, "key", other_store).status_code, 409)
+        self.assertEqual(UserCharacterInventory.objects.filter(user=self.user).count(), 3)
+
+    def test_invalid_key_is_rejected(self):
+        for idempotency_key in ("", "  ", "k" * 65):
+            self.assertEqual(self.draw(1, idempotency_key).status_code, 400, idempotency_key)
+        self.assertEqual(self.draw(1, "k" * 64).status_code, 201)
+
+    def test_concurrent_retry_replays_the_committed_draw(self):
+        def commit_concurrent_draw(*args, **kwargs):
+            # 이 요청의 키 조회 이후, 같은 키의 동시 재시도가 먼저 반영됨
+            user_character_draw = UserCharacterDraw.objects.create(
+                user=self.user,
+                store=self.store,
+                idempotency_key="key",
+                count=1
+            )
+            UserCharacterInventory.objects.create(
+                user=self.user,
+                character=self.store.storecharacterpool_set.first().character,
+                store=self.store,
+                user_character_draw=user_character_draw
+            )
+
+        with mock.patch.object(StoreWaitingRoom, "admit", side_effect=commit_concurrent_draw):
+            response = self.draw(1, "key")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()), 1)
+        self.assertEqual(UserCharacterInventory.objects.filter(user=self.user).count(), 1)
+
+
+class StoreDropRateTest(TestCase):
+    def setUp(self):
+        StoreCharacterPool.samplers.clear()
+        StoreDropRateView.drop_rate_tables.clear()
+        self.store = create_store()
+        self.pool = create_pool(self.store, weight=3)
+        self.limited_pool = create_pool(self.store, weight=1, stock=1)
+
+    def get_drop_rates(self, etag=None):
+        headers = {} if etag is None else {"HTTP_IF_NONE_MATCH": etag}
+        return APIClient().get(f"/store/{self.store.id}/drop-rate/", **headers)
+
+    def get_probabilities(self, response):
+        self.assertEqual(response.status_code, 200)
+        return {item["character"]["id"]: item["probability"] for item in response.json()["drop_rates"]}
+
+    def test_pool_changes_invalidate_etag(self):
+        response = self.get_drop_rates()
+        self.assertEqual(
+            self.get_probabilities(response),
+            {self.pool.character_id: 0.75, self.limited_pool.character_id: 0.25}
+        )
+        etag = response["ETag"]
+        self.assertEqual(self.get_drop_rates(etag).status_code, 304)
+
+        self.pool.weight = 1
+        self.pool.save()
+        response = self.get_drop_rates(etag)
+        self.assertNotEqual(response["ETag"], etag)
+        self.assertEqual(
+            self.get_probabilities(response),
+            {self.pool.character_id: 0.5, self.limited_pool.character_id: 0.5}
+        )
+
+        # 한정 수량 소진은 pool 저장 없이 UPDATE 로 반영되지만 버전이 올라감
+        etag = response["ETag"]
+        self.assertTrue(StoreCharacterPool.take_stock(self.store.id, {self.limited_pool.id: 1}))
+        response = self.get_drop_rates(etag)
+        self.assertNotEqual(response["ETag"], etag)
+        self.assertEqual(self.get_probabilities(response), {self.pool.character_id: 1.0})
+
+
+class StoreForYouTest(TestCase):
+    def test_ranking_is_not_built_during_request(self):
+        user = create_user()
+        stores = [create_store(), create_store()]
+        client = get_client(user)
+
+        response = client.get("/store/", {"for_you": "true"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual({store["id"] for store in response.json()["results"]}, {store.id for store in stores})
+        self.assertFalse(UserStoreRecommendation.objects.filter(user=user).exists())
+
+        UserStoreRecommendation.build([user.id])
+        response = client.get("/store/", {"for_you": "true"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()["results"]), 2)
+
+
+class UserPermissionTest(TestCase):
+    def test_deactivated_user_is_rejected_despite_cached_principal(self):
+        user = create_user()
+        client = get_client(user)
+        self.assertEqual(client.get("/store/", {"user_flags": "true"}).status_code, 200)
+        stale_user = User.objects.get(pk=user.pk)
+
+        user.status = UserStatusEnum.WITHDRAWN.value
+        user.save()
+        # 다른 프로세스: 비활성화 전의 user 가 캐시되어 있고, 폐기 목록은 DB 에서만 알 수 있음
+        UserPermission.principals.set(user.id, stale_user)
+        UserAccessTokenRevocation.revocations.clear()
+
+        self.assertIn(client.get("/store/", {"user_flags": "true"}).status_code, (401, 403))
+
+
+class EstimatedCountTest(TestCase):
+    @mock.patch.object(BasePagination, "estimated_count_limit", 3)
+    def test_estimate_is_scaled_by_filter_selectivity(self):
+        stores = [create_store() for _ in range(20)]
+        Store.objects.filter(id__in=[store.id for store in stores[::2]]).update(status=StatusEnum.INACTIVE.value)
+
+        response = APIClient().get("/store/", {"count": "estimate"})
+        self.assertEqual(response.status_code, 200)
+        # 활성 스토어 10 개 = 테이블 추정치 20 x 선택도 0.5 (LIMIT 으로 센 4 가 아님)
+        self.assertEqual(response.json()["count"], 10)
+        self.assertTrue(response.json()["is_count_estimated"])
+
+
+class StoreOpenAtTest(TestCase):
+    def get_store_ids(self, local_datetime):
+        moment = datetime.datetime(*local_datetime, tzinfo=timezone.get_default_timezone())
+        response = APIClient().get("/store/", {"open_at": moment.timestamp()})
+        self.assertEqual(response.status_code, 200)
+        return {store["id"] for store in response.json()["results"]}
+
+    def test_open_at_is_in_asia_seoul(self):
+        store = create_store()
+        # 2025-01-03 10:30 Asia/Seoul = 01:30 UTC
+        self.assertEqual(self.get_store_ids((2025, 1, 3, 10, 30)), {store.id})
+        self.assertEqual(self.get_store_ids((2025, 1, 3, 9, 59)), set())
+        self.assertEqual(self.get_store_ids((2025, 1, 3, 20, 0)), set())
+
+    def test_overnight_hours_belong_to_the_previous_day(self):
+        # 금요일만 22:00 ~ 02:00 영업, 2025-01-03 이 마지막 영업일 (금요일)
+        store = create_store(
+            business_day=Store.BUSINESS_DAY_BITS[4],
+            opening_time=datetime.time(22, 0),
+            closing_time=datetime.time(2, 0),
+            end_date=datetime.date(2025, 1, 3)
+        )
+        self.assertEqual(self.get_store_ids((2025, 1, 3, 23, 0)), {store.id})
+        self.assertEqual(self.get_store_ids((2025, 1, 4, 1, 59)), {store.id})
+        self.assertEqual(self.get_store_ids((2025, 1, 4, 2, 0)), set())
+        self.assertEqual(self.get_store_ids((2025, 1, 3, 1, 0)), set())
+        self.assertEqual(self.get_store_ids((2025, 1, 4, 23, 0)), set())
+        self.assertEqual(self.get_store_ids((2025, 1, 11, 1, 0)), set())
+
+
+class StoreCategoryFilterTest(TestCase):
+    def get_store_ids(self, params):
+        response = APIClient().get("/store/", params)
+        self.assertEqual(response.status_code, 200)
+        return {store["id"] for store in response.json()["results"]}
+
+    def test_categories_any_and_all(self):
+        cafe = StoreCategory.objects.create(name="카페", priority=1)
+        goods = StoreCategory.objects.create(name="굿즈", priority=2)
+        # 비트마스크 범위를 넘는 id 는 through 테이블로 비교
+        popup = StoreCategory.objects.create(id=StoreCategory.MAX_MASK_ID + 1, name="팝업", priority=3)
+        cafe_store, goods_store, both_store, popup_store = create_store(), create_store(), create_store(), create_store()
+        cafe_store.store_categories.add(cafe)
+        goods_store.store_categories.add(goods)
+        both_store.store_categories.add(cafe, goods, popup)
+        popup_store.store_categories.add(popup)
+        create_store()
+
+        self.assertEqual(self.get_store_ids({"categories": f"{cafe.id}"}), {cafe_store.id, both_store.id})
+        self.assertEqual(
+            self.get_store_ids({"categories": f"{cafe.id},{goods.id}"}),
+            {cafe_store.id, goods_store.id, both_store.id}
+        )
+        self.assertEqual(
+            self.get_store_ids({"categories": f"{cafe.id},{popup.id}", "categories_match": "any"}),
+            {cafe_store.id, both_store.id, popup_store.id}
+        )
+        self.assertEqual(
+            self.get_store_ids({"categories": f"{cafe.id},{goods.id}", "categories_match": "all"}),
+            {both_store.id}
+        )
+        self.assertEqual(
+            self.get_store_ids({"categories": f"{goods.id},{popup.id}", "categories_match": "all"}),
+            {both_store.id}
+        )
+        self.assertEqual(
+            self.get_store_ids({"categories": f"{popup.id}", "categories_match": "all"}),
+            {both_store.id, popup_store.id}
+        )
+
+        both_store.store_categories.remove(goods)
+        self.assertEqual(self.get_store_ids({"categories": f"{cafe.id},{goods.id}", "categories_match": "all"}), set())
+
+
+class StoreSearchTest(TestCase):
+    def get_store_ids(self, params):
+        response = APIClient().get("/store/", params)
+        self.assertEqual(response.status_code, 200)
+        return [store["id"] for store in response.json()["results"]]
+
+    def test_title_match_ranks_first(self):
+        description_store = create_store(title="플라워 샵", description="콜라보 카페 옆")
+        title_store = create_store(title="콜라보 카페")
+        create_store(title="서점")
+        self.assertEqual(self.get_store_ids({"q": "콜라보 카페"}), [title_store.id, description_store.id])
+
+    def test_distance_breaks_relevance_ties_with_near(self):
+        description_store = create_store(title="플라워 샵", description="카페", latitude="37.5665000")
+        far_store = create_store(title="카페", latitude="37.5700000")
+        near_store = create_store(title="카페", latitude="37.5670000")
+        create_store(title="카페", latitude="37.7000000")
+        self.assertEqual(
+            self.get_store_ids({"q": "카페", "near": "37.5665,126.978"}),
+            [near_store.id, far_store.id, description_store.id]
+        )
+
+    def test_icontains_fallback_without_search_index(self):
+        store = create_store(title="콜라보 카페")
+        create_store(title="서점")
+        with mock.patch.object(Store.search_index, "is_available", return_value=False):
+            self.assertEqual(self.get_store_ids({"q": "보 카"}), [store.id])
+        # 검색 가능한 단어가 없는 경우
+        self.assertEqual(self.get_store_ids({"q": "!!"}), [])
+
+
+class StoreAutocompleteTest(TestCase):
+    def setUp(self):
+        # 롤백된 테스트의 변경 기록 id 가 재사용되므로 인덱스를 다시 구축
+        Store.autocomplete_index.synced_at = None
+        Store.autocomplete_index.last_change_id = None
+        Store.autocomplete_index.category_version = None
+
+    def get_results(self, q):
+        response = APIClient().get("/store-autocomplete/", {"q": q})
+        self.assertEqual(response.status_code, 200)
+        return [(result["type"], result["id"]) for result in response.json()["results"]]
+
+    def test_partial_syllable_matches_word_starts(self):
+        cafe_store = create_store(title="카페 모리", address="서울")
+        collaboration_store = create_store(title="콜라보 카페", address="부산")
+        create_store(title="서점", address="카레 골목")
+        store_category = StoreCategory.objects.create(name="카페", priority=1)
+
+        self.assertEqual(
+            set(self.get_results("캎")),
+            {("store", cafe_store.id), ("store", collaboration_store.id), ("category", store_category.id)}
+        )
+        self.assertEqual(self.get_results("카페모"), [("store", cafe_store.id)])
+        self.assertEqual(self.get_results("부"), [("store", collaboration_store.id)])
+
+    def test_inactive_store_is_removed(self):
+        store = create_store(title="카페 모리")
+        self.assertEqual(self.get_results("카페"), [("store", store.id)])
+        store.status = StatusEnum.INACTIVE.value
+        store.save()
+        Store.autocomplete_index.sync(force=True)
+        self.assertEqual(self.get_results("카페"), [])
+
+
+class StoreSnapshotTest(TestCase):
+    def setUp(self):
+        # 롤백된 테스트의 변경 기록 id 가 재사용되므로 스냅샷을 다시 구축
+        Store.snapshot.synced_at = None
+        Store.snapshot.is_built = False
+
+    def get_snapshot(self, params=None, etag=None):
+        headers = {} if etag is None else {"HTTP_IF_NONE_MATCH": etag}
+        return APIClient().get("/store-snapshot/", params or {}, **headers)
+
+    def test_delta_since_version_and_etag(self):
+        create_store()
+        inactive_store = create_store()
+        response = self.get_snapshot()
+        self.assertEqual(response.status_code, 200)
+        version = int(response["X-Snapshot-Version"])
+        _, _, kind, header_version, record_count = struct.unpack_from("<4sHBQI", response.content)
+        self.assertEqual((kind, header_version, record_count), (Store.snapshot.FULL, version, 2))
+        self.assertEqual(self.get_snapshot(etag=response["ETag"]).status_code, 304)
+
+        inactive_store.status = StatusEnum.INACTIVE.value
+        inactive_store.save()
+        new_store = create_store()
+        Store.snapshot.sync(force=True)
+
+        response = self.get_snapshot({"since": version})
+        self.assertEqual(response.status_code, 200)
+        new_version = int(response["X-Snapshot-Version"])
+        self.assertGreater(new_version, version)
+        header_struct = struct.Struct("<4sHBQQII")
+        _, _, kind, since, header_version, record_count, deleted_count = header_struct.unpack_from(response.content)
+        self.assertEqual((kind, since, header_version), (Store.snapshot.DELTA, version, new_version))
+        self.assertEqual((record_count, deleted_count), (1, 1))
+        offset = header_struct.size
+        self.assertEqual(struct.unpack_from("<I", response.content, offset)[0], new_store.id)
+        offset += Store.snapshot.record_struct.size
+        self.assertEqual(struct.unpack_from("<I", response.content, offset)[0], inactive_store.id)
+
+        self.assertEqual(response["ETag"], f'"{version}-{new_version}"')
+        self.assertEqual(self.get_snapshot({"since": version}, etag=response["ETag"]).status_code, 304)
+        self.assertEqual(self.get_snapshot({"since": new_version + 100}).status_code, 400)
+
+
+class CursorPaginationTest(TestCase):
+    def test_cursor_rejects_other_orderings(self):
+        create_store()
+        client = APIClient()
+        self.assertEqual(client.get("/store/", {"pagination": "cursor"}).status_code, 200)
+        for params in ({"near": "37.5665,126.978"}, {"q": "store"}, {"ordering": "title"}):
+            response = client.get("/store/", {"pagination": "cursor", **params})
+            self.assertEqual(response.status_code, 400, params)
+
+        response = get_client(create_user()).get("/store/", {"pagination": "cursor", "for_you": "true"})
+        self.assertEqual(response.status_code, 400)
+
+    def test_view_without_cursor_pagination(self):
+        client = get_client(create_user())
+        self.assertEqual(client.get("/user-store-collection/").status_code, 200)
+        response = client.get("/user-store-collection/", {"pagination": "cursor"})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("pagination", response.json())
+
+
+class StoreWaitingRoomTest(TestCase):
+    @mock.patch.object(StoreWaitingRoom.room, "burst", 0)
+    @mock.patch.object(StoreWaitingRoom.room, "rate", 0.001)
+    def test_retry_without_ticket_keeps_number(self):
+        store = create_store(pre_order_start_at=timezone.now() - datetime.timedelta(seconds=1))
+        client, other_client = get_client(create_user()), get_client(create_user(email="other@example.com"))
+
+        numbers = []
+        for request_client in (client, client, other_client, client):
+            response = request_client.post(f"/store/{store.id}/draw/", {"count": 1}, format="json")
+            self.assertEqual(response.status_code, 429)
+            numbers.append(StoreWaitingRoom.room.read_ticket(response.json()["ticket"])[2])
+        self.assertEqual(numbers, [1, 1, 2, 1])
+        self.assertEqual(StoreWaitingRoom.objects.get(store=store).issued_count, 2)
+
+
+class UserStoreDrawIndexTest(TestCase):
+    def setUp(self):
+        self.user, self.store = create_user(), create_store()
+        UserStoreDrawSummary.draw_index.rebuild()
+
+    def test_draw_from_other_process_is_reflected_after_sync(self):
+        # 다른 프로세스의 뽑기: 이 프로세스의 Bloom filter 에는 아직 없고 SYNC_INTERVAL 도 지나지 않음
+        UserStoreDrawSummary.draw_index.sync()
+        UserStoreDrawSummary.objects.create(user=self.user, store=self.store, inventory_count=1)
+        with self.assertNumQueries(0):
+            self.assertFalse(UserStoreDrawSummary.has_drawn(self.user.id, self.store.id))
+        self.assertEqual(UserStoreFlags.get(self.user.id, [self.store.id])[UserStoreFlags.DRAWN], set())
+        self.assertTrue(UserStoreDrawSummary.has_drawn(self.user.id, self.store.id, strict=True))
+
+        UserStoreDrawSummary.draw_index.synced_at -= UserStoreDrawSummary.draw_index.SYNC_INTERVAL
+        other_store = create_store()
+        flags = UserStoreFlags.get(self.user.id, [self.store.id, other_store.id])
+        self.assertEqual(flags[UserStoreFlags.DRAWN], {self.store.id})
+
+    def test_draw_in_same_process_is_reflected_immediately(self):
+        UserStoreDrawSummary.draw_index.sync()
+        UserStoreFlags.get(self.user.id, [self.store.id])
+        UserStoreDrawSummary.record(self.user.id, self.store.id)
+        self.assertTrue(UserStoreDrawSummary.has_drawn(self.user.id, self.store.id))
+        self.assertEqual(UserStoreFlags.get(self.user.id, [self.store.id])[UserStoreFlags.DRAWN], {self.store.id})
+
+
+class AliasTableTest(TestCase):
+    class EdgeRandom:
+        """
+        균등분포 값은 u * size == size 가 되는 1.0, 동전은 0.0 을 반환
+        """
+        def __init__(self):
+            self.calls = 0
+
+        def random(self):
+            self.calls += 1
+            return 1.0 if self.calls % 2 else 0.0
 
-# Create your tests here.
+    def test_uniform_rounding_up_to_size_stays_in_range(self):
+        sampler = AliasTable(items=["a", "b", "c"], weights=[1, 2, 3])
+        self.assertIn(sampler.sample_index(self.EdgeRandom()), range(3))
+        self.assertEqual(len(sampler.sample_many(4, self.EdgeRandom())), 4)
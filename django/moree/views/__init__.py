@@ -19,6 +19,7 @@ from .user import (
     UserStoreCategoryDetailView,
     UserStoreStampView,
     UserStoreStampDetailView,
+    UserStoreCollectionView,
     UserTermAgreementView,
     UserTermAgreementDetailView,
 )
@@ -28,7 +29,14 @@ from .store import (
     StoreCategoryView,
     StoreCategoryDetailView,
     StoreCharacterPoolView,
-    StoreCharacterPoolDetailView
+    StoreCharacterPoolDetailView,
+    StoreCharacterDrawView,
+    StoreAutocompleteView,
+    StoreTileView,
+    StoreSnapshotView,
+    StoreCollectionView,
+    StoreDropRateView,
+    StoreWaitingRoomView
 )
 from .character import (
     CharacterView,
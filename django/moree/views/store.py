@@ -1,17 +1,32 @@
 from django.contrib.auth.models import AnonymousUser
-from rest_framework import filters, mixins
+from django.db import IntegrityError, transaction
+from django.http import HttpResponse
+from django.utils.http import parse_etags
+from rest_framework import filters, mixins, status
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.response import Response
 from django_filters.rest_framework import DjangoFilterBackend
 from drf_yasg.utils import swagger_auto_schema
 
+from core.cache import VersionedCache
+from core.filters import BaseOrderingFilter
 from core.pagenation import BasePagination
 from core.views import BaseGenericAPIView
 from core.enums import StatusEnum
+from core.exceptions import CharacterSoldOutError, EmptyCharacterPoolError, IdempotencyKeyConflictError
+from core.geo import get_tile_bounds
 
 from moree.permissions import UserPermission
 from moree.models import (
     Store,
     StoreCategory,
-    StoreCharacterPool
+    StoreCharacterPool,
+    StoreGridCell,
+    StoreWaitingRoom,
+    UserCharacterDraw,
+    UserCharacterInventory,
+    UserStoreCollection,
+    UserStoreDrawSummary
 )
 from moree.filters import (
     StoreFilter,
@@ -20,8 +35,19 @@ from moree.filters import (
 )
 from moree.serializers import (
     StoreSerializer,
+    StoreDetailSerializer,
     StoreCategorySerializer,
-    StoreCharacterPoolSerializer
+    StoreCharacterPoolSerializer,
+    StoreCharacterDrawSerializer,
+    StoreAutocompleteSerializer,
+    StoreTileSerializer,
+    StoreSnapshotSerializer,
+    StoreDropRateSerializer,
+    StoreWaitingRoomSerializer,
+    StoreWaitingRoomStatusSerializer,
+    CharacterSerializer,
+    UserStoreCollectionSerializer,
+    UserCharacterInventorySerializer
 )
 
 
@@ -33,18 +59,30 @@ class StoreView(
     serializer_class = StoreSerializer
     pagination_class = BasePagination
 
-    filter_backends = (DjangoFilterBackend, filters.OrderingFilter)
+    filter_backends = (DjangoFilterBackend, BaseOrderingFilter)
     filterset_class = StoreFilter
+    ordering_aliases = {
+        "review_count": "statistics__review_count",
+        "bookmark_count": "statistics__bookmark_count",
+        "stamp_count": "statistics__stamp_count",
+        "rating_average": "statistics__rating_mean",
+        "score": "statistics__rating_score",
+    }
 
     def get_queryset(self):
         queryset = Store.objects.filter(
             status=StatusEnum.ACTIVE.value,
-        ).order_by("-id")
+        ).select_related("statistics").order_by("-id")
         return queryset
 
     def get_permissions(self):
         if self.request.method in ("POST",):
             return [UserPermission()]
+        if self.request.method in ("GET",) and (
+            self.get_boolean_query_param("for_you") or self.get_boolean_query_param("user_flags")
+        ):
+            # 추천 목록, 유저별 플래그는 로그인 필요
+            return [UserPermission()]
         return super().get_permissions()
 
     @swagger_auto_schema()
@@ -62,17 +100,19 @@ class StoreDetailView(
     mixins.DestroyModelMixin,
     BaseGenericAPIView
 ):
-    serializer_class = StoreSerializer
+    serializer_class = StoreDetailSerializer
 
     def get_queryset(self):
         queryset = Store.objects.filter(
             status=StatusEnum.ACTIVE.value,
-        ).order_by("-id")
+        ).select_related("statistics").order_by("-id")
         return queryset
 
     def get_permissions(self):
         if self.request.method in ("PUT", "PATCH", "DELETE"):
             return [UserPermission()]
+        if self.request.method in ("GET",) and self.get_boolean_query_param("user_flags"):
+            return [UserPermission()]
         return super().get_permissions()
 
     @swagger_auto_schema()
@@ -182,3 +222,307 @@ class StoreCharacterPoolDetailView(
     @swagger_auto_schema()
     def get(self, request, *args, **kwargs):
         return self.retrieve(request, *args, **kwargs)
+
+
+class StoreCharacterDrawView(BaseGenericAPIView):
+    serializer_class = UserCharacterInventorySerializer
+    # 한정 수량이 동시 요청으로 부족해졌을 때 다시 뽑는 횟수
+    MAX_DRAW_ATTEMPTS = 3
+
+    def get_queryset(self):
+        queryset = Store.objects.filter(
+            status=StatusEnum.ACTIVE.value,
+        ).only("id", "character_pool_version", "pre_order_start_at").order_by("-id")
+        return queryset
+
+    def get_permissions(self):
+        if self.request.method in ("POST",):
+            return [UserPermission()]
+        return super().get_permissions()
+
+    @swagger_auto_schema(request_body=StoreCharacterDrawSerializer)
+    def post(self, request, *args, **kwargs):
+        store = self.get_object()
+
+        draw_serializer = StoreCharacterDrawSerializer(data=request.data)
+        draw_serializer.is_valid(raise_exception=True)
+        count = draw_serializer.validated_data["count"]
+
+        idempotency_key = self.get_idempotency_key(request)
+        if idempotency_key is not None:
+            user_character_draw = UserCharacterDraw.objects.filter(
+                user=request.user,
+                idempotency_key=idempotency_key
+            ).first()
+            if user_character_draw is not None:
+                return self.get_replay_response(user_character_draw, store, count)
+
+        StoreWaitingRoom.admit(store, request.user.id, StoreWaitingRoom.get_tickets(request))
+
+        stocks = None
+        for _ in range(self.MAX_DRAW_ATTEMPTS):
+            response = self.draw(request, store, count, idempotency_key, stocks)
+            if response is not None:
+                return response
+            # 다른 요청이 먼저 수량을 소진함 -> 최신 버전의 뽑기 테이블에서 남은 수량 이내로 다시 뽑음
+            store.refresh_from_db(fields=["character_pool_version"])
+            stocks = StoreCharacterPool.get_stocks(store)
+        raise CharacterSoldOutError()
+
+    def draw(self, request, store, count, idempotency_key, stocks=None):
+        """
+        캐릭터를 `count` 개 뽑아 저장, 수량 한정 pool 이 부족하면 저장하지 않고 None
+
+        :param stocks: 남은 수량 이내로 뽑을 수량 한정 pool 의 {pool id: 남은 수량} (StoreCharacterPool.sample)
+        """
+        results = StoreCharacterPool.sample(store, count, stocks)
+        if results is None:
+            raise EmptyCharacterPoolError() if stocks is None else CharacterSoldOutError()
+
+        limited_pool_ids = StoreCharacterPool.get_limited_pool_ids(store)
+        pool_counts = {}
+        for pool_id, _ in results:
+            if pool_id in limited_pool_ids:
+                pool_counts[pool_id] = pool_counts.get(pool_id, 0) + 1
+
+        try:
+            with transaction.atomic():
+                if not StoreCharacterPool.take_stock(store.id, pool_counts):
+                    transaction.set_rollback(True)
+                    return None
+                user_character_draw = UserCharacterDraw.objects.create(
+                    user=request.user,
+                    store=store,
+                    idempotency_key=idempotency_key,
+                    count=count
+                )
+                user_character_inventories = UserCharacterInventory.objects.bulk_create([
+                    UserCharacterInventory(
+                        user=request.user,
+                        character_id=character_id,
+                        store=store,
+                        user_character_draw=user_character_draw
+                    )
+                    for _, character_id in results
+                ])
+                # bulk_create 는 post_save 를 발생시키지 않으므로 직접 반영
+                UserStoreDrawSummary.record(request.user.id, store.id, len(user_character_inventories))
+                character_counts = {}
+                for _, character_id in results:
+                    character_counts[character_id] = character_counts.get(character_id, 0) + 1
+                UserStoreCollection.apply(request.user.id, store.id, character_counts)
+        except IntegrityError:
+            # 같은 Idempotency-Key 의 동시 재시도가 먼저 반영된 경우
+            user_character_draw = UserCharacterDraw.objects.filter(
+                user=request.user,
+                idempotency_key=idempotency_key
+            ).first()
+            if user_character_draw is None:
+                raise
+            return self.get_replay_response(user_character_draw, store, count)
+
+        serializer = self.get_serializer(user_character_inventories, many=True)
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+    def get_idempotency_key(self, request):
+        idempotency_key = request.headers.get("Idempotency-Key")
+        if idempotency_key is None:
+            return None
+        idempotency_key = idempotency_key.strip()
+        max_length = UserCharacterDraw._meta.get_field("idempotency_key").max_length
+        if not idempotency_key or len(idempotency_key) > max_length:
+            raise ValidationError({"Idempotency-Key": [f"1 ~ {max_length} 자의 값이어야 함"]})
+        return idempotency_key
+
+    def get_replay_response(self, user_character_draw, store, count):
+        # 같은 키로 다른 스토어나 다른 개수를 요청한 경우
+        if user_character_draw.store_id != store.id or user_character_draw.count != count:
+            raise IdempotencyKeyConflictError()
+        user_character_inventories = UserCharacterInventory.objects.filter(
+            user_character_draw=user_character_draw
+        ).order_by("id")
+        serializer = self.get_serializer(user_character_inventories, many=True)
+        return Response(serializer.data, status=status.HTTP_200_OK)
+
+
+class StoreAutocompleteView(BaseGenericAPIView):
+    serializer_class = StoreAutocompleteSerializer
+
+    @swagger_auto_schema(query_serializer=StoreAutocompleteSerializer)
+    def get(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+
+        # DB 조회 없이 프로세스별 인덱스에서 조회 (변경분은 최대 SYNC_INTERVAL 초 후 반영)
+        Store.autocomplete_index.sync()
+        results = Store.autocomplete_index.search(
+            serializer.validated_data["q"],
+            limit=serializer.validated_data["limit"]
+        )
+        return Response({
+            "results": [
+                {"type": item_type, "id": item_id, "text": text}
+                for (item_type, item_id), text in results
+            ]
+        })
+
+
+class StoreTileView(BaseGenericAPIView):
+    """
+    Web Mercator 타일 (z/x/y) 안의 활성 스토어 클러스터 (개수, 중심 좌표)
+    스토어 수와 관계없이 타일당 최대 4^CLUSTER_ZOOM_OFFSET 개의 클러스터만 반환
+    """
+    serializer_class = StoreTileSerializer
+
+    @swagger_auto_schema(responses={200: StoreTileSerializer})
+    def get(self, request, z, x, y, *args, **kwargs):
+        if not (StoreGridCell.MIN_ZOOM <= z <= StoreGridCell.MAX_ZOOM):
+            raise NotFound(f"Invalid zoom: {z} ({StoreGridCell.MIN_ZOOM} <= z <= {StoreGridCell.MAX_ZOOM})")
+        if not (x < 1 << z and y < 1 << z):
+            raise NotFound(f"Invalid tile: {z}/{x}/{y}")
+
+        clusters = StoreGridCell.tile_cache.get(z, x, y, lambda: StoreGridCell.get_tile_clusters(z, x, y))
+        min_latitude, max_latitude, min_longitude, max_longitude = get_tile_bounds(z, x, y)
+        return Response({
+            "z": z,
+            "x": x,
+            "y": y,
+            "bounds": {
+                "min_latitude": min_latitude,
+                "max_latitude": max_latitude,
+                "min_longitude": min_longitude,
+                "max_longitude": max_longitude,
+            },
+            "count": sum(cluster["count"] for cluster in clusters),
+            "clusters": clusters,
+        })
+
+
+class StoreSnapshotView(BaseGenericAPIView):
+    """
+    활성 스토어 바이너리 스냅샷 (형식은 StoreSnapshot, core.snapshot.BinarySnapshot 참고)
+    `?since=` 가 주어지면 해당 버전 이후의 변경분, 버전은 X-Snapshot-Version 헤더와 ETag 로 전달
+    """
+    serializer_class = StoreSnapshotSerializer
+
+    @swagger_auto_schema(query_serializer=StoreSnapshotSerializer)
+    def get(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        since = serializer.validated_data.get("since")
+
+        Store.snapshot.sync()
+        if since is None:
+            version, content = Store.snapshot.dumps()
+            etag = f'"{version}"'
+        else:
+            if since > Store.snapshot.version:
+                # 다른 프로세스가 먼저 반영한 버전일 수 있음
+                Store.snapshot.sync(force=True)
+            dump = Store.snapshot.dumps_since(since)
+            if dump is None:
+                raise ValidationError({"since": f"Unknown snapshot version: {since}"})
+            version, content = dump
+            etag = f'"{since}-{version}"'
+
+        if etag in parse_etags(request.headers.get("If-None-Match", "")):
+            response = HttpResponse(status=status.HTTP_304_NOT_MODIFIED)
+        else:
+            response = HttpResponse(content, content_type="application/octet-stream")
+        response["ETag"] = etag
+        response["X-Snapshot-Version"] = str(version)
+        return response
+
+
+class StoreCollectionView(BaseGenericAPIView):
+    """
+    로그인한 유저의 스토어 캐릭터 수집 진행도 (보유한 pool 캐릭터 종류 수 / pool 캐릭터 종류 수)
+    """
+    serializer_class = UserStoreCollectionSerializer
+
+    def get_queryset(self):
+        queryset = Store.objects.filter(
+            status=StatusEnum.ACTIVE.value,
+        ).only("id").order_by("-id")
+        return queryset
+
+    def get_permissions(self):
+        if self.request.method in ("GET",):
+            return [UserPermission()]
+        return super().get_permissions()
+
+    @swagger_auto_schema()
+    def get(self, request, *args, **kwargs):
+        store = self.get_object()
+        collection = UserStoreCollection.objects.filter(user=request.user, store=store).first()
+        if collection is None:
+            collection = UserStoreCollection(user=request.user, store=store)
+        serializer = self.get_serializer(collection)
+        return Response(serializer.data)
+
+
+class StoreDropRateView(BaseGenericAPIView):
+    """
+    스토어 활성 pool 의 캐릭터별 뽑기 확률
+    pool 버전(Store.character_pool_version) 당 한 번만 계산하며, 버전을 ETag 로 사용
+    """
+    serializer_class = StoreDropRateSerializer
+    # store_id -> (character_pool_version, 응답 데이터)
+    drop_rate_tables = VersionedCache()
+
+    def get_queryset(self):
+        queryset = Store.objects.filter(
+            status=StatusEnum.ACTIVE.value,
+        ).only("id", "character_pool_version").order_by("-id")
+        return queryset
+
+    @swagger_auto_schema(responses={200: StoreDropRateSerializer})
+    def get(self, request, *args, **kwargs):
+        store = self.get_object()
+        version = store.character_pool_version
+        etag = f'"{store.id}-{version}"'
+        if etag in parse_etags(request.headers.get("If-None-Match", "")):
+            response = HttpResponse(status=status.HTTP_304_NOT_MODIFIED)
+        else:
+            response = Response(self.drop_rate_tables.get(store.id, version, lambda: self.build(store.id, version)))
+        response["ETag"] = etag
+        return response
+
+    @staticmethod
+    def build(store_id, version):
+        drop_rates = StoreCharacterPool.get_drop_rates(store_id)
+        return {
+            "store": store_id,
+            "version": version,
+            "total_weight": sum(weight for _, weight, _ in drop_rates),
+            "drop_rates": [
+                {
+                    "character": CharacterSerializer(character, expand={"profile_img_stored_file": {}}).data,
+                    "weight": weight,
+                    "probability": probability,
+                }
+                for character, weight, probability in drop_rates
+            ],
+        }
+
+
+class StoreWaitingRoomView(BaseGenericAPIView):
+    """
+    입장 대기 번호표의 대기 순서 (DB 조회 없이 번호표로 계산하므로 오픈 시각의 폴링 부하가 작음)
+    뽑기/스탬프/북마크 요청이 429 로 대기하면 응답의 ticket 으로 폴링하고,
+    입장 가능해지면 ticket 을 X-Waiting-Room-Ticket 헤더로 보내 다시 요청
+    """
+    serializer_class = StoreWaitingRoomSerializer
+
+    @swagger_auto_schema(query_serializer=StoreWaitingRoomSerializer, responses={200: StoreWaitingRoomStatusSerializer})
+    def get(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+
+        waiting_room_status = StoreWaitingRoom.get_status(serializer.validated_data["ticket"])
+        if waiting_room_status is None:
+            raise ValidationError({"ticket": ["잘못된 번호표"]})
+        response = Response(StoreWaitingRoomStatusSerializer(waiting_room_status).data)
+        if waiting_room_status["retry_after"]:
+            response["Retry-After"] = str(waiting_room_status["retry_after"])
+        return response
@@ -3,7 +3,7 @@ from rest_framework import filters, mixins
 from django_filters.rest_framework import DjangoFilterBackend
 from drf_yasg.utils import swagger_auto_schema
 
-from core.pagenation import BasePagination
+from core.pagenation import BasePagination, PageNumberPagination
 from core.views import BaseGenericAPIView
 
 from moree.models import (
@@ -16,8 +16,10 @@ from moree.models import (
     UserReviewReport,
     UserStoreBookmark,
     UserStoreCategory,
+    UserStoreCollection,
     UserStoreStamp,
     UserTermAgreement,
+    StoreWaitingRoom,
 )
 from moree.filters import (
     UserFilter,
@@ -30,6 +32,7 @@ from moree.filters import (
     UserStoreBookmarkFilter,
     UserStoreCategoryFilter,
     UserStoreStampFilter,
+    UserStoreCollectionFilter,
     UserTermAgreementFilter,
 )
 from moree.enums import UserStatusEnum
@@ -45,6 +48,7 @@ from moree.serializers import (
     UserStoreBookmarkSerializer,
     UserStoreCategorySerializer,
     UserStoreStampSerializer,
+    UserStoreCollectionSerializer,
     UserTermAgreementSerializer,
 )
 
@@ -495,6 +499,12 @@ class UserStoreBookmarkView(
             return [UserPermission()]
         return super().get_permissions()
 
+    def perform_create(self, serializer):
+        tickets = StoreWaitingRoom.get_tickets(self.request)
+        for store in serializer.validated_data.get("stores", []):
+            StoreWaitingRoom.admit(store, self.request.user.id, tickets)
+        super().perform_create(serializer)
+
     @swagger_auto_schema()
     def get(self, request, *args, **kwargs):
         return self.list(request, *args, **kwargs)
@@ -527,6 +537,16 @@ class UserStoreBookmarkDetailView(
             return [UserPermission()]
         return super().get_permissions()
 
+    def perform_update(self, serializer):
+        # 새로 추가되는 스토어만 입장 대기
+        if "stores" in serializer.validated_data:
+            store_ids = set(serializer.instance.stores.values_list("id", flat=True))
+            tickets = StoreWaitingRoom.get_tickets(self.request)
+            for store in serializer.validated_data["stores"]:
+                if store.id not in store_ids:
+                    StoreWaitingRoom.admit(store, self.request.user.id, tickets)
+        super().perform_update(serializer)
+
     @swagger_auto_schema()
     def get(self, request, *args, **kwargs):
         return self.retrieve(request, *args, **kwargs)
@@ -649,6 +669,14 @@ class UserStoreStampView(
             return [UserPermission()]
         return super().get_permissions()
 
+    def perform_create(self, serializer):
+        StoreWaitingRoom.admit(
+            serializer.validated_data["store"],
+            self.request.user.id,
+            StoreWaitingRoom.get_tickets(self.request)
+        )
+        super().perform_create(serializer)
+
     @swagger_auto_schema()
     def get(self, request, *args, **kwargs):
         return self.list(request, *args, **kwargs)
@@ -699,6 +727,38 @@ class UserStoreStampDetailView(
         return self.destroy(request, *args, **kwargs)
 
 
+class UserStoreCollectionView(
+    mixins.ListModelMixin,
+    BaseGenericAPIView
+):
+    serializer_class = UserStoreCollectionSerializer
+    # 최근 갱신 순이므로 커서 페이지네이션은 지원하지 않음
+    pagination_class = PageNumberPagination
+
+    filter_backends = (DjangoFilterBackend, filters.OrderingFilter)
+    filterset_class = UserStoreCollectionFilter
+
+    def get_queryset(self):
+        queryset = None
+        if isinstance(self.request.user, User):
+            queryset = UserStoreCollection.objects.filter(
+                user=self.request.user,
+                character_count__gt=0,
+            ).order_by("-updated_at", "-id")
+        elif isinstance(self.request.user, AnonymousUser):
+            queryset = UserStoreCollection.objects.none()
+        return queryset
+
+    def get_permissions(self):
+        if self.request.method in ("GET",):
+            return [UserPermission()]
+        return super().get_permissions()
+
+    @swagger_auto_schema()
+    def get(self, request, *args, **kwargs):
+        return self.list(request, *args, **kwargs)
+
+
 class UserTermAgreementView(
     mixins.CreateModelMixin,
     mixins.ListModelMixin,
@@ -48,7 +48,12 @@ export DJANGO_SUPERUSER_EMAIL=${DJANGO_SUPERUSER_EMAIL}
 
 $PYTHON_CMD ${PROJECT_PATH}/manage.py createsuperuser --noinput
 
-$PYTHON_CMD ${PROJECT_PATH}/manage.py loaddata ${PROJECT_PATH}/sample_data.json
+# contenttype/permission/logentry 의 pk 는 모델 추가 시 달라지므로 migrate 가 생성한 것을 사용
+$PYTHON_CMD ${PROJECT_PATH}/manage.py loaddata ${PROJECT_PATH}/sample_data.json --exclude contenttypes --exclude auth.permission --exclude admin.logentry
+
+# loaddata 는 Model.save 를 거치지 않으므로 파생 인덱스 재생성
+$PYTHON_CMD ${PROJECT_PATH}/manage.py rebuild_store_index
+$PYTHON_CMD ${PROJECT_PATH}/manage.py rebuild_store_statistics
 
 # Insert test data
 #$PYTHON_CMD ${PROJECT_PATH}/manage.py insert_test_data